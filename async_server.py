@@ -0,0 +1,263 @@
+import asyncio
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from record_batcher import RecordBatcher
+from ingest_pipeline import IngestPipeline
+from ingest_api import MAX_BODY_BYTES, IngestAPI, Request, json_response
+from ingest_spool import Spool
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1 server protocol for the ingest API.
+
+    Handles keep-alive, pipelined requests, ``Expect: 100-continue`` and
+    Content-Length bodies up to ``MAX_BODY_BYTES``. Requests are answered
+    on the event loop, except routes the API lists in ``blocking_paths``
+    (reads from storage), which run on the loop's executor. A response
+    whose body is an iterable is streamed with chunked transfer encoding,
+    its chunks also produced on the executor and sent as the client reads
+    them. Reading from the connection is paused until such a response is
+    out, so pipelined requests cannot pile up meanwhile.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self.transport = None
+        self.buffer = bytearray()
+        # Set while a response is produced off the event loop
+        self.responding = False
+        self._continue_sent = False
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    def data_received(self, data):
+        self.buffer += data
+        # Pipelined requests wait in the buffer until that response is out
+        while self.transport is not None and not self.transport.is_closing() and not self.responding:
+            header_end = self.buffer.find(b"\r\n\r\n")
+            if header_end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self.reject(431)
+                return
+            try:
+                method, target, version, headers = self.parse_head(bytes(self.buffer[:header_end]))
+            except ValueError:
+                self.reject(400)
+                return
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                self.reject(411)
+                return
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.reject(400)
+                return
+            if length > MAX_BODY_BYTES:
+                self.reject(413)
+                return
+
+            body_start = header_end + 4
+            if len(self.buffer) < body_start + length:
+                if headers.get('expect', '').lower() == '100-continue' and not self._continue_sent:
+                    self._continue_sent = True
+                    self.transport.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                return
+            body = bytes(self.buffer[body_start:body_start + length])
+            del self.buffer[:body_start + length]
+            self._continue_sent = False
+
+            path, _, query = target.partition('?')
+            request = Request(method, path, dict(parse_qsl(query)), headers, body)
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+            if path in self.api.blocking_paths:
+                self.hold()
+                asyncio.get_running_loop().create_task(self.respond_later(request, keep_alive, version))
+                return
+            response = self.api.handle(request)
+            if not isinstance(response.body, (bytes, bytearray)):
+                self.hold()
+                asyncio.get_running_loop().create_task(
+                    self.stream_response(response, keep_alive and version == 'HTTP/1.1'))
+                return
+            self.write_response(response, keep_alive)
+            if not keep_alive:
+                self.transport.close()
+
+    def hold(self):
+        """Stop reading while a response is produced off the event loop"""
+        self.responding = True
+        self.transport.pause_reading()
+
+    def release(self):
+        self.responding = False
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    def parse_head(self, head):
+        lines = head.decode('latin-1').split("\r\n")
+        method, target, version = lines[0].split(" ")
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise ValueError(line)
+            headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    def format_head(self, response, framing, keep_alive):
+        head = [f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}",
+                f"Content-Type: {response.content_type}"]
+        if framing:
+            head.append(framing)
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        head.extend(f"{name}: {value}" for name, value in response.headers.items())
+        return ("\r\n".join(head) + "\r\n\r\n").encode('latin-1')
+
+    def write_response(self, response, keep_alive=True):
+        body = response.body
+        self.transport.write(self.format_head(response, f"Content-Length: {len(body)}", keep_alive) + body)
+
+    async def respond_later(self, request, keep_alive, version):
+        response = await asyncio.get_running_loop().run_in_executor(None, self.api.handle, request)
+        if not isinstance(response.body, (bytes, bytearray)):
+            await self.stream_response(response, keep_alive and version == 'HTTP/1.1')
+            return
+        self.release()
+        if self.transport is not None:
+            self.write_response(response, keep_alive)
+            if keep_alive:
+                self.data_received(b"")
+            else:
+                self.transport.close()
+
+    async def stream_response(self, response, keep_alive):
+        """Send an iterable body; HTTP/1.0 clients get it unframed, ended by close"""
+        loop = asyncio.get_running_loop()
+        chunks = iter(response.body)
+        complete = False
+        try:
+            framing = "Transfer-Encoding: chunked" if keep_alive else None
+            self.transport.write(self.format_head(response, framing, keep_alive))
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                if self.transport is None or self.transport.is_closing():
+                    return
+                if chunk:
+                    self.transport.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if keep_alive else chunk)
+                await self._can_write.wait()
+            if keep_alive:
+                self.transport.write(b"0\r\n\r\n")
+            complete = True
+        except Exception as e:
+            # Headers are out, so a failed stream can only be cut short
+            if self.api.message:
+                self.api.message(f"⚠️ Streamed response aborted: {str(e)}")
+        finally:
+            self.release()
+            if hasattr(chunks, 'close'):
+                try:
+                    chunks.close()
+                except ValueError:
+                    pass  # still running on the executor; it stops with the loop
+            if self.transport is not None:
+                if complete and keep_alive:
+                    self.data_received(b"")
+                else:
+                    self.transport.close()
+
+    def reject(self, status):
+        self.write_response(json_response({"error": HTTPStatus(status).phrase}, status), keep_alive=False)
+        self.transport.close()
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+class AsyncIngestServer:
+    """Serves an IngestAPI from one asyncio event loop"""
+
+    def __init__(self, api, host='127.0.0.1', port=5584, backlog=1024):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.loop = None
+        self._stopped = None
+
+    async def serve(self, on_ready=None):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await self.loop.create_server(lambda: HTTPProtocol(self.api), self.host, self.port,
+                                               backlog=self.backlog, reuse_address=True)
+        if on_ready:
+            on_ready()
+        async with server:
+            await self._stopped.wait()
+
+    def run(self, on_ready=None):
+        asyncio.run(self.serve(on_ready))
+
+    def stop(self):
+        """Stop serving; safe to call from any thread"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+
+
+class AsyncServerThread(QThread):
+    """Ingest server on an asyncio event loop with a bounded ingest queue.
+
+    One thread serves every connection, and requests over the queue limit
+    get 429 with Retry-After rather than piling up threads.
+    """
+
+    batch_received = pyqtSignal(list)
+    message = pyqtSignal(str)
+
+    def __init__(self, host='127.0.0.1', port=5584, max_pending=10000, spool_dir='ingest_spool'):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.is_running = True
+        # Records reach the GUI in coalesced batches after the ingest pipeline
+        self.batcher = RecordBatcher()
+        self.batcher.batch_ready.connect(self.batch_received)
+        self.pipeline = IngestPipeline(self.batcher.put, on_error=self.message.emit,
+                                       max_pending=max_pending, downstream_pending=self.batcher.pending)
+        # Accepted records are on disk before the client gets its 200
+        self.spool = Spool(spool_dir) if spool_dir else None
+        self.api = IngestAPI(self.pipeline, self.message.emit, spool=self.spool)
+        self.pipeline.on_drop = self.api.dropped
+        self.server = AsyncIngestServer(self.api, host, port)
+
+    def run(self):
+        try:
+            replayed = self.api.replay()
+            if replayed:
+                self.message.emit(f"♻️ Replaying {replayed} spooled records from the last session")
+            self.server.run(on_ready=lambda: self.message.emit(
+                f"🚀 Async ingest server listening on http://{self.host}:{self.port}"))
+        except Exception as e:
+            self.message.emit(f"❌ Async ingest server failed: {str(e)}")
+
+    def stop_server(self):
+        self.is_running = False
+        self.server.stop()
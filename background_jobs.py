@@ -0,0 +1,154 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when the job has been cancelled"""
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(object, int)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+    done = pyqtSignal(object)
+
+
+class Job(QRunnable):
+    """One unit of background work.
+
+    The function is called as ``fn(job, *args)`` on a pool thread and should
+    call ``job.report(done, total)`` (or ``job.check_cancelled()``) in its
+    loops so cancellation takes effect promptly.
+    """
+
+    def __init__(self, name, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.signals = JobSignals()
+        self.on_done = None
+        self.on_error = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._percent = -1
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def report(self, done, total):
+        """Report progress; raises JobCancelled if the job was cancelled"""
+        self.check_cancelled()
+        percent = int(done * 100 / total) if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            self.signals.progress.emit(self, percent)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(self, str(e))
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(self, result)
+        finally:
+            self._done.set()
+            self.signals.done.emit(self)
+
+
+class JobManager(QObject):
+    """Runs named jobs on a thread pool and delivers results on the GUI thread.
+
+    Submitting a job under a name that is already running cancels the old
+    one; results of cancelled or superseded jobs are dropped, so callbacks
+    only ever see the latest job of each name.
+    """
+
+    progress = pyqtSignal(str, int)
+    started = pyqtSignal(str)
+    stopped = pyqtSignal(str)
+
+    def __init__(self, max_threads=2):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self.jobs = {}
+        # Every job still on a pool thread, including cancelled ones
+        self._active = set()
+
+    def submit(self, name, fn, *args, on_done=None, on_error=None):
+        """Start ``fn(job, *args)`` in the background, superseding ``name``"""
+        self.cancel(name)
+        job = Job(name, fn, *args)
+        job.on_done = on_done
+        job.on_error = on_error
+        job.signals.progress.connect(self._on_progress)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.done.connect(self._on_done)
+        self.jobs[name] = job
+        self._active.add(job)
+        self.pool.start(job)
+        self.started.emit(name)
+        return job
+
+    def is_current(self, job):
+        return self.jobs.get(job.name) is job and not job.cancelled
+
+    def is_running(self, name=None):
+        return bool(self.jobs) if name is None else name in self.jobs
+
+    def cancel(self, name):
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            job.cancel()
+            self.stopped.emit(name)
+        return job
+
+    def cancel_all(self, wait=False):
+        """Cancel every job; with ``wait`` block until their threads return"""
+        for name in list(self.jobs):
+            self.cancel(name)
+        if wait:
+            for job in list(self._active):
+                job.wait()
+
+    def _on_progress(self, job, percent):
+        if self.is_current(job):
+            self.progress.emit(job.name, percent)
+
+    def _on_finished(self, job, result):
+        if not self.is_current(job):
+            return
+        del self.jobs[job.name]
+        self.stopped.emit(job.name)
+        if job.on_done:
+            job.on_done(result)
+
+    def _on_failed(self, job, message):
+        if not self.is_current(job):
+            return
+        del self.jobs[job.name]
+        self.stopped.emit(job.name)
+        if job.on_error:
+            job.on_error(message)
+
+    def _on_done(self, job):
+        self._active.discard(job)
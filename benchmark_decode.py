@@ -0,0 +1,96 @@
+"""Cost of decoding and validating one /store record.
+
+Times json and orjson decoding and record_schema validation for records
+shaped like those sent by content.js, SeleniumScrapingThread and
+RobotProcessExecutor. Each figure is the fastest of ``--repeat`` timed
+runs of ``--rounds`` records; the first line of output names the Python
+build and CPU it was measured on:
+
+    python benchmark_decode.py --elements 50
+"""
+import argparse
+import copy
+import json
+import platform
+import time
+
+from record_schema import loads, orjson, validate_record
+
+
+def element(i, **fields):
+    return dict({'selector': 'p', 'text': f'Paragraph {i} with some scraped text in it',
+                 'elementIndex': i, 'tagName': 'P', 'className': 'content', 'id': ''}, **fields)
+
+
+def sample_records(elements):
+    extension = {
+        'texts': [element(i) for i in range(elements)],
+        'images': [element(i, selector='img', src=f'https://example.com/{i}.png', alt='') for i in range(elements // 5)],
+        'links': [element(i, selector='a', href=f'https://example.com/page/{i}') for i in range(elements // 2)],
+        'tables': [{'selector': 'table', 'tableIndex': 0, 'headers': ['Name', 'Price'],
+                    'rows': [[f'Item {i}', f'{i}.99'] for i in range(elements)]}],
+        'custom': [element(i, selector='.card', html=f'<div class="card"><p>Card {i}</p></div>',
+                           attributes={'class': 'card', 'data-id': str(i)}) for i in range(elements // 5)],
+        'metadata': {'url': 'https://example.com/', 'title': 'Example', 'timestamp': '2025-10-23T10:00:00.000Z',
+                     'source': 'extension', 'config': {'selectors': {'text': ['p', 'h1']}}},
+    }
+    selenium = {
+        'texts': [{'selector': 'p', 'text': f'Paragraph {i}', 'full_text': f'Paragraph {i}'} for i in range(elements)],
+        'custom_elements': [],
+        'metadata': {'url': 'https://example.com/', 'timestamp': '2025-10-23 10:00:00', 'source': 'selenium'},
+    }
+    robot = {
+        'texts': [{'text': f'Value {i}', 'selector': '.value', 'step': 3, 'timestamp': 1761213600.0}
+                  for i in range(elements)],
+        'metadata': {'source': 'robot_process', 'timestamp': 1761213600.0, 'steps_executed': 5},
+    }
+    return {'extension': extension, 'selenium': selenium, 'robot_process': robot}
+
+
+def per_record(function, rounds, repeat, prepare=lambda: None):
+    """Fastest µs per call of ``function(prepare())`` over ``repeat`` runs"""
+    runs = []
+    for _ in range(repeat):
+        state = prepare()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            function(state)
+        runs.append((time.perf_counter() - started) / rounds * 1e6)
+    return min(runs)
+
+
+def cpu_name():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, default=50, help="text elements per record")
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{platform.python_implementation()} {platform.python_version()} on {cpu_name()}, "
+          f"orjson {getattr(orjson, '__version__', 'not installed')}, best of {args.repeat} runs")
+    print(f"{'record':<14}{'bytes':>9}{'json':>10}{'orjson':>10}{'validate':>10}   (µs per record)")
+    for name, record in sample_records(args.elements).items():
+        body = json.dumps(record).encode('utf-8')
+        json_us = per_record(lambda _: json.loads(body), args.rounds, args.repeat)
+        orjson_us = (per_record(lambda _: orjson.loads(body), args.rounds, args.repeat)
+                     if orjson is not None else float('nan'))
+        # Validation interns and replaces values, so every call gets a freshly decoded record
+        validate_us = per_record(lambda decoded: validate_record(decoded.pop()), args.rounds, args.repeat,
+                                 lambda: [loads(body) for _ in range(args.rounds)])
+        assert validate_record(copy.deepcopy(record)) == record
+        print(f"{name:<14}{len(body):>9}{json_us:>10.1f}{orjson_us:>10.1f}{validate_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
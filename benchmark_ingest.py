@@ -0,0 +1,131 @@
+"""Load test for the ingest server.
+
+Starts the server in a separate process pinned to one CPU core (without the
+GUI; records go through the ingest pipeline into a counter) and drives
+/store from keep-alive client connections:
+
+    python benchmark_ingest.py --mode async --requests 20000 --connections 50
+
+With ``--batch N`` each request posts N records to /store/batch as NDJSON
+(``--gzip`` compresses the body).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+
+
+def run_server(mode, port, max_pending, ready, spool=False):
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    from ingest_pipeline import IngestPipeline
+    from ingest_api import IngestAPI
+    from ingest_spool import Spool
+
+    pipeline = IngestPipeline(lambda record: None, max_pending=max_pending)
+    api = IngestAPI(pipeline, spool=Spool(tempfile.mkdtemp(prefix='ingest_spool')) if spool else None)
+    if mode == 'flask':
+        import logging
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        from flask_server import create_app
+        server = make_server('127.0.0.1', port, create_app(api), threaded=True)
+        ready.set()
+        server.serve_forever()
+    else:
+        from async_server import AsyncIngestServer
+        AsyncIngestServer(api, '127.0.0.1', port).run(on_ready=ready.set)
+
+
+def make_request(port, texts, batch=0, compress=False):
+    record = {
+        'texts': [{'selector': 'p', 'text': f'Benchmark text {i}'} for i in range(texts)],
+        'metadata': {'source': 'benchmark', 'url': 'http://example.com/', 'timestamp': time.time()}
+    }
+    if batch:
+        path, body = '/store/batch', "\n".join(json.dumps(record) for _ in range(batch)).encode('utf-8')
+    else:
+        path, body = '/store', json.dumps(record).encode('utf-8')
+    head = f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+    if compress:
+        body = gzip.compress(body)
+        head += "Content-Encoding: gzip\r\n"
+    head += f"Content-Length: {len(body)}\r\n\r\n"
+    return head.encode('latin-1') + body
+
+
+async def client(port, request, count, statuses, latencies):
+    writer = None
+    for _ in range(count):
+        started = time.perf_counter()
+        if writer is None:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length, close = 0, head.startswith(b"HTTP/1.0")
+        for line in head.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.lower() == b"content-length":
+                length = int(value)
+            elif name.lower() == b"connection":
+                close = value.strip().lower() == b"close"
+        await reader.readexactly(length)
+        statuses[int(head.split(b" ", 2)[1])] += 1
+        latencies.append(time.perf_counter() - started)
+        if close:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, requests, connections, texts, batch=0, compress=False):
+    request = make_request(port, texts, batch, compress)
+    statuses, latencies = Counter(), []
+    per_connection = requests // connections
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, request, per_connection, statuses, latencies)
+                           for _ in range(connections)))
+    return time.perf_counter() - started, statuses, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('async', 'flask'), default='async')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--texts', type=int, default=5, help="text elements per record")
+    parser.add_argument('--batch', type=int, default=0, help="records per /store/batch request")
+    parser.add_argument('--gzip', action='store_true', help="gzip request bodies")
+    parser.add_argument('--spool', action='store_true', help="write accepted records to a durable spool")
+    parser.add_argument('--max-pending', type=int, default=10000)
+    parser.add_argument('--port', type=int, default=5599)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=run_server, daemon=True,
+                                     args=(args.mode, args.port, args.max_pending, ready, args.spool))
+    server.start()
+    ready.wait(10)
+    try:
+        elapsed, statuses, latencies = asyncio.run(drive(args.port, args.requests, args.connections, args.texts,
+                                                         args.batch, args.gzip))
+    finally:
+        server.terminate()
+
+    total = sum(statuses.values())
+    print(f"mode={args.mode} requests={total} connections={args.connections}")
+    print(f"throughput: {total / elapsed:.0f} req/s over {elapsed:.2f}s"
+          + (f" ({total * args.batch / elapsed:.0f} records/s)" if args.batch else ""))
+    print(f"latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+    print("statuses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,40 @@
+import copy
+from bisect import bisect_left
 import json
 import os
+import threading
 import pandas as pd
 import numpy as np
-import re
 import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QListWidgetItem,
+    QTableView, QHeaderView, QListView,
     QTextEdit, QComboBox, QLabel, QSplitter, QDialog, QFormLayout, QDialogButtonBox,
-    QFileDialog, QMessageBox, QTabWidget, QCheckBox
+    QFileDialog, QMessageBox, QTabWidget, QCheckBox, QLineEdit, QProgressBar, QDoubleSpinBox, QSpinBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, QSortFilterProxyModel
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from data_store import ELEMENT_KEYS, JournalStore, LazyRecordList, scan_elements
+from sqlite_store import SQLiteStore
+from data_stats import DatasetStats
+from element_frame import ElementFrame
+from record_models import RecordListModel, ElementTableModel
+from background_jobs import JobManager
+from downsample import IncrementalLTTB
+from near_duplicates import NearDuplicateFilter, element_text
+from record_index import RecordIndex
+from retention import RetentionPolicy
+from ingest_spool import SPOOL_KEY
+from metrics import REGISTRY, source_label
+
+STORED_RECORDS = REGISTRY.counter('records_stored_total', "Records written to storage", ('source',))
+STORED_ELEMENTS = REGISTRY.counter('elements_stored_total', "Elements written to storage", ('source', 'kind'))
+
 
 class DataCleaningDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, title="Data Cleaning Options"):
         super().__init__(parent)
-        self.setWindowTitle("Data Cleaning Options")
+        self.setWindowTitle(title)
         self.setModal(True)
         self.setup_ui()
     
@@ -39,6 +57,18 @@ class DataCleaningDialog(QDialog):
         self.remove_short_texts_cb.setChecked(False)
         layout.addRow(self.remove_short_texts_cb)
         
+        self.near_duplicates_cb = QCheckBox("Remove near-duplicate elements")
+        self.near_duplicates_cb.setChecked(False)
+        layout.addRow(self.near_duplicates_cb)
+        
+        self.similarity_spin = QDoubleSpinBox()
+        self.similarity_spin.setRange(0.5, 1.0)
+        self.similarity_spin.setSingleStep(0.05)
+        self.similarity_spin.setValue(0.8)
+        self.similarity_spin.setEnabled(False)
+        self.near_duplicates_cb.toggled.connect(self.similarity_spin.setEnabled)
+        layout.addRow("Similarity threshold:", self.similarity_spin)
+        
         # Buttons
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.accepted.connect(self.accept)
@@ -50,15 +80,107 @@ class DataCleaningDialog(QDialog):
             'remove_empty': self.remove_empty_cb.isChecked(),
             'remove_duplicates': self.remove_duplicates_cb.isChecked(),
             'trim_whitespace': self.trim_whitespace_cb.isChecked(),
-            'remove_short_texts': self.remove_short_texts_cb.isChecked()
+            'remove_short_texts': self.remove_short_texts_cb.isChecked(),
+            'remove_near_duplicates': self.near_duplicates_cb.isChecked(),
+            'similarity_threshold': self.similarity_spin.value()
         }
+    
+    def set_cleaning_options(self, options):
+        self.remove_empty_cb.setChecked(options.get('remove_empty', False))
+        self.remove_duplicates_cb.setChecked(options.get('remove_duplicates', False))
+        self.trim_whitespace_cb.setChecked(options.get('trim_whitespace', False))
+        self.remove_short_texts_cb.setChecked(options.get('remove_short_texts', False))
+        self.near_duplicates_cb.setChecked(options.get('remove_near_duplicates', False))
+        self.similarity_spin.setValue(options.get('similarity_threshold', 0.8))
+
+class RetentionDialog(QDialog):
+    def __init__(self, policy, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Retention Policy")
+        self.setModal(True)
+        self.setup_ui(policy)
+    
+    def setup_ui(self, policy):
+        layout = QFormLayout(self)
+        layout.addRow(QLabel("0 means no limit. Applied by a background compaction."))
+        
+        self.spins = {}
+        for field, label, suffix in (('max_age_days', "Maximum age:", " days"),
+                                     ('max_per_source', "Max records per source:", ""),
+                                     ('max_per_url', "Max records per URL:", ""),
+                                     ('keep_latest', "Keep latest records:", "")):
+            spin = QSpinBox()
+            spin.setRange(0, 10000000)
+            spin.setSuffix(suffix)
+            spin.setValue(getattr(policy, field))
+            layout.addRow(label, spin)
+            self.spins[field] = spin
+        
+        # Buttons
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText("Save && Compact Now")
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addRow(button_box)
+    
+    def get_policy(self):
+        return RetentionPolicy(**{field: spin.value() for field, spin in self.spins.items()})
 
 class DataManager:
-    def __init__(self, main_window):
+    # Compact in the background once the journal grows past this size
+    auto_compact_bytes = 32 * 1024 * 1024
+    # Wait before writing a batch the store refused again
+    retry_interval_ms = 5000
+
+    def __init__(self, main_window, storage_backend='journal'):
         self.main_window = main_window
-        self.collected_data = []
-        self.data_file = "scraped_data.json"
+        self.storage_backend = storage_backend
+        if storage_backend == 'sqlite':
+            self.data_file = "scraped_data.db"
+            self.store = SQLiteStore(self.data_file)
+        else:
+            self.data_file = "scraped_data.json"
+            self.store = JournalStore(self.data_file)
+        self.collected_data = LazyRecordList(self.store)
+        self.retention_file = os.path.splitext(self.data_file)[0] + "_retention.json"
+        try:
+            self.retention = RetentionPolicy.load(self.retention_file)
+        except Exception:
+            self.retention = RetentionPolicy()
+        self.stats = DatasetStats()
+        self.frame = ElementFrame()
+        self.index = RecordIndex()
+        # Active record filter (query_records keyword arguments) or None
+        self.record_filter = None
+        # Bumped whenever the record list is replaced, so job results for
+        # older data are not applied
+        self.data_generation = 0
+        # Held while the record list, its index or the generation change, so
+        # the read API (on server threads) sees them consistent
+        self.read_lock = threading.RLock()
+        # Records the store refused, retried ahead of later batches, and
+        # spool sequence numbers of records not yet durable in the store
+        self.unsaved_records = []
+        self.unsynced_seqs = []
+        self.jobs = JobManager()
         self.setup_data_tab()
+        self.jobs.started.connect(self.on_job_started)
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.stopped.connect(self.on_job_stopped)
+        
+        # Periodically fsync the journal so quiet periods are still durable
+        self.sync_timer = QTimer()
+        self.sync_timer.timeout.connect(self.store.sync)
+        self.sync_timer.start(int(self.store.fsync_interval * 1000))
+
+        self.retry_timer = QTimer()
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(lambda: self.add_batch([]))
+        
+        # Enforce retention and fold the journal in the background
+        self.compaction_timer = QTimer()
+        self.compaction_timer.timeout.connect(self.auto_compact)
+        self.compaction_timer.start(10 * 60 * 1000)
     
     def setup_data_tab(self):
         """Setup the Data Manager tab interface"""
@@ -98,14 +220,80 @@ class DataManager:
         self.export_csv_btn.clicked.connect(lambda: self.export_data('csv'))
         control_layout.addWidget(self.export_csv_btn, 1, 1)
         
+        # Row 3
+        self.retention_btn = QPushButton("🗄️ Retention && Compaction")
+        self.retention_btn.clicked.connect(self.configure_retention)
+        control_layout.addWidget(self.retention_btn, 2, 0, 1, 2)
+        
         left_layout.addWidget(control_frame)
 
+        # Search across all stored elements
+        search_frame = QGroupBox("Search Elements")
+        search_layout = QHBoxLayout(search_frame)
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search scraped text...")
+        self.search_input.returnPressed.connect(self.search_data)
+        search_layout.addWidget(self.search_input)
+        
+        self.search_btn = QPushButton("🔍 Search")
+        self.search_btn.setStyleSheet("QPushButton { background-color: #007bff; color: white; padding: 8px; border-radius: 4px; }")
+        self.search_btn.clicked.connect(self.search_data)
+        search_layout.addWidget(self.search_btn)
+        
+        left_layout.addWidget(search_frame)
+
+        # Filter the records list through the record index
+        filter_frame = QGroupBox("Filter Records")
+        filter_layout = QGridLayout(filter_frame)
+        
+        self.filter_source = QComboBox()
+        self.filter_source.setEditable(True)
+        self.filter_source.addItem("All sources")
+        filter_layout.addWidget(self.filter_source, 0, 0)
+        
+        self.filter_url = QLineEdit()
+        self.filter_url.setPlaceholderText("URL or domain prefix")
+        filter_layout.addWidget(self.filter_url, 0, 1)
+        
+        self.filter_since = QLineEdit()
+        self.filter_since.setPlaceholderText("From (YYYY-MM-DD HH:MM)")
+        filter_layout.addWidget(self.filter_since, 1, 0)
+        
+        self.filter_until = QLineEdit()
+        self.filter_until.setPlaceholderText("To (YYYY-MM-DD HH:MM)")
+        filter_layout.addWidget(self.filter_until, 1, 1)
+        
+        self.filter_selector = QLineEdit()
+        self.filter_selector.setPlaceholderText("Selector")
+        filter_layout.addWidget(self.filter_selector, 2, 0)
+        
+        self.filter_text = QLineEdit()
+        self.filter_text.setPlaceholderText("Text contains")
+        filter_layout.addWidget(self.filter_text, 2, 1)
+        
+        for edit in (self.filter_url, self.filter_since, self.filter_until, self.filter_selector, self.filter_text):
+            edit.returnPressed.connect(self.apply_record_filter)
+        
+        self.apply_filter_btn = QPushButton("🔎 Apply Filter")
+        self.apply_filter_btn.clicked.connect(self.apply_record_filter)
+        filter_layout.addWidget(self.apply_filter_btn, 3, 0)
+        
+        self.clear_filter_btn = QPushButton("✖️ Clear Filter")
+        self.clear_filter_btn.clicked.connect(self.clear_record_filter)
+        filter_layout.addWidget(self.clear_filter_btn, 3, 1)
+        
+        left_layout.addWidget(filter_frame)
+
         # Data records list
         records_frame = QGroupBox("Data Records")
         records_layout = QVBoxLayout(records_frame)
         
-        self.records_list = QListWidget()
-        self.records_list.itemSelectionChanged.connect(self.on_record_selected)
+        self.records_model = RecordListModel(self.collected_data)
+        self.records_list = QListView()
+        self.records_list.setUniformItemSizes(True)
+        self.records_list.setModel(self.records_model)
+        self.records_list.selectionModel().selectionChanged.connect(self.on_record_selected)
         records_layout.addWidget(self.records_list)
         
         left_layout.addWidget(records_frame)
@@ -123,19 +311,39 @@ class DataManager:
         # Chart type
         analysis_layout.addWidget(QLabel("Chart:"), 1, 0)
         self.chart_type = QComboBox()
-        self.chart_type.addItems(["Bar Chart", "Line Chart", "Pie Chart", "Histogram"])
+        self.chart_type.addItems(["Bar Chart", "Line Chart", "Pie Chart", "Histogram", "Numeric Histogram"])
         analysis_layout.addWidget(self.chart_type, 1, 1)
         
+        # Numeric column (selector) for numeric analysis
+        analysis_layout.addWidget(QLabel("Numeric column:"), 2, 0)
+        self.numeric_column = QComboBox()
+        self.numeric_column.addItem("All selectors")
+        analysis_layout.addWidget(self.numeric_column, 2, 1)
+        
         # Action buttons
         self.analyze_btn = QPushButton("📈 Analyze Data")
         self.analyze_btn.setStyleSheet("QPushButton { background-color: #fd7e14; color: white; padding: 8px; border-radius: 4px; }")
         self.analyze_btn.clicked.connect(self.analyze_data)
-        analysis_layout.addWidget(self.analyze_btn, 2, 0)
+        analysis_layout.addWidget(self.analyze_btn, 3, 0)
         
         self.clean_btn = QPushButton("🧹 Clean Data")
         self.clean_btn.setStyleSheet("QPushButton { background-color: #e83e8c; color: white; padding: 8px; border-radius: 4px; }")
         self.clean_btn.clicked.connect(self.clean_data)
-        analysis_layout.addWidget(self.clean_btn, 2, 1)
+        analysis_layout.addWidget(self.clean_btn, 3, 1)
+        
+        # Background job progress
+        self.job_progress = QProgressBar()
+        self.job_progress.setFormat("Idle")
+        analysis_layout.addWidget(self.job_progress, 4, 0)
+        
+        self.cancel_job_btn = QPushButton("⏹️ Cancel")
+        self.cancel_job_btn.setEnabled(False)
+        self.cancel_job_btn.clicked.connect(self.cancel_jobs)
+        analysis_layout.addWidget(self.cancel_job_btn, 4, 1)
+        
+        self.ingest_cleaning_btn = QPushButton("⚙️ Clean Incoming Data...")
+        self.ingest_cleaning_btn.clicked.connect(self.configure_ingest_cleaning)
+        analysis_layout.addWidget(self.ingest_cleaning_btn, 5, 0, 1, 2)
         
         left_layout.addWidget(analysis_frame)
         
@@ -150,9 +358,24 @@ class DataManager:
         self.table_tab = QWidget()
         table_layout = QVBoxLayout(self.table_tab)
         
-        self.data_table = QTableWidget()
+        self.table_filter = QLineEdit()
+        self.table_filter.setPlaceholderText("Filter rows...")
+        table_layout.addWidget(self.table_filter)
+        
+        self.table_model = ElementTableModel()
+        self.table_proxy = QSortFilterProxyModel()
+        self.table_proxy.setSourceModel(self.table_model)
+        self.table_proxy.setFilterKeyColumn(-1)
+        self.table_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.table_filter.textChanged.connect(self.filter_table)
+        
+        self.data_table = QTableView()
+        self.data_table.setModel(self.table_proxy)
         self.data_table.setAlternatingRowColors(True)
         self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.data_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.data_table.setSortingEnabled(True)
+        self.data_table.horizontalHeader().sectionClicked.connect(lambda _: self.table_model.fetch_all())
         table_layout.addWidget(self.data_table)
         
         # Analysis View Tab
@@ -168,9 +391,25 @@ class DataManager:
         self.chart_tab = QWidget()
         chart_layout = QVBoxLayout(self.chart_tab)
         
+        self.live_chart_cb = QCheckBox("Live update (line chart / histogram)")
+        self.live_chart_cb.toggled.connect(self.toggle_live_chart)
+        chart_layout.addWidget(self.live_chart_cb)
+        
         self.chart_canvas = FigureCanvas(plt.Figure(figsize=(10, 6)))
         chart_layout.addWidget(self.chart_canvas)
         
+        # Live chart state: the artist being updated and what it was drawn from
+        self.live_chart = None
+        self.timeline_line = None
+        self.timeline_series = None
+        self.timeline_generation = None
+        self.timeline_hint = None
+        self.histogram_artist = None
+        self.histogram_hint = None
+        self.histogram_items = 0
+        self.live_timer = QTimer()
+        self.live_timer.timeout.connect(self.update_live_chart)
+        
         # Add tabs
         self.data_tabs.addTab(self.table_tab, "📋 Table View")
         self.data_tabs.addTab(self.analysis_tab, "📊 Analysis")
@@ -192,86 +431,136 @@ class DataManager:
         return self.tab
 
     def update_records_list(self):
-        """Update the records list widget"""
-        self.records_list.clear()
-        
-        for i, record in enumerate(self.collected_data):
-            metadata = record.get('metadata', {})
-            source = metadata.get('source', 'Unknown')
-            url = metadata.get('url', 'No URL')
-            timestamp = metadata.get('timestamp', 'No time')
-            
-            item_text = f"{i+1}. {source} | {timestamp}\n{url[:50]}..."
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, i)
-            self.records_list.addItem(item)
+        """Reset the records list model, keeping the selected row if it still exists"""
+        selected_row = self.selected_record_index()
+        rows = None
+        if self.record_filter:
+            rows = self.query_records(**self.record_filter)
+        self.records_model.set_records(self.collected_data, rows)
+        self.update_filter_sources()
+        if selected_row is not None and selected_row < len(self.collected_data):
+            row = selected_row if rows is None else bisect_left(rows, selected_row)
+            if row < self.records_model.rowCount() and self.records_model.index(row).data(Qt.UserRole) == selected_row:
+                self.records_list.setCurrentIndex(self.records_model.index(row))
+
+    def update_filter_sources(self):
+        """List the known sources in the filter bar"""
+        sources = self.index.sources()
+        if sources == [self.filter_source.itemText(i) for i in range(1, self.filter_source.count())]:
+            return
+        current = self.filter_source.currentText()
+        self.filter_source.clear()
+        self.filter_source.addItem("All sources")
+        self.filter_source.addItems(sources)
+        self.filter_source.setCurrentText(current)
+
+    def rebuild_index(self):
+        with self.read_lock:
+            self.index.rebuild(self.collected_data)
+
+    def query_records(self, source=None, url=None, since=None, until=None, selector=None, text=None):
+        """Return the positions of records matching every given filter.
+
+        ``url`` is a URL or domain prefix, ``since``/``until`` are epoch
+        seconds or date strings and ``text`` a case-insensitive substring of
+        any element. Raises ValueError for unparsable dates.
+        """
+        return self.index.query(self.collected_data, source, url, since, until, selector, text)
+
+    def apply_record_filter(self):
+        """Show only the records matching the filter bar"""
+        source = self.filter_source.currentText().strip()
+        record_filter = {
+            'source': source if source != "All sources" else None,
+            'url': self.filter_url.text().strip(),
+            'since': self.filter_since.text().strip(),
+            'until': self.filter_until.text().strip(),
+            'selector': self.filter_selector.text().strip(),
+            'text': self.filter_text.text().strip()
+        }
+        record_filter = {key: value for key, value in record_filter.items() if value} or None
+        previous, self.record_filter = self.record_filter, record_filter
+        try:
+            self.update_records_list()
+        except ValueError as e:
+            self.record_filter = previous
+            QMessageBox.warning(self.main_window, "Warning", f"Invalid filter: {str(e)}")
+            return
+        
+        if record_filter:
+            self.main_window.update_extension_status(
+                f"🔎 Filter: {self.records_model.rowCount()} of {len(self.collected_data)} records")
+
+    def clear_record_filter(self):
+        for edit in (self.filter_url, self.filter_since, self.filter_until, self.filter_selector, self.filter_text):
+            edit.clear()
+        self.filter_source.setCurrentIndex(0)
+        self.apply_record_filter()
+
+    def visible_records(self):
+        """Yield (position, record) for the records shown in the list"""
+        if not self.record_filter:
+            yield from enumerate(self.collected_data)
+            return
+        for row in range(self.records_model.rowCount()):
+            position = self.records_model.index(row).data(Qt.UserRole)
+            yield position, self.collected_data[position]
+
+    def selected_record_index(self):
+        """Return the index of the selected record, or None"""
+        selected = self.records_list.selectionModel().selectedIndexes()
+        if not selected:
+            return None
+        return selected[0].data(Qt.UserRole)
 
     def on_record_selected(self):
         """When a record is selected from the list"""
-        selected_items = self.records_list.selectedItems()
-        if not selected_items:
+        record_index = self.selected_record_index()
+        if record_index is None:
             return
         
-        item = selected_items[0]
-        record_index = item.data(Qt.UserRole)
         record = self.collected_data[record_index]
         
         self.display_record_in_table(record)
-        self.display_record_analysis(record)
+        self.display_record_analysis(record, record_index)
 
     def display_record_in_table(self, record):
         """Display record data in table format"""
-        table_data = []
-        
-        # Add texts
-        for text in record.get('texts', []):
-            table_data.append({
-                'Type': 'Text',
-                'Selector': text.get('selector', ''),
-                'Content': text.get('text', ''),
-                'Full Content': text.get('full_text', '')[:200] + '...' if len(text.get('full_text', '')) > 200 else text.get('full_text', '')
-            })
-        
-        # Add custom elements
-        for custom in record.get('custom_elements', []):
-            table_data.append({
-                'Type': 'Custom',
-                'Selector': custom.get('selector', ''),
-                'Content': custom.get('text', ''),
-                'Full Content': custom.get('full_text', '')[:200] + '...' if len(custom.get('full_text', '')) > 200 else custom.get('full_text', '')
-            })
-        
-        # Add images
-        for img in record.get('images', []):
-            table_data.append({
-                'Type': 'Image',
-                'Selector': img.get('selector', ''),
-                'Content': img.get('alt', ''),
-                'Full Content': img.get('src', '')
-            })
-        
-        # Add links
-        for link in record.get('links', []):
-            table_data.append({
-                'Type': 'Link',
-                'Selector': link.get('selector', ''),
-                'Content': link.get('text', ''),
-                'Full Content': link.get('href', '')
-            })
-        
-        # Setup table
-        self.data_table.setRowCount(len(table_data))
-        self.data_table.setColumnCount(4)
-        self.data_table.setHorizontalHeaderLabels(['Type', 'Selector', 'Content', 'Full Content'])
-        
-        # Populate table
-        for row, item in enumerate(table_data):
-            self.data_table.setItem(row, 0, QTableWidgetItem(item['Type']))
-            self.data_table.setItem(row, 1, QTableWidgetItem(item['Selector']))
-            self.data_table.setItem(row, 2, QTableWidgetItem(item['Content']))
-            self.data_table.setItem(row, 3, QTableWidgetItem(item['Full Content']))
-
-    def display_record_analysis(self, record):
+        self.table_model.set_record(record)
+
+    def filter_table(self, text):
+        """Filter the table rows; filtering covers all rows, not just fetched ones"""
+        if text:
+            self.table_model.fetch_all()
+        self.table_proxy.setFilterFixedString(text)
+
+    def search_data(self):
+        """Search element text across all stored records"""
+        query = self.search_input.text().strip()
+        if not query:
+            return
+        
+        try:
+            results = self.search_elements(text=query)
+        except Exception as e:
+            QMessageBox.critical(self.main_window, "Error", f"Search failed: {str(e)}")
+            return
+        
+        self.display_search_results(results)
+        self.main_window.update_extension_status(f"🔍 Search '{query}': {len(results)} matching elements")
+
+    def search_elements(self, text=None, source=None, url=None, kind=None, limit=500):
+        """Search elements, using the store's full-text index when available"""
+        if isinstance(self.store, SQLiteStore):
+            return self.store.search(text, source, url, kind, limit)
+        return scan_elements(self.collected_data, text, source, url, kind, limit)
+
+    def display_search_results(self, results):
+        """Display search results in the table view"""
+        self.table_model.set_results(results)
+        self.data_tabs.setCurrentWidget(self.table_tab)
+
+    def display_record_analysis(self, record, record_index=None):
         """Display basic analysis of the record"""
         analysis_text = "=== DATA ANALYSIS ===\n\n"
         
@@ -283,210 +572,287 @@ class DataManager:
         analysis_text += f"• Total Custom Elements: {len(record.get('custom_elements', []))}\n"
         analysis_text += f"• Total Tables: {len(record.get('tables', []))}\n\n"
         
+        # Use the record's rows of the shared element frame when it is current,
+        # otherwise a one-record frame
+        if record_index is not None and not self.frame.dirty:
+            frame, rows = self.frame, self.frame.record_rows(record_index)
+        else:
+            frame, rows = ElementFrame(capacity=1), slice(None)
+            frame.append_record(record)
+        
         # Text analysis
-        all_texts = [text.get('text', '') for text in record.get('texts', [])]
-        all_texts.extend([custom.get('text', '') for custom in record.get('custom_elements', [])])
-        
-        if all_texts:
-            text_lengths = [len(text) for text in all_texts if text.strip()]
-            if text_lengths:
-                analysis_text += "📝 TEXT ANALYSIS:\n"
-                analysis_text += f"• Average Text Length: {np.mean(text_lengths):.2f} chars\n"
-                analysis_text += f"• Max Text Length: {max(text_lengths)} chars\n"
-                analysis_text += f"• Min Text Length: {min(text_lengths)} chars\n"
-                analysis_text += f"• Total Characters: {sum(text_lengths)}\n\n"
+        empty = frame.column('empty')[rows]
+        text_lengths = frame.column('length')[rows][~empty]
+        if len(text_lengths):
+            analysis_text += "📝 TEXT ANALYSIS:\n"
+            analysis_text += f"• Average Text Length: {text_lengths.mean():.2f} chars\n"
+            analysis_text += f"• Max Text Length: {text_lengths.max()} chars\n"
+            analysis_text += f"• Min Text Length: {text_lengths.min()} chars\n"
+            analysis_text += f"• Total Characters: {text_lengths.sum()}\n\n"
         
         # Selector analysis
-        selectors = {}
-        for text in record.get('texts', []):
-            selector = text.get('selector', 'unknown')
-            selectors[selector] = selectors.get(selector, 0) + 1
-        
-        if selectors:
+        text_rows = frame.column('kind')[rows] == 0
+        selector_codes = frame.column('selector')[rows][text_rows]
+        if len(selector_codes):
+            counts = np.bincount(selector_codes, minlength=len(frame.selectors))
             analysis_text += "🎯 SELECTOR DISTRIBUTION:\n"
-            for selector, count in selectors.items():
-                analysis_text += f"• {selector}: {count} items\n"
+            for code in np.flatnonzero(counts):
+                analysis_text += f"• {frame.selectors[code]}: {counts[code]} items\n"
         
         self.analysis_text.setPlainText(analysis_text)
 
+    def analysis_snapshot(self):
+        """Capture what an analysis job needs, without rebuilding anything here"""
+        frame = None if self.frame.dirty else self.frame.snapshot()
+        stats = None if self.stats.dirty or frame is None else copy.deepcopy(self.stats)
+        return {
+            'generation': self.data_generation,
+            'records': self.collected_data.snapshot(),
+            'frame': frame,
+            'stats': stats
+        }
+
+    def build_analysis_data(self, job, snapshot):
+        """Return (frame, stats) for a snapshot, rebuilding whatever was invalidated"""
+        records = snapshot['records']
+        frame, stats = snapshot['frame'], snapshot['stats']
+        if frame is None:
+            frame = ElementFrame()
+            for i, record in enumerate(records.iter_records()):
+                job.report(i, len(records))
+                frame.append_record(record)
+        if stats is None:
+            job.check_cancelled()
+            stats = DatasetStats()
+            stats.rebuild(records.headers, frame)
+        return frame, stats
+
+    def adopt_analysis_data(self, snapshot, frame, stats):
+        """Take over a frame/stats rebuilt by a job and catch up on records added since"""
+        if snapshot['generation'] != self.data_generation:
+            return
+        new_records = range(len(snapshot['records']), len(self.collected_data))
+        if self.frame.dirty and snapshot['frame'] is None:
+            self.frame = frame
+            for i in new_records:
+                self.frame.append_record(self.collected_data[i])
+        if self.stats.dirty and snapshot['stats'] is None:
+            self.stats = stats
+            for i in new_records:
+                self.stats.add_record(self.collected_data[i])
+
     def analyze_data(self):
-        """Perform advanced data analysis"""
+        """Start an analysis job; a new click supersedes a running one"""
         if not self.collected_data:
             QMessageBox.warning(self.main_window, "Warning", "No data to analyze")
             return
         
-        analysis_type = self.analysis_type.currentText()
-        chart_type = self.chart_type.currentText()
+        self.jobs.submit('analysis', self.run_analysis, self.analysis_snapshot(),
+                         self.analysis_type.currentText(), self.chart_type.currentText(),
+                         self.selected_numeric_column(),
+                         on_done=self.on_analysis_done,
+                         on_error=lambda message: QMessageBox.critical(
+                             self.main_window, "Error", f"Analysis failed: {message}"))
+
+    def run_analysis(self, job, snapshot, analysis_type, chart_type, numeric_selector):
+        """Analysis job body; runs on a worker thread against the snapshot"""
+        frame, stats = self.build_analysis_data(job, snapshot)
+        job.check_cancelled()
+        
+        if analysis_type == "Basic Statistics":
+            text = self.basic_statistics_report(stats)
+        elif analysis_type == "Text Analysis":
+            text = self.text_analysis_report(stats)
+        elif analysis_type == "Numeric Analysis":
+            text = self.numeric_analysis_report(frame, numeric_selector)
+        elif analysis_type == "Data Cleaning":
+            text = self.data_cleaning_report(stats)
+        else:
+            text = ""
         
-        try:
-            if analysis_type == "Basic Statistics":
-                self.show_basic_statistics()
-            elif analysis_type == "Text Analysis":
-                self.show_text_analysis()
-            elif analysis_type == "Numeric Analysis":
-                self.show_numeric_analysis()
-            elif analysis_type == "Data Cleaning":
-                self.show_data_cleaning_report()
-            
-            # Generate chart
-            self.generate_chart(chart_type)
-            
-        except Exception as e:
-            QMessageBox.critical(self.main_window, "Error", f"Analysis failed: {str(e)}")
+        job.check_cancelled()
+        return {
+            'snapshot': snapshot,
+            'frame': frame,
+            'stats': stats,
+            'text': text,
+            'numeric_selectors': frame.numeric_selectors(),
+            'chart_type': chart_type,
+            'chart': self.chart_data(chart_type, snapshot['records'], frame, stats, numeric_selector,
+                                     snapshot['generation'])
+        }
+
+    def on_analysis_done(self, result):
+        """Show a finished analysis job's results"""
+        self.adopt_analysis_data(result['snapshot'], result['frame'], result['stats'])
+        self.analysis_text.setPlainText(result['text'])
+        self.update_numeric_columns(result['numeric_selectors'])
+        self.draw_chart(result['chart_type'], result['chart'])
+
+    def cancel_jobs(self):
+        """Cancel the running analysis/cleaning jobs"""
+        if self.jobs.is_running():
+            self.jobs.cancel_all()
+            self.main_window.update_extension_status("⏹️ Background job cancelled")
+
+    def on_job_started(self, name):
+        self.job_progress.setValue(0)
+        self.job_progress.setFormat(f"{name.capitalize()}: %p%")
+        self.cancel_job_btn.setEnabled(True)
+
+    def on_job_progress(self, name, percent):
+        self.job_progress.setFormat(f"{name.capitalize()}: %p%")
+        self.job_progress.setValue(percent)
+
+    def on_job_stopped(self, name):
+        if not self.jobs.is_running():
+            self.job_progress.setValue(0)
+            self.job_progress.setFormat("Idle")
+            self.cancel_job_btn.setEnabled(False)
 
-    def show_basic_statistics(self):
-        """Show comprehensive statistics"""
+    def basic_statistics_report(self, stats):
+        """Build the comprehensive statistics text"""
         stats_text = "=== COMPREHENSIVE STATISTICS ===\n\n"
         
-        total_records = len(self.collected_data)
-        stats_text += f"📈 TOTAL RECORDS: {total_records}\n\n"
-        
-        # Aggregate all data
-        all_texts = []
-        all_custom = []
-        all_images = []
-        all_links = []
-        
-        for record in self.collected_data:
-            all_texts.extend(record.get('texts', []))
-            all_custom.extend(record.get('custom_elements', []))
-            all_images.extend(record.get('images', []))
-            all_links.extend(record.get('links', []))
+        stats_text += f"📈 TOTAL RECORDS: {stats.record_count}\n\n"
         
         stats_text += "📊 DATA COUNTS:\n"
-        stats_text += f"• Texts: {len(all_texts)}\n"
-        stats_text += f"• Custom Elements: {len(all_custom)}\n"
-        stats_text += f"• Images: {len(all_images)}\n"
-        stats_text += f"• Links: {len(all_links)}\n\n"
+        stats_text += f"• Texts: {stats.kind_counts['texts']}\n"
+        stats_text += f"• Custom Elements: {stats.kind_counts['custom_elements']}\n"
+        stats_text += f"• Images: {stats.kind_counts['images']}\n"
+        stats_text += f"• Links: {stats.kind_counts['links']}\n\n"
         
         # Text statistics
-        text_contents = [item.get('text', '') for item in all_texts + all_custom if item.get('text', '').strip()]
-        if text_contents:
-            text_lengths = [len(text) for text in text_contents]
+        lengths = stats.text_lengths
+        if lengths.count:
             stats_text += "📝 TEXT STATISTICS:\n"
-            stats_text += f"• Mean Length: {np.mean(text_lengths):.2f} chars\n"
-            stats_text += f"• Median Length: {np.median(text_lengths):.2f} chars\n"
-            stats_text += f"• Std Dev: {np.std(text_lengths):.2f} chars\n"
-            stats_text += f"• Total Characters: {sum(text_lengths)}\n\n"
+            stats_text += f"• Mean Length: {lengths.mean:.2f} chars\n"
+            stats_text += f"• Median Length: {stats.length_sketch.quantile(0.5):.2f} chars\n"
+            stats_text += f"• Std Dev: {lengths.std:.2f} chars\n"
+            stats_text += f"• 90th Percentile: {stats.length_sketch.quantile(0.9):.2f} chars\n"
+            stats_text += f"• Total Characters: {int(lengths.total)}\n\n"
         
         # Source distribution
-        sources = {}
-        for record in self.collected_data:
-            source = record.get('metadata', {}).get('source', 'unknown')
-            sources[source] = sources.get(source, 0) + 1
-        
         stats_text += "🔧 SOURCE DISTRIBUTION:\n"
-        for source, count in sources.items():
+        for source, count in stats.source_counts.items():
             stats_text += f"• {source}: {count} records\n"
-        
-        self.analysis_text.setPlainText(stats_text)
 
-    def show_text_analysis(self):
-        """Perform text analysis"""
-        all_texts = []
-        for record in self.collected_data:
-            all_texts.extend([text.get('text', '') for text in record.get('texts', [])])
-            all_texts.extend([custom.get('text', '') for custom in record.get('custom_elements', [])])
+        duplicates = self.main_window.ingest_server.api.seen.hits
+        if duplicates:
+            stats_text += f"\n🔁 DUPLICATE POSTS DROPPED: {duplicates}\n"
+        
+        # Selector distribution
+        if stats.selector_counts:
+            stats_text += "\n🎯 TOP SELECTORS:\n"
+            for selector, count in stats.selector_counts.most_common(10):
+                stats_text += f"• {selector}: {count} items\n"
         
-        # Filter non-empty texts
-        all_texts = [text for text in all_texts if text.strip()]
+        return stats_text
+
+    def text_analysis_report(self, stats):
+        """Build the text analysis text"""
+        word_counts = stats.word_counts
+        char_counts = stats.text_lengths
         
         analysis_text = "=== TEXT ANALYSIS ===\n\n"
-        analysis_text += f"Total text items: {len(all_texts)}\n\n"
+        analysis_text += f"Total text items: {char_counts.count}\n\n"
         
-        if all_texts:
+        if char_counts.count:
             # Word count analysis
-            word_counts = [len(text.split()) for text in all_texts]
             analysis_text += "📊 WORD COUNT ANALYSIS:\n"
-            analysis_text += f"• Average words: {np.mean(word_counts):.2f}\n"
-            analysis_text += f"• Max words: {max(word_counts)}\n"
-            analysis_text += f"• Min words: {min(word_counts)}\n\n"
+            analysis_text += f"• Average words: {word_counts.mean:.2f}\n"
+            analysis_text += f"• Max words: {word_counts.max}\n"
+            analysis_text += f"• Min words: {word_counts.min}\n\n"
             
             # Character count analysis
-            char_counts = [len(text) for text in all_texts]
             analysis_text += "🔤 CHARACTER COUNT ANALYSIS:\n"
-            analysis_text += f"• Average chars: {np.mean(char_counts):.2f}\n"
-            analysis_text += f"• Max chars: {max(char_counts)}\n"
-            analysis_text += f"• Min chars: {min(char_counts)}\n\n"
+            analysis_text += f"• Average chars: {char_counts.mean:.2f}\n"
+            analysis_text += f"• Max chars: {char_counts.max}\n"
+            analysis_text += f"• Min chars: {char_counts.min}\n"
+            analysis_text += f"• 25th / 50th / 75th Percentile: " \
+                             f"{stats.length_sketch.quantile(0.25):.0f} / " \
+                             f"{stats.length_sketch.quantile(0.5):.0f} / " \
+                             f"{stats.length_sketch.quantile(0.75):.0f}\n\n"
             
             # Show sample texts by length
             analysis_text += "📝 TEXT LENGTH DISTRIBUTION:\n"
-            short_texts = len([t for t in all_texts if len(t) < 50])
-            medium_texts = len([t for t in all_texts if 50 <= len(t) < 200])
-            long_texts = len([t for t in all_texts if len(t) >= 200])
-            
-            analysis_text += f"• Short (<50 chars): {short_texts}\n"
-            analysis_text += f"• Medium (50-200 chars): {medium_texts}\n"
-            analysis_text += f"• Long (≥200 chars): {long_texts}\n"
+            analysis_text += f"• Short (<50 chars): {stats.length_classes['short']}\n"
+            analysis_text += f"• Medium (50-200 chars): {stats.length_classes['medium']}\n"
+            analysis_text += f"• Long (≥200 chars): {stats.length_classes['long']}\n"
         
-        self.analysis_text.setPlainText(analysis_text)
+        return analysis_text
+
+    def update_numeric_columns(self, selectors):
+        """Refresh the numeric column choices"""
+        current = self.numeric_column.currentText()
+        if [self.numeric_column.itemText(i) for i in range(1, self.numeric_column.count())] != selectors:
+            self.numeric_column.blockSignals(True)
+            self.numeric_column.clear()
+            self.numeric_column.addItems(["All selectors"] + selectors)
+            index = self.numeric_column.findText(current)
+            self.numeric_column.setCurrentIndex(max(index, 0))
+            self.numeric_column.blockSignals(False)
 
-    def show_numeric_analysis(self):
-        """Extract and analyze numeric data"""
+    def selected_numeric_column(self):
+        """Return the chosen selector, or None for all selectors"""
+        if self.numeric_column.currentIndex() <= 0:
+            return None
+        return self.numeric_column.currentText()
+
+    def numeric_analysis_report(self, frame, selector=None):
+        """Analyze the numeric values extracted at ingest, per selector"""
         analysis_text = "=== NUMERIC ANALYSIS ===\n\n"
         
-        # Extract numbers from text
-        all_numbers = []
-        for record in self.collected_data:
-            for text in record.get('texts', []):
-                content = text.get('text', '')
-                # Simple number extraction
-                numbers = re.findall(r'\d+\.?\d*', content)
-                all_numbers.extend([float(num) for num in numbers if self.is_convertible(num)])
-    
-        if all_numbers:
-            analysis_text += f"🔢 Found {len(all_numbers)} numeric values\n\n"
+        values = frame.numbers(selector)
+        
+        if len(values):
+            analysis_text += f"🔢 Found {len(values)} numeric values"
+            analysis_text += f" in '{selector}'\n\n" if selector else "\n\n"
+            q25, median, q75, q90 = np.percentile(values, [25, 50, 75, 90])
             analysis_text += "📊 DESCRIPTIVE STATISTICS:\n"
-            analysis_text += f"• Count: {len(all_numbers)}\n"
-            analysis_text += f"• Mean: {np.mean(all_numbers):.2f}\n"
-            analysis_text += f"• Median: {np.median(all_numbers):.2f}\n"
-            analysis_text += f"• Standard Deviation: {np.std(all_numbers):.2f}\n"
-            analysis_text += f"• Min: {min(all_numbers)}\n"
-            analysis_text += f"• Max: {max(all_numbers)}\n"
-            analysis_text += f"• Sum: {sum(all_numbers):.2f}\n\n"
+            analysis_text += f"• Count: {len(values)}\n"
+            analysis_text += f"• Mean: {values.mean():.2f}\n"
+            analysis_text += f"• Median: {median:.2f}\n"
+            analysis_text += f"• Standard Deviation: {values.std():.2f}\n"
+            analysis_text += f"• Min: {values.min():g}\n"
+            analysis_text += f"• Max: {values.max():g}\n"
+            analysis_text += f"• Sum: {values.sum():.2f}\n\n"
             
             # Quartiles
-            q25, q75 = np.percentile(all_numbers, [25, 75])
             analysis_text += f"• 25th Percentile: {q25:.2f}\n"
             analysis_text += f"• 75th Percentile: {q75:.2f}\n"
+            analysis_text += f"• 90th Percentile: {q90:.2f}\n\n"
+            
+            # Per-selector summary
+            numbers = frame.numbers_dataframe()
+            if selector:
+                numbers = numbers[numbers['selector'] == selector]
+            summary = numbers.groupby('selector', observed=True)['value'].agg(
+                ['count', 'mean', 'median', 'min', 'max']).sort_values('count', ascending=False)
+            units = numbers.groupby('selector', observed=True)['unit'].agg(
+                lambda unit: unit.value_counts().index[0])
+            analysis_text += "🏷️ BY SELECTOR:\n"
+            for name, row in summary.head(10).iterrows():
+                unit = f" {units[name]}" if units[name] else ""
+                analysis_text += (f"• {name}: {int(row['count'])} values, mean {row['mean']:.2f}{unit}, "
+                                  f"median {row['median']:.2f}, range {row['min']:g}–{row['max']:g}\n")
         else:
             analysis_text += "No numeric data found in the collected texts.\n"
         
-        self.analysis_text.setPlainText(analysis_text)
-
-    def is_convertible(self, text):
-        """Check if text can be converted to float"""
-        try:
-            float(text)
-            return True
-        except ValueError:
-            return False
+        return analysis_text
 
-    def show_data_cleaning_report(self):
-        """Show data quality report"""
+    def data_cleaning_report(self, stats):
+        """Build the data quality report"""
         report = "=== DATA CLEANING REPORT ===\n\n"
         
-        total_records = len(self.collected_data)
+        total_records = stats.record_count
         report += f"Total records analyzed: {total_records}\n\n"
         
         # Data quality metrics
-        empty_records = 0
-        records_with_text = 0
-        total_text_items = 0
-        empty_text_items = 0
-        
-        for record in self.collected_data:
-            texts = record.get('texts', [])
-            custom_elements = record.get('custom_elements', [])
-            
-            if not texts and not custom_elements:
-                empty_records += 1
-            else:
-                records_with_text += 1
-            
-            total_text_items += len(texts) + len(custom_elements)
-            empty_text_items += len([t for t in texts if not t.get('text', '').strip()])
-            empty_text_items += len([c for c in custom_elements if not c.get('text', '').strip()])
+        empty_records = stats.empty_records
+        records_with_text = total_records - empty_records
+        total_text_items = stats.text_items
+        empty_text_items = stats.empty_text_items
         
         report += "📊 DATA QUALITY METRICS:\n"
         report += f"• Empty records: {empty_records} ({empty_records/total_records*100:.1f}%)\n"
@@ -502,34 +868,52 @@ class DataManager:
         if records_with_text == 0:
             report += "• No usable data found - check scraping configuration\n"
         
-        self.analysis_text.setPlainText(report)
+        return report
+
+    def chart_data(self, chart_type, records, frame, stats, numeric_selector=None, snapshot_generation=None):
+        """Compute what a chart plots; runs on the worker thread"""
+        if chart_type == "Bar Chart":
+            return {
+                'Texts': stats.kind_counts['texts'],
+                'Custom': stats.kind_counts['custom_elements'],
+                'Images': stats.kind_counts['images'],
+                'Links': stats.kind_counts['links']
+            }
+        if chart_type == "Line Chart":
+            return self.timeline_series_for(records.headers), snapshot_generation
+        if chart_type == "Pie Chart":
+            return dict(stats.source_counts)
+        if chart_type == "Histogram":
+            return stats.length_histogram.dense(), stats.text_items
+        if chart_type == "Numeric Histogram":
+            values = frame.numbers(numeric_selector)
+            if not len(values):
+                return None
+            counts, edges = np.histogram(values, bins=min(30, max(1, len(np.unique(values)))))
+            return counts, edges, numeric_selector
+        return None
 
-    def generate_chart(self, chart_type):
-        """Generate charts based on data"""
+    def draw_chart(self, chart_type, data):
+        """Draw chart data prepared by an analysis job"""
         self.chart_canvas.figure.clear()
         ax = self.chart_canvas.figure.add_subplot(111)
+        self.live_chart = None
         
-        # Prepare data for charting
         if chart_type == "Bar Chart":
-            self.create_bar_chart(ax)
+            self.create_bar_chart(ax, data)
         elif chart_type == "Line Chart":
-            self.create_line_chart(ax)
+            self.create_line_chart(ax, *data)
         elif chart_type == "Pie Chart":
-            self.create_pie_chart(ax)
+            self.create_pie_chart(ax, data)
         elif chart_type == "Histogram":
-            self.create_histogram(ax)
+            self.create_histogram(ax, *data)
+        elif chart_type == "Numeric Histogram":
+            self.create_numeric_histogram(ax, data)
         
         self.chart_canvas.draw()
 
-    def create_bar_chart(self, ax):
+    def create_bar_chart(self, ax, types_count):
         """Create bar chart of data types"""
-        types_count = {
-            'Texts': sum(len(record.get('texts', [])) for record in self.collected_data),
-            'Custom': sum(len(record.get('custom_elements', [])) for record in self.collected_data),
-            'Images': sum(len(record.get('images', [])) for record in self.collected_data),
-            'Links': sum(len(record.get('links', [])) for record in self.collected_data)
-        }
-        
         bars = ax.bar(types_count.keys(), types_count.values(), color=['#3498db', '#2ecc71', '#e74c3c', '#f39c12'])
         ax.set_title('Data Types Distribution')
         ax.set_ylabel('Count')
@@ -540,34 +924,31 @@ class DataManager:
             ax.text(bar.get_x() + bar.get_width()/2., height,
                     f'{int(height)}', ha='center', va='bottom')
 
-    def create_line_chart(self, ax):
-        """Create line chart of records over time"""
-        if len(self.collected_data) < 2:
-            ax.text(0.5, 0.5, 'Need at least 2 records for timeline', 
-                    ha='center', va='center', transform=ax.transAxes)
-            return
-        
-        # Extract timestamps and counts
-        timestamps = []
-        text_counts = []
-        
-        for i, record in enumerate(self.collected_data):
-            timestamps.append(i + 1)
-            text_counts.append(len(record.get('texts', [])))
-    
-        ax.plot(timestamps, text_counts, marker='o', linewidth=2)
+    def timeline_series_for(self, headers):
+        """Downsampled series of text items per record (about one point per pixel column)"""
+        series = IncrementalLTTB(max_points=1000)
+        series.extend(np.arange(1, len(headers) + 1), [header['counts']['texts'] for header in headers])
+        return series
+
+    def create_line_chart(self, ax, series, generation):
+        """Create line chart of text items per record, downsampled with LTTB"""
+        self.timeline_series = series
+        self.timeline_generation = generation
+        self.live_chart = "Line Chart"
+        
+        x, y = series.points()
+        self.timeline_line, = ax.plot(x, y, marker='o' if len(x) <= 200 else '', linewidth=2)
+        self.timeline_line.set_visible(len(series) >= 2)
+        self.timeline_hint = ax.text(0.5, 0.5, 'Need at least 2 records for timeline', 
+                                     ha='center', va='center', transform=ax.transAxes)
+        self.timeline_hint.set_visible(len(series) < 2)
         ax.set_title('Text Items per Record')
         ax.set_xlabel('Record Number')
         ax.set_ylabel('Text Count')
         ax.grid(True, alpha=0.3)
 
-    def create_pie_chart(self, ax):
+    def create_pie_chart(self, ax, sources):
         """Create pie chart of source distribution"""
-        sources = {}
-        for record in self.collected_data:
-            source = record.get('metadata', {}).get('source', 'unknown')
-            sources[source] = sources.get(source, 0) + 1
-        
         if not sources:
             ax.text(0.5, 0.5, 'No data available', 
                     ha='center', va='center', transform=ax.transAxes)
@@ -578,25 +959,81 @@ class DataManager:
                                          colors=colors, startangle=90)
         ax.set_title('Data Source Distribution')
 
-    def create_histogram(self, ax):
-        """Create histogram of text lengths"""
-        all_texts = []
-        for record in self.collected_data:
-            all_texts.extend([text.get('text', '') for text in record.get('texts', [])])
-            all_texts.extend([custom.get('text', '') for custom in record.get('custom_elements', [])])
-        
-        text_lengths = [len(text) for text in all_texts if text.strip()]
-        
-        if not text_lengths:
-            ax.text(0.5, 0.5, 'No text data available', 
+    def create_histogram(self, ax, steps, text_items):
+        """Create histogram of text lengths from pre-binned counts"""
+        edges, counts = steps
+        self.histogram_items = text_items
+        self.live_chart = "Histogram"
+        
+        self.histogram_artist = ax.stairs(counts, edges, fill=True, alpha=0.7,
+                                          facecolor='skyblue', edgecolor='black')
+        self.histogram_hint = ax.text(0.5, 0.5, 'No text data available', 
+                                      ha='center', va='center', transform=ax.transAxes)
+        self.histogram_hint.set_visible(not len(counts))
+        ax.set_title('Text Length Distribution')
+        ax.set_xlabel('Text Length (characters)')
+        ax.set_ylabel('Frequency')
+
+    def create_numeric_histogram(self, ax, data):
+        """Create histogram of the extracted values of the selected numeric column"""
+        if data is None:
+            ax.text(0.5, 0.5, 'No numeric data available', 
                     ha='center', va='center', transform=ax.transAxes)
             return
         
-        ax.hist(text_lengths, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-        ax.set_title('Text Length Distribution')
-        ax.set_xlabel('Text Length (characters)')
+        counts, edges, selector = data
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+               alpha=0.7, color='mediumseagreen', edgecolor='black')
+        ax.set_title(f'Value Distribution: {selector or "All selectors"}')
+        ax.set_xlabel('Value')
         ax.set_ylabel('Frequency')
 
+    def toggle_live_chart(self, enabled):
+        if enabled:
+            self.live_timer.start(200)
+        else:
+            self.live_timer.stop()
+
+    def update_live_chart(self):
+        """Feed new records into the current chart's artists and repaint.
+
+        Only the line/step data changes; the figure is not rebuilt.
+        """
+        ax = self.chart_canvas.figure.axes[0] if self.chart_canvas.figure.axes else None
+        if ax is None:
+            return
+        
+        if self.live_chart == "Line Chart":
+            headers = self.collected_data.headers
+            series = self.timeline_series
+            if self.timeline_generation != self.data_generation or len(headers) < len(series):
+                series = self.timeline_series = self.timeline_series_for(headers)
+                self.timeline_generation = self.data_generation
+            elif len(headers) > len(series):
+                new_headers = headers[len(series):]
+                series.extend(np.arange(len(series) + 1, len(headers) + 1),
+                              [header['counts']['texts'] for header in new_headers])
+            else:
+                return
+            x, y = series.points()
+            self.timeline_line.set_data(x, y)
+            self.timeline_line.set_marker('o' if len(x) <= 200 else '')
+            self.timeline_line.set_visible(len(series) >= 2)
+            self.timeline_hint.set_visible(len(series) < 2)
+        elif self.live_chart == "Histogram":
+            if self.stats.dirty or self.stats.text_items == self.histogram_items:
+                return
+            edges, counts = self.stats.length_histogram.dense()
+            self.histogram_items = self.stats.text_items
+            self.histogram_artist.set_data(counts, edges)
+            self.histogram_hint.set_visible(not len(counts))
+        else:
+            return
+        
+        ax.relim()
+        ax.autoscale_view()
+        self.chart_canvas.draw_idle()
+
     def clean_data(self):
         """Open data cleaning dialog"""
         if not self.collected_data:
@@ -608,46 +1045,184 @@ class DataManager:
             cleaning_options = dialog.get_cleaning_options()
             self.apply_data_cleaning(cleaning_options)
 
+    def configure_ingest_cleaning(self):
+        """Choose the cleaning applied to records as they arrive"""
+        pipeline = self.main_window.ingest_server.pipeline
+        dialog = DataCleaningDialog(self.main_window, "Incoming Data Cleaning")
+        dialog.set_cleaning_options(pipeline.options)
+        if dialog.exec_() == QDialog.Accepted:
+            pipeline.configure(dict(dialog.get_cleaning_options(), normalize_fields=True))
+            self.main_window.update_extension_status("⚙️ Incoming data cleaning updated")
+
     def apply_data_cleaning(self, options):
-        """Apply data cleaning based on options"""
-        original_count = len(self.collected_data)
+        """Start a cleaning job against a snapshot of the records"""
+        records = self.collected_data.snapshot()
+        generation = self.data_generation
+        self.jobs.submit('cleaning', self.run_cleaning, records, options,
+                         on_done=lambda result: self.on_cleaning_done(result, len(records), generation),
+                         on_error=lambda message: QMessageBox.critical(
+                             self.main_window, "Error", f"Data cleaning failed: {message}"))
+        self.main_window.update_extension_status("🧹 Data cleaning started...")
+
+    def run_cleaning(self, job, records, options):
+        """Cleaning job body; returns (kept indices, {index: cleaned record},
+        number of near-duplicate elements removed).
+
+        Records are copied, never modified in place, so the GUI keeps
+        working on the originals until the result is applied.
+        """
+        keep = range(len(records))
         
         # Remove empty records
         if options.get('remove_empty', False):
-            self.collected_data = [record for record in self.collected_data 
-                                 if record.get('texts') or record.get('custom_elements')]
-        
-        # Remove duplicate texts
-        if options.get('remove_duplicates', False):
+            keep = [i for i in keep
+                    if records.header(i)['counts']['texts'] or records.header(i)['counts']['custom_elements']]
+        
+        cleaned = {}
+        remove_duplicates = options.get('remove_duplicates', False)
+        trim_whitespace = options.get('trim_whitespace', False)
+        near_duplicates = None
+        if options.get('remove_near_duplicates', False):
+            near_duplicates = NearDuplicateFilter(options.get('similarity_threshold', 0.8))
+        near_duplicate_count = 0
+        if remove_duplicates or trim_whitespace or near_duplicates:
+            kept = set(keep)
             seen_texts = set()
-            for record in self.collected_data:
-                unique_texts = []
-                for text in record.get('texts', []):
-                    text_content = text.get('text', '').strip()
-                    if text_content and text_content not in seen_texts:
-                        seen_texts.add(text_content)
-                        unique_texts.append(text)
-                record['texts'] = unique_texts
-        
-        # Trim whitespace
-        if options.get('trim_whitespace', False):
-            for record in self.collected_data:
-                for text in record.get('texts', []):
-                    if 'text' in text:
-                        text['text'] = text['text'].strip()
-                for custom in record.get('custom_elements', []):
-                    if 'text' in custom:
-                        custom['text'] = custom['text'].strip()
-        
-        new_count = len(self.collected_data)
-        removed_count = original_count - new_count
+            for i, record in enumerate(records.iter_records()):
+                job.report(i, len(records))
+                if i not in kept:
+                    continue
+                record = dict(record)
+                
+                # Remove duplicate texts
+                if remove_duplicates:
+                    unique_texts = []
+                    for text in record.get('texts', []):
+                        text_content = (text.get('text') or '').strip()
+                        if text_content and text_content not in seen_texts:
+                            seen_texts.add(text_content)
+                            unique_texts.append(text)
+                    record['texts'] = unique_texts
+                
+                # Remove near-duplicates, compared within each element type
+                if near_duplicates:
+                    for key in ('texts', 'custom_elements', 'links', 'images'):
+                        elements = record.get(key)
+                        if not elements:
+                            continue
+                        flags = near_duplicates.keep([element_text(key, e) for e in elements], key)
+                        record[key] = [e for e, flag in zip(elements, flags) if flag]
+                        near_duplicate_count += len(elements) - len(record[key])
+                
+                # Trim whitespace
+                if trim_whitespace:
+                    for key in ('texts', 'custom_elements'):
+                        if key in record:
+                            record[key] = [dict(item, text=item['text'].strip()) if 'text' in item else item
+                                           for item in record[key]]
+                cleaned[i] = record
+        return list(keep), cleaned, near_duplicate_count
+
+    def on_cleaning_done(self, result, snapshot_count, generation):
+        """Apply a finished cleaning job, keeping records that arrived meanwhile"""
+        if generation != self.data_generation:
+            self.main_window.update_extension_status("⚠️ Data changed during cleaning, result discarded")
+            return
+        
+        keep, cleaned, near_duplicate_count = result
+        # Running jobs hold record offsets that rewriting the store invalidates
+        self.jobs.cancel_all(wait=True)
+        with self.read_lock:
+            # Removed and replaced records, whose stored copies go
+            kept = set(keep) - set(cleaned)
+            dropped = [self.collected_data.header(i) for i in range(snapshot_count) if i not in kept]
+            self.collected_data = self.collected_data.select(
+                keep + list(range(snapshot_count, len(self.collected_data))), cleaned)
+            try:
+                self.collected_data = LazyRecordList(self.store, self.store.rewrite(self.collected_data, dropped))
+            except Exception as e:
+                self.main_window.update_extension_status(f"❌ Error saving cleaned data: {str(e)}")
+            self.rebuild_index()
+            self.data_generation += 1
+        removed_count = snapshot_count - len(keep)
         
         self.main_window.update_extension_status(f"🧹 Data cleaning completed: {removed_count} records removed")
+        if near_duplicate_count:
+            self.main_window.update_extension_status(f"🧹 Removed {near_duplicate_count} near-duplicate elements")
+        self.stats.invalidate()
+        self.frame.invalidate()
         self.refresh_data_view()
         
-        if removed_count > 0:
+        if removed_count > 0 or near_duplicate_count > 0:
             QMessageBox.information(self.main_window, "Success", 
-                                   f"Data cleaning completed!\nRemoved {removed_count} records/items.")
+                                   f"Data cleaning completed!\nRemoved {removed_count + near_duplicate_count} records/items.")
+
+    def configure_retention(self):
+        """Edit the retention policy and compact right away"""
+        dialog = RetentionDialog(self.retention, self.main_window)
+        if dialog.exec_() == QDialog.Accepted:
+            self.retention = dialog.get_policy()
+            try:
+                self.retention.save(self.retention_file)
+            except Exception as e:
+                self.main_window.update_extension_status(f"❌ Error saving retention policy: {str(e)}")
+            self.start_compaction()
+
+    def auto_compact(self):
+        """Timer hook: compact when the policy drops records or the journal is large"""
+        if self.jobs.is_running('compaction') or not self.collected_data:
+            return
+        journal_size = self.store.journal_size() if isinstance(self.store, JournalStore) else 0
+        if (journal_size > self.auto_compact_bytes or
+                len(self.retention.select(self.collected_data.headers)) < len(self.collected_data)):
+            self.start_compaction()
+
+    def start_compaction(self):
+        """Apply the retention policy in a background compaction job"""
+        records = self.collected_data.snapshot()
+        generation = self.data_generation
+        journal_end = self.store.journal_size() if isinstance(self.store, JournalStore) else None
+        self.jobs.submit('compaction', self.run_compaction, records, self.retention, journal_end,
+                         on_done=lambda result: self.on_compaction_done(result, len(records), generation),
+                         on_error=lambda message: self.main_window.update_extension_status(
+                             f"❌ Compaction failed: {message}"))
+        self.main_window.update_extension_status("🗄️ Compaction started...")
+
+    def run_compaction(self, job, records, policy, journal_end):
+        """Compaction job body; writes the kept records to temporary files"""
+        keep = policy.select(records.headers)
+        return keep, self.store.prepare_compaction(records, keep, journal_end, job.report)
+
+    def on_compaction_done(self, result, snapshot_count, generation):
+        """Swap in a finished compaction, keeping records that arrived meanwhile"""
+        keep, prepared = result
+        if generation != self.data_generation:
+            self.store.discard_compaction(prepared)
+            self.main_window.update_extension_status("⚠️ Data changed during compaction, result discarded")
+            return
+        
+        # Running jobs hold record offsets the new files invalidate
+        self.jobs.cancel_all(wait=True)
+        with self.read_lock:
+            try:
+                headers, reclaimed = self.store.commit_compaction(prepared)
+            except Exception as e:
+                self.data_generation += 1
+                self.store.discard_compaction(prepared)
+                self.main_window.update_extension_status(f"❌ Compaction failed: {str(e)}")
+                return
+            self.collected_data = LazyRecordList(self.store, headers)
+            self.rebuild_index()
+            # Bumped last, so readers never pair the new generation with the old list
+            self.data_generation += 1
+        
+        removed_count = snapshot_count - len(keep)
+        if removed_count:
+            self.stats.invalidate()
+            self.frame.invalidate()
+        self.update_records_list()
+        self.main_window.update_extension_status(
+            f"🗄️ Compaction finished: {removed_count} records removed, {reclaimed / 1024:.1f} KB reclaimed")
 
     def export_data(self, format_type='json'):
         """Export data in specified format"""
@@ -669,7 +1244,7 @@ class DataManager:
         if file_path:
             try:
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.collected_data, f, indent=2, ensure_ascii=False)
+                    json.dump([record for _, record in self.visible_records()], f, indent=2, ensure_ascii=False)
                 
                 self.main_window.update_extension_status(f"💾 Data exported to JSON: {file_path}")
                 QMessageBox.information(self.main_window, "Success", f"Data exported successfully to:\n{file_path}")
@@ -688,7 +1263,7 @@ class DataManager:
                 # Prepare data for CSV
                 csv_data = []
                 
-                for record_idx, record in enumerate(self.collected_data):
+                for record_idx, record in self.visible_records():
                     metadata = record.get('metadata', {})
                     
                     # Add texts
@@ -734,11 +1309,6 @@ class DataManager:
         """Refresh all data views"""
         self.update_records_list()
         
-        # Refresh table if a record is selected
-        selected_items = self.records_list.selectedItems()
-        if selected_items:
-            self.on_record_selected()
-        
         self.main_window.update_extension_status("🔃 Data view refreshed")
 
     def clear_data(self):
@@ -751,27 +1321,52 @@ class DataManager:
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.collected_data.clear()
-            self.save_data_to_file()
+            self.jobs.cancel_all(wait=True)
+            with self.read_lock:
+                try:
+                    self.store.clear()
+                except Exception as e:
+                    self.main_window.update_extension_status(f"❌ Error clearing saved data: {str(e)}")
+                self.collected_data = LazyRecordList(self.store)
+                self.index.reset()
+                self.data_generation += 1
+            self.stats.reset()
+            self.frame.reset()
             self.refresh_data_view()
             self.main_window.update_extension_status("🗑️ All data cleared")
 
     def save_data_to_file(self):
-        """Save current data to file"""
+        """Flush records still waiting for a group commit to disk"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.collected_data, f, indent=2, ensure_ascii=False)
+            self.store.sync()
             self.main_window.update_extension_status(f"💾 Data saved to {self.data_file}")
         except Exception as e:
             self.main_window.update_extension_status(f"❌ Error saving data: {str(e)}")
 
+    def close(self):
+        """Save and close the store; compaction is left to the retention timer"""
+        self.jobs.cancel_all(wait=True)
+        self.retry_timer.stop()
+        if self.unsaved_records or self.unsynced_seqs:
+            # Whatever still fails stays in the ingest spool and is replayed on restart
+            self.add_batch([])
+        self.save_data_to_file()
+        try:
+            self.store.close()
+        except Exception as e:
+            self.main_window.update_extension_status(f"❌ Error closing data store: {str(e)}")
+
     def load_saved_data(self):
-        """Load previously saved data from file"""
+        """Load record headers from the index; bodies are read on selection"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    saved_data = json.load(f)
-                    self.collected_data = saved_data
+            if self.store.exists():
+                self.jobs.cancel_all(wait=True)
+                with self.read_lock:
+                    self.collected_data = LazyRecordList(self.store, self.store.load_index())
+                    self.rebuild_index()
+                    self.data_generation += 1
+                self.stats.invalidate()
+                self.frame.invalidate()
                 self.main_window.update_extension_status(f"📂 Loaded {len(self.collected_data)} saved records")
                 self.refresh_data_view()
         except Exception as e:
@@ -779,6 +1374,61 @@ class DataManager:
 
     def add_data(self, data):
         """Add new data to the collection"""
-        self.collected_data.append(data)
-        self.save_data_to_file()
-        self.refresh_data_view()
\ No newline at end of file
+        self.add_batch([data])
+
+    def add_batch(self, records):
+        """Add a batch of records with one store write and one view update.
+
+        A batch the store refuses is kept out of the view and retried ahead
+        of later batches, so the view only shows stored records. Spooled
+        records are released from the ingest spool once durable.
+        """
+        # Records from the ingest spool carry their sequence number until stored
+        self.unsynced_seqs.extend(seq for seq in (data.pop(SPOOL_KEY, None) for data in records) if seq is not None)
+        records = self.unsaved_records + records
+        self.unsaved_records = []
+        try:
+            headers = self.store.append_many(records) if records else []
+        except Exception as e:
+            self.unsaved_records = records
+            self.retry_timer.start(self.retry_interval_ms)
+            self.main_window.update_extension_status(
+                f"❌ Error saving data: {str(e)} ({len(records)} records will be retried)")
+            return
+        for data in records:
+            source = source_label(data.get('metadata', {}).get('source'))
+            STORED_RECORDS.inc(source)
+            for kind in ELEMENT_KEYS:
+                if data.get(kind):
+                    STORED_ELEMENTS.inc(source, kind, amount=len(data[kind]))
+        if self.unsynced_seqs:
+            try:
+                self.store.sync()
+                self.main_window.ingest_server.spool.done(self.unsynced_seqs)
+                self.unsynced_seqs = []
+            except Exception as e:
+                self.retry_timer.start(self.retry_interval_ms)
+                self.main_window.update_extension_status(f"❌ Error syncing data: {str(e)}")
+        if not records:
+            return
+        with self.read_lock:
+            start = len(self.collected_data)
+            for data, header in zip(records, headers):
+                self.collected_data.append(data, header)
+            try:
+                for position, data in enumerate(records, start):
+                    self.index.add(self.collected_data.header(position), data)
+                    if not self.stats.dirty:
+                        self.stats.add_record(data)
+                    if not self.frame.dirty:
+                        self.frame.append_record(data)
+            except Exception as e:
+                # Slots must not raise; the views are rebuilt from the records instead
+                self.rebuild_index()
+                self.stats.invalidate()
+                self.frame.invalidate()
+                self.main_window.update_extension_status(f"⚠️ Error indexing new data: {str(e)}")
+        rows = None
+        if self.record_filter:
+            rows = self.index.query(self.collected_data, start=start, **self.record_filter)
+        self.records_model.records_appended(rows)
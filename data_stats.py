@@ -0,0 +1,238 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+
+class RunningStats:
+    """Online mean/variance (Welford) with min, max and total"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @classmethod
+    def from_array(cls, values):
+        """Build the running state for a whole array at once"""
+        stats = cls()
+        if len(values):
+            values = np.asarray(values)
+            stats.min = values.min().item()
+            stats.max = values.max().item()
+            values = values.astype(np.float64)
+            stats.count = len(values)
+            stats.mean = float(values.mean())
+            stats._m2 = float(((values - stats.mean) ** 2).sum())
+            stats.total = float(values.sum())
+        return stats
+
+    @property
+    def variance(self):
+        """Population variance, matching np.var"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """Streaming quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is within ``relative_accuracy`` of the true value and memory
+    only grows with the spread of the values, not their number.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, weight=1):
+        if value > 0:
+            self.positive[self._key(value)] += weight
+        elif value < 0:
+            self.negative[self._key(-value)] += weight
+        else:
+            self.zero_count += weight
+        self.count += weight
+
+    def add_many(self, values):
+        """Add an array of values in one vectorized pass"""
+        values = np.asarray(values, dtype=np.float64)
+        for sign, counter in ((1, self.positive), (-1, self.negative)):
+            selected = values[values * sign > 0] * sign
+            if len(selected):
+                keys, counts = np.unique(np.ceil(np.log(selected) / self._log_gamma), return_counts=True)
+                counter.update(dict(zip(keys.astype(int).tolist(), counts.tolist())))
+        self.zero_count += int((values == 0).sum())
+        self.count += len(values)
+
+    def quantile(self, q):
+        """Return the approximate q-quantile (0 <= q <= 1)"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def merge(self, other):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+
+class LengthHistogram:
+    """Fixed-width bucket counts of text lengths"""
+
+    def __init__(self, bucket_width=25):
+        self.bucket_width = bucket_width
+        self.buckets = Counter()
+
+    def add(self, length):
+        self.buckets[length // self.bucket_width] += 1
+
+    def add_many(self, lengths):
+        keys, counts = np.unique(np.asarray(lengths) // self.bucket_width, return_counts=True)
+        self.buckets.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def bins(self):
+        """Return (bucket start, count) pairs in order"""
+        return [(key * self.bucket_width, self.buckets[key]) for key in sorted(self.buckets)]
+
+    def dense(self):
+        """Return (edges, counts) arrays covering every bucket between the
+        smallest and largest, for step plots"""
+        if not self.buckets:
+            return np.zeros(1), np.zeros(0)
+        low, high = min(self.buckets), max(self.buckets)
+        counts = np.zeros(high - low + 1)
+        for key, count in self.buckets.items():
+            counts[key - low] = count
+        return np.arange(low, high + 2) * self.bucket_width, counts
+
+
+class DatasetStats:
+    """Aggregates over all collected records, maintained as records arrive.
+
+    The analysis views read from here instead of walking every record. Any
+    change that can't be applied incrementally (cleaning, reloading) marks
+    the stats dirty and they are rebuilt on next use from the record headers
+    and the ``ElementFrame`` columns.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.dirty = False
+        self.record_count = 0
+        self.empty_records = 0
+        self.kind_counts = Counter()
+        self.source_counts = Counter()
+        self.selector_counts = Counter()
+        self.text_items = 0
+        self.empty_text_items = 0
+        self.text_lengths = RunningStats()
+        self.word_counts = RunningStats()
+        self.length_sketch = QuantileSketch()
+        self.length_histogram = LengthHistogram()
+        self.length_classes = Counter()
+
+    def invalidate(self):
+        self.dirty = True
+
+    def rebuild(self, headers, frame):
+        """Recompute everything from record headers and an ElementFrame"""
+        self.reset()
+        self.record_count = len(headers)
+        for header in headers:
+            counts = header['counts']
+            self.source_counts[header.get('source') or 'unknown'] += 1
+            if not counts['texts'] and not counts['custom_elements']:
+                self.empty_records += 1
+            for kind in ('texts', 'custom_elements', 'images', 'links'):
+                self.kind_counts[kind] += counts[kind]
+
+        selector_counts = np.bincount(frame.column('selector'), minlength=len(frame.selectors))
+        self.selector_counts = Counter({selector: count for selector, count
+                                        in zip(frame.selectors, selector_counts.tolist()) if count})
+
+        empty = frame.column('empty')
+        self.text_items = len(frame)
+        self.empty_text_items = int(empty.sum())
+        lengths = frame.column('length')[~empty]
+        self.text_lengths = RunningStats.from_array(lengths)
+        self.word_counts = RunningStats.from_array(frame.column('words')[~empty])
+        self.length_sketch.add_many(lengths)
+        self.length_histogram.add_many(lengths)
+        self.length_classes = Counter({
+            'short': int((lengths < 50).sum()),
+            'medium': int(((lengths >= 50) & (lengths < 200)).sum()),
+            'long': int((lengths >= 200).sum())
+        })
+
+    def add_record(self, record):
+        self.record_count += 1
+        self.source_counts[record.get('metadata', {}).get('source') or 'unknown'] += 1
+
+        texts = record.get('texts', [])
+        custom_elements = record.get('custom_elements', [])
+        if not texts and not custom_elements:
+            self.empty_records += 1
+        for kind in ('texts', 'custom_elements', 'images', 'links'):
+            self.kind_counts[kind] += len(record.get(kind, []))
+
+        for item in texts + custom_elements:
+            self.selector_counts[item.get('selector') or 'unknown'] += 1
+            self.text_items += 1
+            text = item.get('text') or ''
+            if not text.strip():
+                self.empty_text_items += 1
+                continue
+            length = len(text)
+            self.text_lengths.add(length)
+            self.word_counts.add(len(text.split()))
+            self.length_sketch.add(length)
+            self.length_histogram.add(length)
+            if length < 50:
+                self.length_classes['short'] += 1
+            elif length < 200:
+                self.length_classes['medium'] += 1
+            else:
+                self.length_classes['long'] += 1
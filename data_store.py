@@ -0,0 +1,1062 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableSequence
+
+ELEMENT_KEYS = ('texts', 'custom_elements', 'images', 'links', 'tables')
+# Element lists that are stored by content hash
+ELEMENT_KINDS = ('texts', 'custom_elements', 'links', 'images')
+REFS_KEY = '$elements'
+DELTA_KEY = '$delta'
+
+
+def record_header(record):
+    """Build the lightweight header kept in memory for every record"""
+    metadata = record.get('metadata', {})
+    refs = record.get(REFS_KEY, {})
+    delta_counts = record.get(DELTA_KEY, {}).get('counts', {})
+    return {
+        'source': metadata.get('source'),
+        'url': metadata.get('url'),
+        'timestamp': metadata.get('timestamp'),
+        'counts': {key: delta_counts[key] if key in delta_counts else len(refs.get(key, record.get(key, [])))
+                   for key in ELEMENT_KEYS}
+    }
+
+
+def snapshot_key(record):
+    """Series key of a page snapshot: source, URL and selector set.
+
+    Returns None for records without a URL, which are never delta encoded.
+    """
+    metadata = record.get('metadata', {})
+    if not metadata.get('url'):
+        return None
+    selectors = set()
+    for kind in ELEMENT_KINDS:
+        for element in record.get(kind, []):
+            selectors.add(str(element.get('selector')))
+    return json.dumps([metadata.get('source'), metadata.get('url'), sorted(selectors)])
+
+
+def diff_refs(old, new):
+    """Return ops turning hash list ``old`` into ``new``.
+
+    Each op is ``[start, end, hashes]``: replace ``old[start:end]`` with
+    ``hashes``. A common prefix and suffix are skipped, so appended,
+    removed or changed elements in one region give a single small op.
+    """
+    if old == new:
+        return []
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    return [[start, end_old, new[start:end_new]]]
+
+
+def apply_refs(old, ops):
+    refs = list(old)
+    for start, end, hashes in sorted(ops, key=lambda op: op[0], reverse=True):
+        refs[start:end] = hashes
+    return refs
+
+
+class DeltaEncoder:
+    """Delta-encodes consecutive snapshots of the same page within one file.
+
+    For each series (see ``snapshot_key``) the encoder remembers the offset
+    and element hashes of the last record written. The next record of the
+    series is stored as a ``$delta`` against it: the base record's offset,
+    per-kind ops (see ``diff_refs``) and the element counts. Every
+    ``keyframe_interval``-th record, and any record whose delta would not be
+    smaller than its hash lists, is stored in full as a keyframe, so
+    rebuilding a record reads at most ``keyframe_interval`` lines.
+    """
+
+    def __init__(self, keyframe_interval=20):
+        self.keyframe_interval = keyframe_interval
+        self._series = {}
+
+    def reset(self):
+        self._series.clear()
+
+    def encode(self, record, encoded, offset):
+        """Return the stored form of ``encoded`` (the element-hash form of
+        ``record``) when written at ``offset``"""
+        key = snapshot_key(record)
+        if key is None:
+            return encoded
+        refs = encoded[REFS_KEY]
+        previous = self._series.get(key)
+        self._series[key] = (offset, refs, 0)
+        if previous is None or previous[2] + 1 >= self.keyframe_interval:
+            return encoded
+
+        base_offset, base_refs, chain = previous
+        ops = {}
+        changed = 0
+        for kind in set(base_refs) | set(refs):
+            kind_ops = diff_refs(base_refs.get(kind, []), refs.get(kind, []))
+            if kind_ops:
+                ops[kind] = kind_ops
+                changed += sum(len(op[2]) + 1 for op in kind_ops)
+        if changed >= sum(len(hashes) for hashes in refs.values()):
+            return encoded
+
+        self._series[key] = (offset, refs, chain + 1)
+        delta = {key: value for key, value in encoded.items() if key != REFS_KEY}
+        delta[DELTA_KEY] = {
+            'base': base_offset,
+            'ops': ops,
+            'counts': {kind: len(hashes) for kind, hashes in refs.items()}
+        }
+        return delta
+
+
+def element_hash(element):
+    """Content hash of an element body"""
+    data = json.dumps(element, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def scan_elements(records, text=None, source=None, url=None, kind=None, limit=500):
+    """Linear-scan element search for stores without a full-text index.
+
+    ``records`` is a LazyRecordList; bodies read from disk are not cached.
+    """
+    needle = text.lower() if text else None
+    results = []
+    for record_id, record in enumerate(records.iter_records()):
+        metadata = record.get('metadata', {})
+        if source and metadata.get('source') != source:
+            continue
+        if url and not str(metadata.get('url') or '').startswith(url):
+            continue
+        for element_kind in ELEMENT_KINDS:
+            if kind and element_kind != kind:
+                continue
+            for element in record.get(element_kind, []):
+                body = element.get('full_text') or element.get('text') or element.get('alt') or ''
+                if needle and needle not in str(body).lower():
+                    continue
+                results.append({
+                    'record_id': record_id,
+                    'kind': element_kind,
+                    'selector': element.get('selector'),
+                    'text': element.get('text'),
+                    'full_text': element.get('full_text'),
+                    'href': element.get('href'),
+                    'src': element.get('src'),
+                    'alt': element.get('alt'),
+                    'source': metadata.get('source'),
+                    'url': metadata.get('url'),
+                    'timestamp': metadata.get('timestamp')
+                })
+                if len(results) >= limit:
+                    return results
+    return results
+
+
+class ElementStore:
+    """Content-addressed store of element bodies.
+
+    Every distinct element is written once to ``<name>.elements`` as a
+    ``<hash>\t<json>`` line. Records only keep the hashes, and identical
+    elements loaded in memory share a single dict.
+
+    ``<name>.elements.idx`` holds the body offsets as fixed-width entries:
+    first those sorted by hash when the store was last rewritten, which are
+    binary searched on disk, then those of bodies added since, which are
+    read at startup. Bodies are cached in an LRU of ``cache_size``
+    elements, so neither opening nor reading the store takes memory in
+    proportion to its size.
+    """
+
+    # "<count of sorted entries>\n", then "<hash> <start> <length>\n" entries
+    INDEX_HEADER = 17
+    INDEX_ENTRY = 59
+
+    def __init__(self, path, cache_size=10000):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._sorted = 0
+        self._recent = None
+        self._index_end = 0
+        self._file = None
+        self._reader = None
+        self._index = None
+        self._index_reader = None
+
+    def _load_index(self):
+        if self._recent is not None:
+            return
+        self._recent = {}
+        if not os.path.exists(self.path):
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            self._sorted, self._index_end = 0, 0
+            return
+        try:
+            with open(self.index_path, 'rb') as f:
+                self._sorted = int(f.read(self.INDEX_HEADER), 16)
+                self._index_end = self.INDEX_HEADER + self._sorted * self.INDEX_ENTRY
+                if os.fstat(f.fileno()).st_size < self._index_end:
+                    raise ValueError("Element index is truncated")
+                f.seek(self._index_end)
+                while True:
+                    entry = f.read(self.INDEX_ENTRY)
+                    # A torn last entry is cut off when the index is next appended to
+                    if len(entry) < self.INDEX_ENTRY or not entry.endswith(b"\n"):
+                        break
+                    self._recent[entry[:32].decode('ascii')] = self._parse_entry(entry)
+                    self._index_end += self.INDEX_ENTRY
+        except (OSError, ValueError):
+            self._rebuild_index()
+
+    @staticmethod
+    def _parse_entry(entry):
+        return int(entry[33:49], 16), int(entry[50:58], 16)
+
+    def _rebuild_index(self):
+        """Scan the store file and write a fresh index"""
+        offsets = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    key, sep, body = line.partition(b"\t")
+                    if sep and line.endswith(b"\n"):
+                        offsets[key.decode('ascii')] = (offset + len(key) + 1, len(body) - 1)
+                    offset += len(line)
+        self._write_index(offsets)
+
+    def _write_index(self, offsets):
+        for f in (self._index, self._index_reader):
+            if f is not None:
+                f.close()
+        self._index = self._index_reader = None
+        tmp_file = self.index_path + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(b"%016x\n" % len(offsets))
+            for key in sorted(offsets):
+                f.write(b"%s %016x %08x\n" % (key.encode('ascii'), *offsets[key]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.index_path)
+        self._sorted, self._recent = len(offsets), {}
+        self._index_end = self.INDEX_HEADER + len(offsets) * self.INDEX_ENTRY
+
+    def _lookup(self, key):
+        """Return (start, length) of a hash's body, or None"""
+        self._load_index()
+        location = self._recent.get(key)
+        if location is not None or not self._sorted:
+            return location
+        if self._index_reader is None:
+            self._index_reader = open(self.index_path, 'rb')
+        target = key.encode('ascii')
+        low, high = 0, self._sorted
+        while low < high:
+            middle = (low + high) // 2
+            self._index_reader.seek(self.INDEX_HEADER + middle * self.INDEX_ENTRY)
+            entry = self._index_reader.read(self.INDEX_ENTRY)
+            if entry[:32] < target:
+                low = middle + 1
+            elif entry[:32] > target:
+                high = middle
+            else:
+                return self._parse_entry(entry)
+        return None
+
+    def __contains__(self, key):
+        return key in self._cache or self._lookup(key) is not None
+
+    def __len__(self):
+        self._load_index()
+        return self._sorted + len(self._recent)
+
+    def put(self, element):
+        """Store an element and return (hash, shared element)"""
+        key = element_hash(element)
+        cached = self._cached(key)
+        if cached is not None:
+            return key, cached
+        if self._lookup(key) is None:
+            if self._file is None:
+                self._open()
+            body = json.dumps(element, ensure_ascii=False).encode('utf-8')
+            start = self._file.tell() + len(key) + 1
+            self._file.write(key.encode('ascii') + b"\t" + body + b"\n")
+            self._file.flush()
+            self._add_entry(key, start, len(body))
+        self._remember(key, element)
+        return key, element
+
+    def _open(self):
+        self._file = open(self.path, 'ab')
+        # Terminate a torn last line so it can't swallow the next body
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def _add_entry(self, key, start, length):
+        if self._index is None:
+            if not os.path.exists(self.index_path):
+                self._write_index({})
+            self._index = open(self.index_path, 'r+b')
+            self._index.truncate(self._index_end)
+            self._index.seek(self._index_end)
+        self._index.write(b"%s %016x %08x\n" % (key.encode('ascii'), start, length))
+        self._index.flush()
+        self._index_end += self.INDEX_ENTRY
+        self._recent[key] = (start, length)
+
+    def _cached(self, key):
+        element = self._cache.get(key)
+        if element is not None:
+            self._cache.move_to_end(key)
+        return element
+
+    def _remember(self, key, element):
+        self._cache[key] = element
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _read(self, key):
+        """Return the raw body stored under a hash"""
+        for attempt in range(2):
+            location = self._lookup(key)
+            if location is None:
+                break
+            start, length = location
+            if self._reader is None:
+                self._reader = open(self.path, 'rb')
+            prefix = key.encode('ascii') + b"\t"
+            data = b""
+            if start >= len(prefix):
+                self._reader.seek(start - len(prefix))
+                data = self._reader.read(len(prefix) + length + 1)
+            if data.startswith(prefix) and len(data) == len(prefix) + length + 1 and data.endswith(b"\n"):
+                return data[len(prefix):-1]
+            if attempt == 0:
+                # The index doesn't match the file (a crash while it was rewritten)
+                self._rebuild_index()
+        raise KeyError(key)
+
+    def get(self, key):
+        """Return the element stored under a hash"""
+        element = self._cached(key)
+        if element is None:
+            element = json.loads(self._read(key))
+            self._remember(key, element)
+        return element
+
+    def encode(self, record):
+        """Return the on-disk form of a record with elements replaced by hashes.
+
+        The record's element lists are swapped for the shared instances.
+        """
+        encoded = {key: value for key, value in record.items() if key not in ELEMENT_KINDS}
+        refs = {}
+        for kind in ELEMENT_KINDS:
+            if kind in record:
+                hashes, elements = [], []
+                for element in record[kind]:
+                    key, element = self.put(element)
+                    hashes.append(key)
+                    elements.append(element)
+                record[kind] = elements
+                refs[kind] = hashes
+        encoded[REFS_KEY] = refs
+        return encoded
+
+    def decode(self, encoded):
+        """Rebuild a full record from its on-disk form"""
+        if REFS_KEY not in encoded:
+            return encoded
+        record = {key: value for key, value in encoded.items() if key != REFS_KEY}
+        for kind, hashes in encoded[REFS_KEY].items():
+            record[kind] = [self.get(key) for key in hashes]
+        return record
+
+    def sync(self):
+        for f in (self._file, self._index):
+            if f is not None:
+                os.fsync(f.fileno())
+
+    def close(self):
+        for f in (self._file, self._reader, self._index, self._index_reader):
+            if f is not None:
+                f.close()
+        self._file = self._reader = self._index = self._index_reader = None
+
+    def retain(self, keys):
+        """Rewrite the store keeping only the given hashes"""
+        tmp_file = self.path + ".tmp"
+        offsets = {}
+        with open(tmp_file, 'wb') as f:
+            for key in keys:
+                if key in offsets:
+                    continue
+                try:
+                    body = self._read(key)
+                except KeyError:
+                    continue
+                offsets[key] = (f.tell() + len(key) + 1, len(body))
+                f.write(key.encode('ascii') + b"\t" + body + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.install(tmp_file, offsets)
+
+    @staticmethod
+    def write_bodies(f, bodies, offsets):
+        """Write (hash, element) pairs not yet in ``offsets`` to an open store
+        file, recording their offsets"""
+        for key, element in bodies:
+            if key not in offsets:
+                body = json.dumps(element, ensure_ascii=False).encode('utf-8')
+                offsets[key] = (f.tell() + len(key) + 1, len(body))
+                f.write(key.encode('ascii') + b"\t" + body + b"\n")
+
+    def install(self, tmp_file, offsets):
+        """Replace the store file by a rewritten one with bodies at ``offsets``"""
+        self.close()
+        # Index first: one ahead of its file fails the check in _read and is rebuilt
+        self._write_index(offsets)
+        os.replace(tmp_file, self.path)
+        # Dropped bodies must not be found in the cache
+        self._cache.clear()
+
+    def clear(self):
+        """Delete every stored body"""
+        self.close()
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._recent = None
+        self._cache.clear()
+
+class JournalStore:
+    """Append-only JSONL journal in front of a compacted JSON snapshot.
+
+    New records are appended to ``<name>.jsonl`` one per line, so ingest cost
+    does not grow with the size of the history. ``compact`` folds everything
+    back into the JSON snapshot (still a plain JSON array, written one record
+    per line) and truncates the journal.
+
+    ``<name>.idx`` keeps the byte offset and header of every record so the
+    history can be opened without parsing record bodies.
+
+    With ``dedup_elements`` element bodies go to an ``ElementStore`` and the
+    journal and snapshot only hold their hashes; repeated snapshots of the
+    same page are then stored as deltas (see ``DeltaEncoder``).
+    """
+
+    def __init__(self, snapshot_file="scraped_data.json", journal_file=None,
+                 index_file=None, fsync_every=50, fsync_interval=2.0, dedup_elements=True):
+        base = os.path.splitext(snapshot_file)[0]
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or base + ".jsonl"
+        self.index_file = index_file or base + ".idx"
+        self.elements = ElementStore(base + ".elements") if dedup_elements else None
+        # Repeated snapshots of a page are stored as deltas (needs element hashes)
+        self.deltas = DeltaEncoder() if dedup_elements else None
+        self._refs_cache = OrderedDict()
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._journal = None
+        self._index = None
+        self._readers = {}
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Background jobs read records while the GUI thread appends
+        self._lock = threading.RLock()
+
+    def exists(self):
+        return os.path.exists(self.snapshot_file) or os.path.exists(self.journal_file)
+
+    def append(self, record):
+        """Append a single record to the journal and return its header"""
+        return self.append_many([record])[0]
+
+    def append_many(self, records):
+        """Append records to the journal with one write and return their headers.
+
+        A batch that fails is cut off the journal again, so it can be retried.
+        """
+        with self._lock:
+            if self._journal is None:
+                self._open_journal()
+            start = offset = self._journal.tell()
+            index_size = self._file_size(self.index_file)
+            try:
+                lines, headers = [], []
+                for record in records:
+                    encoded = self._encode(record)
+                    if self.deltas is not None:
+                        encoded = self.deltas.encode(record, encoded, offset)
+                    line = json.dumps(encoded, ensure_ascii=False).encode('utf-8')
+                    header = record_header(record)
+                    header.update({'file': 'journal', 'offset': offset, 'length': len(line)})
+                    offset += len(line) + 1
+                    lines.append(line)
+                    headers.append(header)
+                self._journal.write(b"".join(line + b"\n" for line in lines))
+                self._journal.flush()
+                self._write_index(headers)
+            except Exception:
+                self._abort_append(start, index_size)
+                raise
+            self._pending += len(headers)
+
+            # Group commit: one fsync per batch of records or per time window
+            if (self._pending >= self.fsync_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+            return headers
+
+    def _abort_append(self, journal_size, index_size):
+        for f in (self._journal, self._index):
+            try:
+                if f is not None:
+                    f.close()
+            except Exception:
+                pass
+        self._journal = self._index = None
+        for path, size in ((self.journal_file, journal_size), (self.index_file, index_size)):
+            try:
+                if size:
+                    os.truncate(path, size)
+                elif os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+        if self.deltas is not None:
+            # Series may point at records that were cut off
+            self.deltas.reset()
+
+    def _encode(self, record):
+        return self.elements.encode(record) if self.elements is not None else record
+
+    def _decode(self, record, path=None, offset=None):
+        if self.elements is None:
+            return record
+        if DELTA_KEY in record:
+            refs = self._record_refs(record, path)
+            record = {key: value for key, value in record.items() if key != DELTA_KEY}
+            record[REFS_KEY] = refs
+        if path is not None and REFS_KEY in record:
+            self._cache_refs(path, offset, record[REFS_KEY])
+        return self.elements.decode(record)
+
+    def _record_refs(self, record, path):
+        """Element hashes of a stored record, following its delta chain"""
+        if DELTA_KEY not in record:
+            return record.get(REFS_KEY, {})
+        delta = record[DELTA_KEY]
+        base_refs = self._refs_at(path, delta['base'])
+        return {kind: apply_refs(base_refs.get(kind, []), delta['ops'].get(kind, []))
+                for kind in delta['counts']}
+
+    def _refs_at(self, path, offset):
+        """Element hashes of the record stored at ``offset`` in ``path``"""
+        refs = self._refs_cache.get((path, offset))
+        if refs is not None:
+            self._refs_cache.move_to_end((path, offset))
+            return refs
+        reader = self._reader(path)
+        reader.seek(offset)
+        record = json.loads(reader.readline().rstrip(b"\r\n").rstrip(b","))
+        refs = self._record_refs(record, path)
+        self._cache_refs(path, offset, refs)
+        return refs
+
+    def _cache_refs(self, path, offset, refs):
+        self._refs_cache[(path, offset)] = refs
+        self._refs_cache.move_to_end((path, offset))
+        while len(self._refs_cache) > 1024:
+            self._refs_cache.popitem(last=False)
+
+    def _reader(self, path):
+        reader = self._readers.get(path)
+        if reader is None:
+            reader = self._readers[path] = open(path, 'rb')
+        return reader
+
+    def _open_journal(self):
+        self._journal = open(self.journal_file, 'ab')
+        if self.deltas is not None:
+            # Series continue only within this session's appends
+            self.deltas.reset()
+        # Terminate a torn last line so it can't swallow the next record
+        if self._journal.tell() > 0:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._journal.write(b"\n")
+
+    def _write_index(self, headers):
+        if self._index is None:
+            new_index = not os.path.exists(self.index_file)
+            self._index = open(self.index_file, 'ab')
+            if new_index:
+                # Unknown snapshot layout: forces a rescan on next load
+                self._index.write(json.dumps({'snapshot_size': -1}).encode('utf-8') + b"\n")
+        self._index.write(b"".join(json.dumps(header, ensure_ascii=False).encode('utf-8') + b"\n"
+                                   for header in headers))
+        self._index.flush()
+
+    def sync(self):
+        """Flush pending journal writes to disk"""
+        with self._lock:
+            if self._journal is not None and self._pending:
+                if self.elements is not None:
+                    self.elements.sync()
+                os.fsync(self._journal.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close all open files"""
+        with self._lock:
+            if self._journal is not None:
+                self.sync()
+                self._journal.close()
+                self._journal = None
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            if self.elements is not None:
+                self.elements.close()
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it"""
+        records = []
+        if os.path.exists(self.snapshot_file):
+            try:
+                records = [self._decode(record, self.snapshot_file, offset)
+                           for offset, _, record in self._scan_lines(self.snapshot_file)]
+            except ValueError:
+                # Legacy snapshot (pretty-printed or on one line)
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    records = [self._decode(record) for record in json.load(f)]
+        records.extend(self.replay())
+        return records
+
+    def replay(self):
+        """Yield journal records in append order"""
+        for offset, _, record in self._scan_lines(self.journal_file):
+            yield self._decode(record, self.journal_file, offset)
+
+    def load_index(self):
+        """Return the headers of all stored records, in order.
+
+        Only the index is read when it matches the data files; otherwise the
+        missing part is rebuilt by scanning and the index is rewritten.
+        """
+        meta, entries = self._read_index()
+        snapshot_entries = [e for e in entries if e['file'] == 'snapshot']
+        journal_entries = [e for e in entries if e['file'] == 'journal']
+        dirty = False
+
+        if (meta.get('snapshot_size') != self._file_size(self.snapshot_file) or
+                meta.get('snapshot_records') != len(snapshot_entries)):
+            try:
+                snapshot_entries = self._scan_snapshot()
+            except ValueError:
+                # Legacy snapshot (pretty-printed or on one line): migrate it once
+                return self.compact(self.load())
+            dirty = True
+
+        journal_end = 0
+        if journal_entries:
+            journal_end = journal_entries[-1]['offset'] + journal_entries[-1]['length'] + 1
+        journal_size = self.journal_size()
+        if journal_size < journal_end:
+            journal_entries = self._scan_journal(0)
+            dirty = True
+        elif journal_size > journal_end:
+            journal_entries.extend(self._scan_journal(journal_end))
+            dirty = True
+
+        if dirty:
+            self._write_full_index(snapshot_entries, journal_entries)
+        return snapshot_entries + journal_entries
+
+    def read_record(self, header):
+        """Read one record body from disk using its index header"""
+        with self._lock:
+            path = self.snapshot_file if header['file'] == 'snapshot' else self.journal_file
+            reader = self._reader(path)
+            reader.seek(header['offset'])
+            return self._decode(json.loads(reader.read(header['length'])), path, header['offset'])
+
+    def compact(self, records):
+        """Write all records to the snapshot, truncate the journal and
+        return the new record headers"""
+        with self._lock:
+            headers = []
+            referenced = []
+            tmp_file = self.snapshot_file + ".tmp"
+            snapshot_deltas = DeltaEncoder(self.deltas.keyframe_interval) if self.deltas is not None else None
+            with open(tmp_file, 'wb') as f:
+                f.write(b"[\n")
+                for i, record in enumerate(records):
+                    if i:
+                        f.write(b",\n")
+                    encoded = self._encode(record)
+                    if self.elements is not None:
+                        for hashes in encoded[REFS_KEY].values():
+                            referenced.extend(hashes)
+                        encoded = snapshot_deltas.encode(record, encoded, f.tell())
+                    line = json.dumps(encoded, ensure_ascii=False).encode('utf-8')
+                    header = record_header(record)
+                    header.update({'file': 'snapshot', 'offset': f.tell(), 'length': len(line)})
+                    headers.append(header)
+                    f.write(line)
+                f.write(b"\n]\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self.elements is not None:
+                self.elements.sync()
+            self.close()
+            self._refs_cache.clear()
+            os.replace(tmp_file, self.snapshot_file)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._write_full_index(headers, [])
+            if self.elements is not None:
+                # Drop bodies no record refers to anymore
+                self.elements.retain(referenced)
+            return headers
+
+    def rewrite(self, records, dropped=()):
+        """Replace the stored records by ``records`` (a LazyRecordList over
+        this store) and return their new headers.
+
+        The records are written as a fresh journal and the snapshot is
+        removed, so ``dropped`` (headers of records taken out of the list)
+        needs no handling here. Element bodies stay where they are; the
+        next compaction drops those no record refers to anymore.
+        """
+        with self._lock:
+            headers = []
+            tmp_file = self.journal_file + ".tmp"
+            deltas = DeltaEncoder(self.deltas.keyframe_interval) if self.deltas is not None else None
+            with open(tmp_file, 'wb') as f:
+                for index in range(len(records)):
+                    record = records.read(index)
+                    encoded = self._encode(record)
+                    if deltas is not None:
+                        encoded = deltas.encode(record, encoded, f.tell())
+                    line = json.dumps(encoded, ensure_ascii=False).encode('utf-8')
+                    header = record_header(record)
+                    header.update({'file': 'journal', 'offset': f.tell(), 'length': len(line)})
+                    headers.append(header)
+                    f.write(line + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self.elements is not None:
+                self.elements.sync()
+            self.close()
+            self._refs_cache.clear()
+            os.replace(tmp_file, self.journal_file)
+            if os.path.exists(self.snapshot_file):
+                os.remove(self.snapshot_file)
+            self._write_full_index([], headers)
+            return headers
+
+    def clear(self):
+        """Delete all stored records and element bodies"""
+        with self._lock:
+            self.close()
+            self._refs_cache.clear()
+            for path in (self.snapshot_file, self.journal_file, self.index_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            if self.elements is not None:
+                self.elements.clear()
+
+    def prepare_compaction(self, records, keep, journal_end, report=None):
+        """Write a compacted copy of the records at positions ``keep``.
+
+        Safe to run on a worker thread while records are appended: the
+        copies go to temporary files and only record reads take the lock.
+        ``journal_end`` is the journal size when ``records`` was taken;
+        ``commit_compaction`` carries over whatever was appended after it.
+        """
+        snapshot_tmp = self.snapshot_file + ".compact.tmp"
+        elements_tmp = self.elements.path + ".compact.tmp" if self.elements is not None else None
+        try:
+            return self._write_compaction(records, keep, journal_end, report, snapshot_tmp, elements_tmp)
+        except BaseException:
+            self.discard_compaction({'snapshot_tmp': snapshot_tmp, 'elements_tmp': elements_tmp})
+            raise
+
+    def _write_compaction(self, records, keep, journal_end, report, snapshot_tmp, elements_tmp):
+        deltas = DeltaEncoder(self.deltas.keyframe_interval) if self.deltas is not None else None
+        headers, offsets = [], {}
+        # Bodies are written as records are read, so only their offsets are kept in memory
+        bodies = open(elements_tmp, 'wb') if elements_tmp is not None else None
+        try:
+            with open(snapshot_tmp, 'wb') as f:
+                f.write(b"[\n")
+                for i, index in enumerate(keep):
+                    if report:
+                        report(i, len(keep))
+                    if i:
+                        f.write(b",\n")
+                    record = records.read(index)
+                    encoded = record
+                    if self.elements is not None:
+                        # Hash here rather than ElementStore.put, which belongs to the writer
+                        encoded = {key: value for key, value in record.items() if key not in ELEMENT_KINDS}
+                        refs = {}
+                        for kind in ELEMENT_KINDS:
+                            if kind in record:
+                                refs[kind] = [element_hash(element) for element in record[kind]]
+                                ElementStore.write_bodies(bodies, zip(refs[kind], record[kind]), offsets)
+                        encoded[REFS_KEY] = refs
+                        encoded = deltas.encode(record, encoded, f.tell())
+                    line = json.dumps(encoded, ensure_ascii=False).encode('utf-8')
+                    header = record_header(record)
+                    header.update({'file': 'snapshot', 'offset': f.tell(), 'length': len(line)})
+                    headers.append(header)
+                    f.write(line)
+                f.write(b"\n]\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if bodies is not None:
+                bodies.flush()
+                os.fsync(bodies.fileno())
+        finally:
+            if bodies is not None:
+                bodies.close()
+        return {'snapshot_tmp': snapshot_tmp, 'elements_tmp': elements_tmp, 'journal_end': journal_end,
+                'headers': headers, 'offsets': offsets}
+
+    def commit_compaction(self, prepared):
+        """Install a prepared compaction and return (headers, bytes reclaimed).
+
+        Records appended since it was prepared are rewritten into a fresh
+        journal; the returned headers cover the kept records followed by
+        those.
+        """
+        with self._lock:
+            files = [self.snapshot_file, self.journal_file, self.index_file]
+            if self.elements is not None:
+                files.extend((self.elements.path, self.elements.index_path))
+            size_before = sum(self._file_size(path) for path in files)
+
+            tail = [self._decode(record, self.journal_file, offset)
+                    for offset, _, record in self._scan_lines(self.journal_file, prepared['journal_end'])]
+            offsets = prepared['offsets']
+            if self.elements is not None and tail:
+                with open(prepared['elements_tmp'], 'ab') as f:
+                    ElementStore.write_bodies(f, ((element_hash(element), element) for record in tail
+                                                  for kind in ELEMENT_KINDS for element in record.get(kind, [])),
+                                              offsets)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self.close()
+            self._refs_cache.clear()
+            os.replace(prepared['snapshot_tmp'], self.snapshot_file)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            if self.elements is not None:
+                self.elements.install(prepared['elements_tmp'], offsets)
+            self._write_full_index(prepared['headers'], [])
+            # Appending re-encodes the tail against the new element store
+            tail_headers = self.append_many(tail) if tail else []
+            self.sync()
+            size_after = sum(self._file_size(path) for path in files)
+            return prepared['headers'] + tail_headers, size_before - size_after
+
+    def discard_compaction(self, prepared):
+        for path in (prepared['snapshot_tmp'], prepared['elements_tmp']):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def journal_size(self):
+        """Return the current journal size in bytes"""
+        return self._file_size(self.journal_file)
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _read_index(self):
+        meta, entries = {}, []
+        if not os.path.exists(self.index_file):
+            return meta, entries
+        with open(self.index_file, 'rb') as f:
+            for i, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if i == 0:
+                    meta = entry
+                else:
+                    entries.append(entry)
+        return meta, entries
+
+    def _write_full_index(self, snapshot_entries, journal_entries):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        meta = {
+            'snapshot_size': self._file_size(self.snapshot_file),
+            'snapshot_records': len(snapshot_entries)
+        }
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b"\n")
+            for entry in snapshot_entries + journal_entries:
+                f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n")
+        os.replace(tmp_file, self.index_file)
+
+    def _scan_lines(self, path, start=0):
+        """Yield (offset, length, record) for every record line in a file"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                body = line.rstrip(b"\r\n")
+                if body.endswith(b","):
+                    body = body[:-1]
+                if body and body not in (b"[", b"]", b"[]"):
+                    try:
+                        record = json.loads(body)
+                        if not isinstance(record, dict):
+                            # A whole array on one line, or a fragment of an indented one
+                            raise ValueError(f"Not one record per line at offset {offset}")
+                        yield offset, len(body), record
+                    except ValueError:
+                        if path == self.snapshot_file:
+                            raise
+                        # Torn write from a crash
+                offset += len(line)
+
+    def _scan_snapshot(self):
+        entries = []
+        for offset, length, record in self._scan_lines(self.snapshot_file):
+            header = record_header(record)
+            header.update({'file': 'snapshot', 'offset': offset, 'length': length})
+            entries.append(header)
+        return entries
+
+    def _scan_journal(self, start):
+        entries = []
+        for offset, length, record in self._scan_lines(self.journal_file, start):
+            header = record_header(record)
+            header.update({'file': 'journal', 'offset': offset, 'length': length})
+            entries.append(header)
+        return entries
+
+
+class LazyRecordList(MutableSequence):
+    """Record list backed by store headers.
+
+    Only headers are held for records read from disk; a record body is
+    loaded the first time it is accessed and cached afterwards.
+    """
+
+    def __init__(self, store=None, headers=None, records=None):
+        self.store = store
+        self.headers = list(headers or [])
+        self._bodies = list(records) if records is not None else [None] * len(self.headers)
+
+    def __len__(self):
+        return len(self.headers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self._bodies[index]
+        if record is None:
+            record = self.store.read_record(self.headers[index])
+            self._bodies[index] = record
+        return record
+
+    def __setitem__(self, index, record):
+        self._bodies[index] = record
+        self.headers[index] = record_header(record)
+
+    def __delitem__(self, index):
+        del self._bodies[index]
+        del self.headers[index]
+
+    def insert(self, index, record, header=None):
+        self.headers.insert(index, header or record_header(record))
+        self._bodies.insert(index, record)
+
+    def append(self, record, header=None):
+        self.insert(len(self), record, header)
+
+    def clear(self):
+        self.headers.clear()
+        self._bodies.clear()
+
+    def filter_headers(self, predicate):
+        """Keep only records whose header matches, without loading bodies"""
+        keep = [i for i, header in enumerate(self.headers) if predicate(header)]
+        self.headers = [self.headers[i] for i in keep]
+        self._bodies = [self._bodies[i] for i in keep]
+
+    def read(self, index):
+        """Return a record without caching a body read from disk"""
+        record = self._bodies[index]
+        return record if record is not None else self.store.read_record(self.headers[index])
+
+    def iter_records(self):
+        """Iterate over all records without caching bodies read from disk"""
+        for index, record in enumerate(self._bodies):
+            yield record if record is not None else self.store.read_record(self.headers[index])
+
+    def snapshot(self):
+        """Return a copy of the list that later appends and edits don't affect"""
+        return LazyRecordList(self.store, self.headers, self._bodies)
+
+    def select(self, indices, replacements=None):
+        """Return a new list of the records at ``indices``, with bodies
+        swapped for ``replacements[index]`` where given"""
+        replacements = replacements or {}
+        selected = LazyRecordList(self.store)
+        for index in indices:
+            if index in replacements:
+                selected.append(replacements[index])
+            else:
+                selected.headers.append(self.headers[index])
+                selected._bodies.append(self._bodies[index])
+        return selected
+
+    def header(self, index):
+        """Return the header of a record without loading its body"""
+        return self.headers[index]
+
+    def is_loaded(self, index):
+        return self._bodies[index] is not None
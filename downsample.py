@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class IncrementalLTTB:
+    """Largest-triangle-three-buckets downsampling over a growing series.
+
+    Each bucket keeps the point forming the largest triangle with the
+    previously kept point and the next bucket's average, which preserves
+    peaks and dips that plain striding would drop.
+
+    Buckets have a fixed size; a bucket's point is chosen once the bucket
+    after it is complete and never revisited, so appending costs time
+    proportional to the new points only. When the number of kept points
+    passes ``max_points`` the bucket size doubles and the selection is
+    redone once (amortized O(1) per point).
+    """
+
+    def __init__(self, max_points=2000, capacity=1024):
+        self.max_points = max_points
+        self.x = np.empty(capacity, dtype=np.float64)
+        self.y = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.bucket_size = 1
+        self._selected = []
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self.size + len(x) > len(self.x):
+            capacity = len(self.x)
+            while capacity < self.size + len(x):
+                capacity *= 2
+            for name in ('x', 'y'):
+                grown = np.empty(capacity, dtype=np.float64)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+        self.x[self.size:self.size + len(x)] = x
+        self.y[self.size:self.size + len(y)] = y
+        self.size += len(x)
+        self._select()
+
+    def _select(self):
+        if self.size and not self._selected:
+            self._selected.append(0)
+        b = self.bucket_size
+        x, y = self.x, self.y
+        # Bucket k covers [1 + k*b, 1 + (k+1)*b) and is final once bucket k+1 is complete
+        k = len(self._selected) - 1
+        while 1 + (k + 2) * b <= self.size:
+            start, end, next_end = 1 + k * b, 1 + (k + 1) * b, 1 + (k + 2) * b
+            a = self._selected[-1]
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+            areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+            self._selected.append(start + int(areas.argmax()))
+            k += 1
+            if len(self._selected) > self.max_points:
+                self.bucket_size *= 2
+                self._selected = []
+                return self._select()
+
+    def points(self):
+        """Return the downsampled (x, y) arrays, ending at the newest point"""
+        indices = list(self._selected)
+        if self.size and (not indices or indices[-1] != self.size - 1):
+            indices.append(self.size - 1)
+        return self.x[indices], self.y[indices]
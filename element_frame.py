@@ -0,0 +1,232 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from numeric_extract import extract_numbers
+
+# Element lists that carry text and end up as frame rows
+TEXT_KINDS = ('texts', 'custom_elements')
+
+
+def parse_timestamp(value):
+    """Convert a record timestamp (epoch number or date string) to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return np.nan
+
+
+class ElementFrame:
+    """Columnar view of every text element in the collected data.
+
+    One row per text/custom element with record id, kind, source, selector,
+    text length, word count and record timestamp, kept in NumPy arrays that
+    grow as records are appended. Source and selector are stored as integer
+    codes into ``sources`` / ``selectors``.
+
+    Numbers found in element text are parsed once on append into a second,
+    typed table (record id, selector, value, unit) so numeric analysis can
+    run per selector without touching the text again.
+    """
+
+    COLUMNS = {
+        'record_id': np.int64,
+        'kind': np.int8,
+        'source': np.int32,
+        'selector': np.int32,
+        'length': np.int32,
+        'words': np.int32,
+        'timestamp': np.float64,
+        'empty': np.bool_,
+    }
+
+    NUMBER_COLUMNS = {
+        'record_id': np.int64,
+        'selector': np.int32,
+        'value': np.float64,
+        'unit': np.int16,
+    }
+
+    def __init__(self, capacity=1024, decimal_separator='.'):
+        self.decimal_separator = decimal_separator
+        self.reset(capacity)
+
+    def reset(self, capacity=1024):
+        self.dirty = False
+        self.size = 0
+        self.number_count = 0
+        self.record_count = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self._numbers = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.NUMBER_COLUMNS.items()}
+        self.sources = []
+        self.selectors = []
+        self.units = []
+        self._source_codes = {}
+        self._selector_codes = {}
+        self._unit_codes = {}
+        self._dataframe = None
+
+    def invalidate(self):
+        self.dirty = True
+
+    def rebuild(self, records):
+        self.reset()
+        for record in records:
+            self.append_record(record)
+
+    def __len__(self):
+        return self.size
+
+    def snapshot(self):
+        """Return a frozen copy for reading on another thread.
+
+        Appends only write past ``size`` (or into freshly grown arrays), so
+        the snapshot can share the filled part of the columns.
+        """
+        frame = ElementFrame.__new__(ElementFrame)
+        frame.decimal_separator = self.decimal_separator
+        frame.dirty = self.dirty
+        frame.size = self.size
+        frame.number_count = self.number_count
+        frame.record_count = self.record_count
+        frame._columns = {name: column[:self.size] for name, column in self._columns.items()}
+        frame._numbers = {name: column[:self.number_count] for name, column in self._numbers.items()}
+        frame.sources = list(self.sources)
+        frame.selectors = list(self.selectors)
+        frame.units = list(self.units)
+        frame._source_codes = dict(self._source_codes)
+        frame._selector_codes = dict(self._selector_codes)
+        frame._unit_codes = dict(self._unit_codes)
+        frame._dataframe = self._dataframe
+        return frame
+
+    def _code(self, value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _reserve(self, columns, size, extra):
+        capacity = len(columns['record_id'])
+        if size + extra <= capacity:
+            return
+        while capacity < size + extra:
+            capacity *= 2
+        for name, column in columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:size] = column[:size]
+            columns[name] = grown
+
+    def append_record(self, record):
+        """Append the text elements of the next record; returns its record id"""
+        record_id = self.record_count
+        self.record_count += 1
+
+        metadata = record.get('metadata', {})
+        source = self._code(metadata.get('source') or 'unknown', self.sources, self._source_codes)
+        timestamp = parse_timestamp(metadata.get('timestamp'))
+
+        rows = [(kind, item) for kind, key in enumerate(TEXT_KINDS) for item in record.get(key, [])]
+        if not rows:
+            return record_id
+        self._reserve(self._columns, self.size, len(rows))
+        start, end = self.size, self.size + len(rows)
+
+        texts = [item.get('text') or '' for _, item in rows]
+        selectors = [self._code(item.get('selector') or 'unknown', self.selectors, self._selector_codes)
+                     for _, item in rows]
+        columns = self._columns
+        columns['record_id'][start:end] = record_id
+        columns['kind'][start:end] = [kind for kind, _ in rows]
+        columns['source'][start:end] = source
+        columns['selector'][start:end] = selectors
+        columns['length'][start:end] = [len(text) for text in texts]
+        columns['words'][start:end] = [len(text.split()) for text in texts]
+        columns['timestamp'][start:end] = timestamp
+        columns['empty'][start:end] = [not text.strip() for text in texts]
+
+        self.size = end
+        self._dataframe = None
+        self._append_numbers(record_id, selectors, texts)
+        return record_id
+
+    def _append_numbers(self, record_id, selectors, texts):
+        numbers = [(selector, value, self._code(unit, self.units, self._unit_codes))
+                   for selector, text in zip(selectors, texts)
+                   for value, unit in extract_numbers(text, self.decimal_separator)]
+        if not numbers:
+            return
+        self._reserve(self._numbers, self.number_count, len(numbers))
+        start, end = self.number_count, self.number_count + len(numbers)
+
+        selectors, values, units = zip(*numbers)
+        columns = self._numbers
+        columns['record_id'][start:end] = record_id
+        columns['selector'][start:end] = selectors
+        columns['value'][start:end] = values
+        columns['unit'][start:end] = units
+        self.number_count = end
+
+    def column(self, name):
+        """Return a read-only view of a column"""
+        view = self._columns[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def number_column(self, name):
+        """Return a read-only view of a numeric table column"""
+        view = self._numbers[name][:self.number_count]
+        view.flags.writeable = False
+        return view
+
+    def numbers(self, selector=None, unit=None):
+        """Return the extracted values, optionally for one selector and/or unit"""
+        values = self.number_column('value')
+        mask = np.ones(len(values), dtype=bool)
+        for name, value, codes in (('selector', selector, self._selector_codes),
+                                   ('unit', unit, self._unit_codes)):
+            if value is not None:
+                if value not in codes:
+                    return values[:0]
+                mask &= self.number_column(name) == codes[value]
+        return values[mask]
+
+    def numeric_selectors(self):
+        """Return the selectors that have numeric values, most values first"""
+        counts = np.bincount(self.number_column('selector'), minlength=len(self.selectors))
+        order = np.argsort(-counts, kind='stable')
+        return [self.selectors[code] for code in order.tolist() if counts[code]]
+
+    def record_rows(self, record_id):
+        """Return the row slice belonging to one record"""
+        ids = self.column('record_id')
+        start, end = np.searchsorted(ids, [record_id, record_id + 1])
+        return slice(int(start), int(end))
+
+    def to_dataframe(self):
+        """Return the frame as a pandas DataFrame (cached until the next append)"""
+        if self._dataframe is None:
+            data = {name: self.column(name) for name in self.COLUMNS}
+            data['kind'] = pd.Categorical.from_codes(data['kind'], categories=list(TEXT_KINDS))
+            data['source'] = pd.Categorical.from_codes(
+                data['source'], categories=pd.Index(self.sources, dtype=object))
+            data['selector'] = pd.Categorical.from_codes(
+                data['selector'], categories=pd.Index(self.selectors, dtype=object))
+            data['timestamp'] = pd.to_datetime(data['timestamp'], unit='s')
+            self._dataframe = pd.DataFrame(data)
+        return self._dataframe
+
+    def numbers_dataframe(self):
+        """Return the numeric table as a pandas DataFrame with categorical selector/unit"""
+        data = {name: self.number_column(name) for name in self.NUMBER_COLUMNS}
+        data['selector'] = pd.Categorical.from_codes(
+            data['selector'], categories=pd.Index(self.selectors, dtype=object))
+        data['unit'] = pd.Categorical.from_codes(
+            data['unit'], categories=pd.Index(self.units, dtype=object))
+        return pd.DataFrame(data)
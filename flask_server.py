@@ -1,40 +1,67 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response
 from PyQt5.QtCore import QThread, pyqtSignal
-import json
+from werkzeug.serving import make_server
+from record_batcher import RecordBatcher
+from ingest_pipeline import IngestPipeline
+from ingest_api import MAX_BODY_BYTES, IngestAPI, Request
+from ingest_spool import Spool
+
+
+def create_app(api):
+    """Flask app serving every IngestAPI route"""
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
+
+    @app.route('/', defaults={'path': ''}, methods=['GET', 'POST'])
+    @app.route('/<path:path>', methods=['GET', 'POST'])
+    def dispatch(path):
+        response = api.handle(Request(
+            request.method, request.path, request.args.to_dict(),
+            {name.lower(): value for name, value in request.headers.items()},
+            request.get_data()
+        ))
+        return Response(response.body, status=response.status,
+                        headers=response.headers, content_type=response.content_type)
+
+    return app
+
 
 class FlaskServerThread(QThread):
-    data_received = pyqtSignal(dict)
+    """Ingest server on Werkzeug's threaded server (one thread per request)"""
+
+    batch_received = pyqtSignal(list)
     message = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, host='127.0.0.1', port=5584, max_pending=10000, spool_dir='ingest_spool'):
         super().__init__()
-        self.app = Flask(__name__)
+        self.host = host
+        self.port = port
         self.is_running = True
-        
-        @self.app.route('/health', methods=['GET'])
-        def health_check():
-            return jsonify({"status": "healthy"}), 200
-            
-        @self.app.route('/store', methods=['POST'])
-        def store_data():
-            try:
-                data = request.get_json()
-                if data:
-                    self.data_received.emit(data)
-                    self.message.emit("✅ Data received by Flask server")
-                    return jsonify({"status": "success"}), 200
-                else:
-                    return jsonify({"error": "No data received"}), 400
-            except Exception as e:
-                self.message.emit(f"❌ Flask server error: {str(e)}")
-                return jsonify({"error": str(e)}), 500
+        self.server = None
+        # Records from request threads reach the GUI in coalesced batches
+        self.batcher = RecordBatcher()
+        self.batcher.batch_ready.connect(self.batch_received)
+        # Incoming records are cleaned on worker threads before batching
+        self.pipeline = IngestPipeline(self.batcher.put, on_error=self.message.emit,
+                                       max_pending=max_pending, downstream_pending=self.batcher.pending)
+        # Accepted records are on disk before the client gets its 200
+        self.spool = Spool(spool_dir) if spool_dir else None
+        self.api = IngestAPI(self.pipeline, self.message.emit, spool=self.spool)
+        self.pipeline.on_drop = self.api.dropped
+        self.app = create_app(self.api)
 
     def run(self):
         try:
-            self.message.emit("🚀 Starting Flask server on http://127.0.0.1:5584")
-            self.app.run(host='127.0.0.1', port=5584, debug=False, threaded=True)
+            replayed = self.api.replay()
+            if replayed:
+                self.message.emit(f"♻️ Replaying {replayed} spooled records from the last session")
+            self.message.emit(f"🚀 Starting Flask server on http://{self.host}:{self.port}")
+            self.server = make_server(self.host, self.port, self.app, threaded=True)
+            self.server.serve_forever()
         except Exception as e:
             self.message.emit(f"❌ Flask server failed: {str(e)}")
 
     def stop_server(self):
-        self.is_running = False
\ No newline at end of file
+        self.is_running = False
+        if self.server is not None:
+            self.server.shutdown()
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from record_schema import orjson
+
+
+def record_key(record):
+    """Idempotency key of a record: its ``metadata.record_id`` if the client
+    set one, otherwise a hash of its canonical JSON"""
+    metadata = record.get('metadata')
+    if isinstance(metadata, dict) and isinstance(metadata.get('record_id'), str):
+        return 'id:' + metadata['record_id']
+    if orjson is not None:
+        canonical = orjson.dumps(record, option=orjson.OPT_SORT_KEYS)
+    else:
+        canonical = json.dumps(record, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+class RecentKeys:
+    """Sliding window of recently ingested record keys.
+
+    Keys are forgotten after ``max_age`` seconds, or oldest first once more
+    than ``max_keys`` are held, so memory stays bounded however long the
+    server runs. ``hits`` counts the duplicates caught.
+    """
+
+    def __init__(self, max_keys=100000, max_age=600):
+        self.max_keys = max_keys
+        self.max_age = max_age
+        self.hits = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """Remember ``key``; returns False (and counts a hit) if it was already seen"""
+        now = time.monotonic()
+        with self._lock:
+            while self._keys:
+                oldest, added = next(iter(self._keys.items()))
+                if now - added < self.max_age:
+                    break
+                del self._keys[oldest]
+            if key in self._keys:
+                self.hits += 1
+                return False
+            self._keys[key] = now
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key):
+        """Forget ``key``, e.g. when its record could not be queued after all"""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
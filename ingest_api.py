@@ -0,0 +1,334 @@
+import io
+import json
+import threading
+import time
+import zlib
+
+from idempotency import RecentKeys, record_key
+from ingest_spool import SPOOL_KEY
+from metrics import BYTES_BUCKETS, REGISTRY, source_label
+from record_schema import MAX_RECORD_BYTES, SchemaError, loads, validate_record
+
+try:
+    import zstandard
+except ImportError:  # zstd request bodies are refused without it
+    zstandard = None
+
+# Limits on a request body as sent, decompressed, and on the records in one batch
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_DECODED_BYTES = 64 * 1024 * 1024
+MAX_BATCH_RECORDS = 10000
+
+
+class BodyError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_body(body, encoding):
+    """Undo a request's Content-Encoding (gzip, deflate or zstd)"""
+    encoding = (encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        return body
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if 'gzip' in encoding else zlib.MAX_WBITS)
+        try:
+            decoded = decompressor.decompress(body, MAX_DECODED_BYTES + 1)
+        except zlib.error as e:
+            raise BodyError(400, f"Invalid {encoding} body: {str(e)}")
+        if len(decoded) > MAX_DECODED_BYTES:
+            raise BodyError(413, "Decompressed body too large")
+        if not decompressor.eof:
+            raise BodyError(400, f"Truncated {encoding} body")
+        return decoded
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise BodyError(415, "zstd bodies need the zstandard package")
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)) as reader:
+                decoded = reader.read(MAX_DECODED_BYTES + 1)
+        except zstandard.ZstdError as e:
+            raise BodyError(400, f"Invalid zstd body: {str(e)}")
+        if len(decoded) > MAX_DECODED_BYTES:
+            raise BodyError(413, "Decompressed body too large")
+        return decoded
+    raise BodyError(415, f"Unsupported Content-Encoding: {encoding}")
+
+
+class Request:
+    """An HTTP request as seen by IngestAPI, independent of the server"""
+
+    def __init__(self, method, path, query=None, headers=None, body=b""):
+        self.method = method
+        self.path = path
+        self.query = query or {}
+        # Header names are lowercase
+        self.headers = headers or {}
+        self.body = body
+
+
+class Response:
+    def __init__(self, status=200, body=b"", content_type='application/json', headers=None):
+        self.status = status
+        # bytes, or an iterable of bytes chunks for streamed responses
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+
+def json_response(data, status=200, headers=None):
+    return Response(status, json.dumps(data).encode('utf-8'), headers=headers)
+
+
+class IngestAPI:
+    """The HTTP endpoints of the ingest server.
+
+    Both server modes (Flask and asyncio) turn requests into ``Request``
+    objects and send back the ``Response`` from ``handle``, so routes are
+    written once. ``/store`` only decodes the record and offers it to the
+    ingest pipeline; when the pipeline's queue is full the client gets 429
+    with a Retry-After header instead of the server buffering without
+    bound. ``/store/batch`` takes many records per request as
+    newline-delimited JSON, each line a record or an array of records,
+    and reports a status per record.
+
+    Request bodies may be gzip, deflate or (with the zstandard package)
+    zstd compressed, as given by Content-Encoding. Records are decoded with
+    orjson when available and checked against ``record_schema`` before
+    they are queued, so malformed records are refused with the path of
+    the offending value.
+
+    Ingest is idempotent: a record whose key (an ``Idempotency-Key``
+    header, ``metadata.record_id``, or else a hash of its content) was
+    queued recently is acknowledged as a duplicate and not stored again.
+    The extension posts every scrape twice (content script and popup), and
+    the Selenium scraper both posts and emits its records.
+
+    With a ``spool`` every accepted record is written to disk before it is
+    acknowledged and carries its spool sequence number (``SPOOL_KEY``)
+    through the pipeline; storage marks it done in the spool once the
+    record is saved, and ``dropped`` does so for records the pipeline
+    drops.
+    """
+
+    def __init__(self, pipeline, message=None, retry_after=1, seen=None, spool=None):
+        self.pipeline = pipeline
+        self.message = message
+        self.retry_after = retry_after
+        self.seen = seen if seen is not None else RecentKeys()
+        self.spool = spool
+        # Serves /records and /elements once storage is up (a RecordReader)
+        self.reader = None
+        # Routes that read from disk; the asyncio server runs them off its loop
+        self.blocking_paths = {'/records', '/elements'}
+        # Spool order must match pipeline order for commits to be safe
+        self._queue_lock = threading.Lock()
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/metrics'): self.metrics,
+            ('POST', '/store'): self.store,
+            ('POST', '/store/batch'): self.store_batch,
+            ('GET', '/records'): self.read_records,
+            ('GET', '/elements'): self.read_elements,
+        }
+
+        self.requests = REGISTRY.counter('ingest_http_requests_total', "HTTP requests by endpoint and status",
+                                         ('method', 'path', 'status'))
+        self.latency = REGISTRY.histogram('ingest_http_request_duration_seconds', "Time to answer a request",
+                                          ('path',))
+        self.payload = REGISTRY.histogram('ingest_http_request_bytes', "Request body size as received",
+                                          ('path',), BYTES_BUCKETS)
+        self.records = REGISTRY.counter('ingest_records_total', "Records posted, by source and outcome",
+                                        ('source', 'status'))
+        REGISTRY.gauge('ingest_queue_depth', "Records waiting at each ingest stage", ('stage',),
+                       callback=self.queue_depths)
+        REGISTRY.gauge('ingest_dedup_hits_total', "Duplicate records acknowledged without storing",
+                       callback=lambda: self.seen.hits, kind='counter')
+
+    def handle(self, request):
+        started = time.perf_counter()
+        known = any(path == request.path for _, path in self.routes)
+        response = self.dispatch(request, known)
+        # Unknown paths share one label so scanners cannot blow up the series count
+        path = request.path if known else 'other'
+        self.requests.inc(request.method, path, str(response.status))
+        self.latency.observe(path, value=time.perf_counter() - started)
+        if request.body:
+            self.payload.observe(path, value=len(request.body))
+        return response
+
+    def dispatch(self, request, known=True):
+        route = self.routes.get((request.method, request.path))
+        if route is None:
+            if known:
+                return json_response({"error": "Method not allowed"}, 405)
+            return json_response({"error": "Not found"}, 404)
+        try:
+            return route(request)
+        except Exception as e:
+            if self.message:
+                self.message(f"❌ Server error: {str(e)}")
+            return json_response({"error": str(e)}, 500)
+
+    def health(self, request):
+        return json_response({"status": "healthy", "duplicates": self.seen.hits})
+
+    def metrics(self, request):
+        return Response(200, REGISTRY.render().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+
+    def queue_depths(self):
+        depths = {'pipeline': self.pipeline.pending()}
+        if self.pipeline.downstream_pending is not None:
+            depths['batcher'] = self.pipeline.downstream_pending()
+        if self.spool is not None:
+            depths['spool'] = self.spool.depth()
+        return depths
+
+    def submit(self, record):
+        """Queue a record from an in-process scraper unless it was already posted.
+
+        Records are checked against the schema like posted ones; a
+        malformed record is reported and dropped.
+        """
+        try:
+            record = self.check_record(record)
+        except SchemaError as e:
+            if self.message:
+                self.message(f"⚠️ Record rejected: {str(e)}")
+            return
+        if self.seen.add(record_key(record)):
+            self.queue(record, bounded=False)
+
+    def enqueue(self, record, key=None):
+        """Offer a validated record; returns 'stored', 'duplicate' or 'busy'"""
+        status = self._enqueue(record, key)
+        self.records.inc(source_label(record.get('metadata', {}).get('source')), status)
+        return status
+
+    def _enqueue(self, record, key):
+        key = key or record_key(record)
+        if not self.seen.add(key):
+            return 'duplicate'
+        try:
+            queued = self.queue(record)
+        except Exception:
+            self.seen.discard(key)
+            raise
+        if not queued:
+            # Not queued, so a retry must not count as a duplicate
+            self.seen.discard(key)
+            return 'busy'
+        return 'stored'
+
+    def queue(self, record, bounded=True):
+        """Spool and queue a record; returns False if ``bounded`` and the pipeline is full"""
+        with self._queue_lock:
+            if bounded and not self.pipeline.has_room():
+                return False
+            if self.spool is not None:
+                record[SPOOL_KEY] = self.spool.append(record)
+            self.pipeline.put(record)
+            return True
+
+    def dropped(self, record):
+        """Pipeline hook: a dropped record is done as far as the spool is concerned"""
+        seq = record.get(SPOOL_KEY)
+        if seq is not None and self.spool is not None:
+            self.spool.done([seq])
+
+    def replay(self):
+        """Queue the records an earlier run spooled but never stored; returns how many"""
+        count = 0
+        if self.spool is not None:
+            with self._queue_lock:
+                for seq, record in self.spool.pending():
+                    record[SPOOL_KEY] = seq
+                    self.pipeline.put(record)
+                    count += 1
+        return count
+
+    def check_record(self, record):
+        """Validate a decoded record; raises SchemaError"""
+        if not record:
+            raise SchemaError('', "empty record")
+        return validate_record(record)
+
+    def store(self, request):
+        if len(request.body) > MAX_BODY_BYTES:
+            return json_response({"error": "Request body too large"}, 413)
+        try:
+            body = decode_body(request.body, request.headers.get('content-encoding'))
+        except BodyError as e:
+            return json_response({"error": str(e)}, e.status)
+        if not body:
+            return json_response({"error": "No data received"}, 400)
+        if len(body) > MAX_RECORD_BYTES:
+            return json_response({"error": f"Record larger than {MAX_RECORD_BYTES} bytes"}, 413)
+        try:
+            data = loads(body)
+        except ValueError as e:
+            return json_response({"error": f"Invalid JSON: {str(e)}"}, 400)
+        try:
+            data = self.check_record(data)
+        except SchemaError as e:
+            return json_response({"error": str(e), "path": e.path}, 400)
+        key = request.headers.get('idempotency-key')
+        status = self.enqueue(data, 'id:' + key if key else None)
+        if status == 'busy':
+            return self.busy()
+        return json_response({"status": "duplicate" if status == 'duplicate' else "success"})
+
+    def store_batch(self, request):
+        if len(request.body) > MAX_BODY_BYTES:
+            return json_response({"error": "Request body too large"}, 413)
+        try:
+            body = decode_body(request.body, request.headers.get('content-encoding'))
+        except BodyError as e:
+            return json_response({"error": str(e)}, e.status)
+
+        results = []
+        counts = {'stored': 0, 'duplicate': 0, 'rejected': 0, 'busy': 0}
+        for line_number, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                data = loads(line)
+            except ValueError as e:
+                results.append({"line": line_number, "status": "rejected", "error": f"Invalid JSON: {str(e)}"})
+                counts['rejected'] += 1
+                continue
+            for record in data if isinstance(data, list) else [data]:
+                if len(results) >= MAX_BATCH_RECORDS:
+                    return json_response({"error": f"More than {MAX_BATCH_RECORDS} records in one batch"}, 413)
+                result = {"line": line_number, "status": "stored"}
+                try:
+                    self.check_record(record)
+                except SchemaError as e:
+                    result.update(status="rejected", error=str(e), path=e.path)
+                else:
+                    # Once the queue is full the rest of the batch is refused,
+                    # so a client resends one contiguous tail
+                    result['status'] = "busy" if counts['busy'] else self.enqueue(record)
+                counts[result['status']] += 1
+                results.append(result)
+
+        if not results:
+            return json_response({"error": "No data received"}, 400)
+        headers = {'Retry-After': str(self.retry_after)} if counts['busy'] else None
+        status = 429 if counts['busy'] == len(results) else 200
+        return json_response(dict(counts, results=results), status, headers)
+
+    def read_records(self, request):
+        if self.reader is None:
+            return json_response({"error": "Record store not ready"}, 503)
+        return self.reader.records(request)
+
+    def read_elements(self, request):
+        if self.reader is None:
+            return json_response({"error": "Record store not ready"}, 503)
+        return self.reader.elements(request)
+
+    def busy(self):
+        return json_response({"error": "Ingest queue full, retry later"}, 429,
+                             {'Retry-After': str(self.retry_after)})
@@ -0,0 +1,252 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from data_store import ELEMENT_KEYS
+from idempotency import RecentKeys
+from near_duplicates import NearDuplicateFilter, element_text
+
+# Element lists whose 'text' field is cleaned
+TEXT_KEYS = ('texts', 'custom_elements', 'links')
+
+
+class NormalizeFields:
+    """Bring records from every source to one shape.
+
+    The extension's ``custom`` list becomes ``custom_elements``, element
+    lists are lists of dicts with string texts, and metadata always has a
+    source and an ISO timestamp (robot process records carry epoch
+    seconds).
+    """
+
+    name = 'normalize'
+
+    def __call__(self, record):
+        record = dict(record)
+        if 'custom' in record:
+            record['custom_elements'] = list(record.get('custom_elements') or []) + list(record.pop('custom') or [])
+        for key in ELEMENT_KEYS:
+            if key in record:
+                items = record[key] if isinstance(record[key], list) else []
+                record[key] = [self.normalize_element(item) for item in items if isinstance(item, dict)]
+
+        metadata = dict(record.get('metadata') or {})
+        metadata.setdefault('source', 'unknown')
+        timestamp = metadata.get('timestamp')
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            metadata['timestamp'] = datetime.fromtimestamp(timestamp).isoformat(timespec='seconds')
+        elif not timestamp:
+            metadata['timestamp'] = datetime.now().isoformat(timespec='seconds')
+        record['metadata'] = metadata
+        return record
+
+    def normalize_element(self, item):
+        if 'text' in item and not isinstance(item['text'], str):
+            item = dict(item, text='' if item['text'] is None else str(item['text']))
+        return item
+
+
+class TrimWhitespace:
+    name = 'trim'
+
+    def __call__(self, record):
+        for key in TEXT_KEYS:
+            if key in record:
+                record[key] = [dict(item, text=item['text'].strip()) if isinstance(item.get('text'), str) else item
+                               for item in record[key]]
+        return record
+
+
+class LengthFilter:
+    """Drop text elements shorter than ``min_length`` or longer than ``max_length``"""
+
+    name = 'length'
+
+    def __init__(self, min_length=0, max_length=None):
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def __call__(self, record):
+        for key in ('texts', 'custom_elements'):
+            if key in record:
+                record[key] = [item for item in record[key] if self.accepts(item.get('text') or '')]
+        return record
+
+    def accepts(self, text):
+        if len(text) < self.min_length:
+            return False
+        return self.max_length is None or len(text) <= self.max_length
+
+
+class DedupTexts:
+    """Drop texts seen in a recent record (or earlier in this one).
+
+    Texts are remembered in a sliding window (see ``RecentKeys``), so
+    memory stays bounded however long the server runs.
+    """
+
+    name = 'dedup'
+
+    def __init__(self, max_texts=100000, max_age=24 * 3600):
+        self._seen = RecentKeys(max_texts, max_age)
+
+    def __call__(self, record):
+        if 'texts' not in record:
+            return record
+        unique_texts = []
+        for text in record['texts']:
+            text_content = (text.get('text') or '').strip()
+            if text_content and self._seen.add(text_content):
+                unique_texts.append(text)
+        record['texts'] = unique_texts
+        return record
+
+
+class NearDuplicates:
+    """Drop elements near-identical to ones recently ingested"""
+
+    name = 'near_duplicates'
+
+    def __init__(self, threshold=0.8, max_texts=100000):
+        self._lock = threading.Lock()
+        self._filter = NearDuplicateFilter(threshold, max_texts=max_texts)
+
+    def __call__(self, record):
+        with self._lock:
+            for key in ('texts', 'custom_elements', 'links', 'images'):
+                elements = record.get(key)
+                if elements:
+                    flags = self._filter.keep([element_text(key, e) for e in elements], key)
+                    record[key] = [e for e, flag in zip(elements, flags) if flag]
+        return record
+
+
+class DropEmpty:
+    """Drop records left without texts or custom elements"""
+
+    name = 'drop_empty'
+
+    def __call__(self, record):
+        if record.get('texts') or record.get('custom_elements'):
+            return record
+        return None
+
+
+DEFAULT_OPTIONS = {'normalize_fields': True}
+
+
+def build_processors(options):
+    """Processor chain for cleaning options as returned by DataCleaningDialog"""
+    processors = []
+    if options.get('normalize_fields', True):
+        processors.append(NormalizeFields())
+    if options.get('trim_whitespace', False):
+        processors.append(TrimWhitespace())
+    if options.get('remove_short_texts', False) or options.get('max_text_length'):
+        min_length = 10 if options.get('remove_short_texts', False) else 0
+        processors.append(LengthFilter(min_length, options.get('max_text_length')))
+    if options.get('remove_duplicates', False):
+        processors.append(DedupTexts())
+    if options.get('remove_near_duplicates', False):
+        processors.append(NearDuplicates(options.get('similarity_threshold', 0.8)))
+    if options.get('remove_empty', False):
+        processors.append(DropEmpty())
+    return processors
+
+
+class IngestPipeline:
+    """Runs incoming records through a processor chain on a worker pool.
+
+    A processor is a callable taking a record and returning the (possibly
+    new) record, or None to drop it. ``put`` returns immediately; records
+    are processed on ``workers`` threads and handed to ``sink`` in arrival
+    order. A record whose processing raises is passed on unprocessed so no
+    data is lost; a record a processor drops is handed to ``on_drop``.
+
+    ``offer`` is the bounded entry point for network clients: it refuses
+    records once ``max_pending`` records are in the pipeline or waiting
+    downstream (as reported by ``downstream_pending``).
+    """
+
+    def __init__(self, sink, options=None, workers=2, on_error=None, max_pending=10000,
+                 downstream_pending=None, on_drop=None):
+        self.sink = sink
+        self.on_error = on_error
+        self.on_drop = on_drop
+        self.max_pending = max_pending
+        self.downstream_pending = downstream_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+        self.configure(options or DEFAULT_OPTIONS)
+        self.dropped = {}
+        self._lock = threading.Condition()
+        self._next_seq = 0
+        self._emit_seq = 0
+        self._finished = {}
+
+    def configure(self, options):
+        """Replace the processor chain; applies to records put from now on"""
+        self.options = dict(options)
+        self.processors = build_processors(self.options)
+
+    def put(self, record):
+        """Queue a record for processing; safe to call from any thread"""
+        processors = self.processors
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+        self.executor.submit(self._run, seq, record, processors)
+
+    def has_room(self):
+        """Whether fewer than ``max_pending`` records are queued here and downstream"""
+        backlog = self.pending()
+        if self.downstream_pending is not None:
+            backlog += self.downstream_pending()
+        return backlog < self.max_pending
+
+    def offer(self, record):
+        """Queue a record unless the pipeline is full; returns whether it was queued"""
+        if not self.has_room():
+            return False
+        self.put(record)
+        return True
+
+    def process(self, record, processors=None):
+        for processor in self.processors if processors is None else processors:
+            record = processor(record)
+            if record is None:
+                with self._lock:
+                    self.dropped[processor.name] = self.dropped.get(processor.name, 0) + 1
+                return None
+        return record
+
+    def _run(self, seq, record, processors):
+        try:
+            result = self.process(record, processors)
+        except Exception as e:
+            result = record
+            if self.on_error:
+                self.on_error(f"❌ Ingest processing error: {str(e)}")
+        if result is None and self.on_drop:
+            self.on_drop(record)
+        with self._lock:
+            self._finished[seq] = result
+            # Hand over finished records in arrival order
+            while self._emit_seq in self._finished:
+                result = self._finished.pop(self._emit_seq)
+                self._emit_seq += 1
+                if result is not None:
+                    self.sink(result)
+            self._lock.notify_all()
+
+    def pending(self):
+        with self._lock:
+            return self._next_seq - self._emit_seq
+
+    def drain(self, timeout=None):
+        """Block until every queued record has reached the sink"""
+        with self._lock:
+            return self._lock.wait_for(lambda: self._emit_seq == self._next_seq, timeout)
+
+    def shutdown(self):
+        self.drain()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+
+from record_schema import dumps, loads
+
+# Key under which a spooled record carries its sequence number until stored
+SPOOL_KEY = '$spool'
+COMMITTED_FILE = 'committed'
+
+
+class Spool:
+    """Durable on-disk queue between the ingest server and storage.
+
+    Records are appended as ``<seq> <json>`` lines to segment files named
+    after their first sequence number, and flushed to the OS before the
+    client is acknowledged. They are fsynced at most ``fsync_interval``
+    seconds later, by the next append or else by a timer, so a quiet
+    period does not leave them unsynced.
+
+    ``done(seqs)`` marks records stored (or dropped by the pipeline). The
+    committed mark advances over every contiguous done sequence number
+    and segments holding nothing newer are deleted. ``pending()`` yields
+    what was spooled but never committed, so records acknowledged before a
+    crash are stored on the next start.
+    """
+
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024, fsync_interval=1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_sync = time.monotonic()
+        self._unsynced = False
+        self._timer = None
+        # Done sequence numbers above the committed mark
+        self._done = set()
+        os.makedirs(directory, exist_ok=True)
+
+        self.committed = 0
+        committed_path = os.path.join(directory, COMMITTED_FILE)
+        if os.path.exists(committed_path):
+            with open(committed_path) as f:
+                self.committed = int(f.read().strip() or 0)
+        self.segments = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith('.log'))
+        self.next_seq = self.committed + 1
+        if self.segments:
+            for seq, _ in self._read(self.segments[-1]):
+                self.next_seq = max(self.next_seq, seq + 1)
+
+    def _path(self, first_seq):
+        return os.path.join(self.directory, f"{first_seq:012d}.log")
+
+    def _read(self, first_seq):
+        """(seq, line) pairs of a segment; a torn last line is skipped"""
+        with open(self._path(first_seq), 'rb') as f:
+            for line in f:
+                seq, sep, body = line.partition(b" ")
+                if sep and line.endswith(b"\n") and seq.isdigit():
+                    yield int(seq), body
+
+    def append(self, record):
+        """Write a record to the spool and return its sequence number"""
+        line = dumps(record)
+        with self._lock:
+            seq = self.next_seq
+            # After a restart a fresh segment is started rather than
+            # appending after a possibly torn line
+            if self._file is None or self._size >= self.segment_bytes:
+                self._rotate(seq)
+            data = b"%d %s\n" % (seq, line)
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            self.next_seq += 1
+            self._unsynced = True
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return seq
+
+    def _rotate(self, first_seq):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+        self._file = open(self._path(first_seq), 'ab')
+        self._size = 0
+        self.segments.append(first_seq)
+
+    def sync(self):
+        """Fsync appended records; runs from the timer after a quiet period"""
+        with self._lock:
+            self._timer = None
+            if self._unsynced:
+                self._sync()
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+    def done(self, seqs):
+        """Mark records as stored or dropped; commits up to the first one that is not"""
+        with self._lock:
+            self._done.update(seq for seq in seqs if seq > self.committed)
+            seq = self.committed
+            while seq + 1 in self._done:
+                seq += 1
+                self._done.remove(seq)
+            if seq > self.committed:
+                self._commit(seq)
+
+    def _commit(self, seq):
+        self.committed = seq
+        path = os.path.join(self.directory, COMMITTED_FILE)
+        with open(path + '.tmp', 'w') as f:
+            f.write(str(seq))
+        os.replace(path + '.tmp', path)
+        # A segment is done once the next one starts at or before seq + 1
+        while len(self.segments) > 1 and self.segments[1] <= seq + 1:
+            os.remove(self._path(self.segments.pop(0)))
+
+    def pending(self):
+        """Yield (seq, record) for records spooled but not committed"""
+        with self._lock:
+            segments = list(self.segments)
+            committed = self.committed
+        for first_seq in segments:
+            for seq, body in self._read(first_seq):
+                if seq > committed:
+                    yield seq, loads(body)
+
+    def depth(self):
+        """Number of records spooled and not yet committed"""
+        with self._lock:
+            return self.next_seq - 1 - self.committed
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 import time
@@ -6,46 +7,63 @@ import requests
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
     QFileDialog, QMessageBox, QWidget, QLabel, QLineEdit, QCheckBox,
-    QTextEdit, QGroupBox, QGridLayout, QProgressBar, QTabWidget, QSpinBox
+    QGroupBox, QGridLayout, QProgressBar, QTabWidget, QSpinBox, QListView
 )
 from PyQt5.QtCore import Qt
 from flask_server import FlaskServerThread
+from async_server import AsyncServerThread
 from extension_manager import ExtensionManager
 from selenium_scraper import SeleniumScrapingThread
 from data_manager import DataManager
+from record_reader import RecordReader
 from robot_process import RobotProcessManager
 from robot_process_ui import RobotProcessUI
+from status_log import StatusLogModel
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, server_mode='async', storage_backend='journal'):
         super().__init__()
         self.setWindowTitle("Advanced Web Scraper - Two Methods")
         self.setGeometry(100, 100, 1400, 900)
         
         # Initialize components
         self.extension_manager = ExtensionManager()
-        self.flask_server = FlaskServerThread()
+        # 'async' serves ingest from one event loop with a bounded queue;
+        # 'flask' uses Werkzeug's thread-per-request server
+        if server_mode == 'flask':
+            self.ingest_server = FlaskServerThread()
+        else:
+            self.ingest_server = AsyncServerThread()
         self.extension_thread = None
         self.selenium_thread = None
         self.robot_manager = RobotProcessManager()
+        
+        # Bounded status logs; set spill_file to keep the full history on disk
+        self.extension_log = StatusLogModel(max_lines=2000)
+        self.selenium_log = StatusLogModel(max_lines=2000)
 
         
-        # Initialize Data Manager
-        self.data_manager = DataManager(self)
+        # Initialize Data Manager; 'sqlite' stores records in SQLite with
+        # full-text search, 'journal' in a JSONL journal and JSON snapshot
+        self.data_manager = DataManager(self, storage_backend)
+        self.ingest_server.api.reader = RecordReader(self.data_manager)
         
         # Setup GUI
         self.setup_gui()
         
-        # Start Flask server
-        self.flask_server.data_received.connect(self.handle_received_data)
-        self.flask_server.message.connect(self.update_extension_status)
-        self.flask_server.start()
+        # Start ingest server
+        self.ingest_server.batch_received.connect(self.handle_received_batch)
+        self.ingest_server.message.connect(self.update_extension_status)
+        self.ingest_server.start()
         
-        # Wait for Flask server to start
-        self.wait_for_flask_server()
+        # Wait for ingest server to start
+        self.wait_for_ingest_server()
         
         # Load default configuration
         self.load_default_config()
+        
+        # Restore previously scraped data
+        self.data_manager.load_saved_data()
 
     def setup_gui(self):
         main_widget = QWidget()
@@ -71,7 +89,7 @@ class MainWindow(QMainWindow):
     def setup_robot_process_tab(self):
         """Setup the Robot Process automation tab"""
         self.robot_process_ui = RobotProcessUI(self.robot_manager)
-        self.robot_process_ui.data_received.connect(self.handle_received_data)
+        self.robot_process_ui.data_received.connect(self.ingest_server.api.submit)
         self.tabs.addTab(self.robot_process_ui, "🤖 Robot Process")
         
     def setup_extension_tab(self):
@@ -175,9 +193,9 @@ class MainWindow(QMainWindow):
         status_frame = QGroupBox("Extension Status")
         status_layout = QVBoxLayout(status_frame)
         
-        self.extension_status = QTextEdit()
+        self.extension_status = QListView()
+        self.extension_log.attach(self.extension_status)
         self.extension_status.setMaximumHeight(200)
-        self.extension_status.setReadOnly(True)
         self.extension_status.setStyleSheet("font-family: 'Courier New'; font-size: 10pt; background-color: #f8f9fa;")
         status_layout.addWidget(self.extension_status)
         
@@ -335,8 +353,8 @@ class MainWindow(QMainWindow):
         status_frame = QGroupBox("Selenium Status")
         status_layout = QVBoxLayout(status_frame)
         
-        self.selenium_status = QTextEdit()
-        self.selenium_status.setReadOnly(True)
+        self.selenium_status = QListView()
+        self.selenium_log.attach(self.selenium_status)
         self.selenium_status.setStyleSheet("font-family: 'Courier New'; font-size: 10pt; background-color: #f8f9fa;")
         status_layout.addWidget(self.selenium_status)
         
@@ -344,24 +362,25 @@ class MainWindow(QMainWindow):
         
         self.tabs.addTab(tab, "🤖 Selenium Method")
 
-    def wait_for_flask_server(self):
-        """Wait for Flask server to be ready"""
+    def wait_for_ingest_server(self):
+        """Wait for the ingest server to be ready"""
         max_attempts = 10
+        url = f"http://{self.ingest_server.host}:{self.ingest_server.port}/health"
         for i in range(max_attempts):
             try:
-                response = requests.get('http://127.0.0.1:5000/health', timeout=1)
+                response = requests.get(url, timeout=1)
                 if response.status_code == 200:
-                    self.update_extension_status("✅ Flask server is running")
+                    self.update_extension_status("✅ Ingest server is running")
                     return True
             except:
                 pass
             time.sleep(0.5)
-        self.update_extension_status("⚠️ Flask server not responding, but continuing...")
+        self.update_extension_status("⚠️ Ingest server not responding, but continuing...")
         return False
 
     def load_default_config(self):
         self.update_extension_status("🚀 Web Scraper Application Started")
-        self.update_extension_status("📡 Flask server starting on http://127.0.0.1:5584")
+        self.update_extension_status(f"📡 Ingest server on http://{self.ingest_server.host}:{self.ingest_server.port}")
         self.update_extension_status("✅ Ready to create extensions")
 
     def create_extension(self):
@@ -424,7 +443,8 @@ class MainWindow(QMainWindow):
             self.selenium_thread = SeleniumScrapingThread(url, config)
             self.selenium_thread.progress.connect(self.selenium_progress.setValue)
             self.selenium_thread.message.connect(self.update_selenium_status)
-            self.selenium_thread.data_received.connect(self.handle_received_data)
+            # The scraper also posts each record to /store; the API drops the twin
+            self.selenium_thread.data_received.connect(self.ingest_server.api.submit)
             self.selenium_thread.finished.connect(self.selenium_finished)
             self.selenium_thread.error.connect(self.selenium_error)
             self.selenium_thread.browser_ready.connect(self.browser_ready)
@@ -432,7 +452,7 @@ class MainWindow(QMainWindow):
             self.start_browser_btn.setEnabled(False)
             self.stop_selenium_btn.setEnabled(True)
             self.selenium_progress.setValue(0)
-            self.selenium_status.clear()
+            self.selenium_log.clear()
             
             self.selenium_thread.start()
             
@@ -511,38 +531,47 @@ class MainWindow(QMainWindow):
         })
         return config
 
-    def handle_received_data(self, data):
-        """Handle new data received from scraping"""
-        self.data_manager.add_data(data)
-        
-        source = data.get('metadata', {}).get('source', 'unknown')
-        if source == 'extension':
-            self.update_extension_status(f"✅ Data received: {len(data.get('texts', []))} texts")
-        else:
-            self.update_selenium_status(f"✅ Data received: {len(data.get('texts', []))} texts")
+    def handle_received_batch(self, records):
+        """Handle a batch of new data received from scraping"""
+        self.data_manager.add_batch(records)
+        
+        # One status line per batch and log
+        received = {}
+        for data in records:
+            source = data.get('metadata', {}).get('source', 'unknown')
+            key = 'extension' if source == 'extension' else 'selenium'
+            count, texts = received.get(key, (0, 0))
+            received[key] = (count + 1, texts + len(data.get('texts', [])))
+        for key, (count, texts) in received.items():
+            message = (f"✅ Data received: {texts} texts" if count == 1
+                       else f"✅ Data received: {count} records, {texts} texts")
+            if key == 'extension':
+                self.update_extension_status(message)
+            else:
+                self.update_selenium_status(message)
 
     def update_extension_status(self, message):
-        timestamp = time.strftime('%H:%M:%S')
-        self.extension_status.append(f"[{timestamp}] {message}")
-        self.extension_status.verticalScrollBar().setValue(
-            self.extension_status.verticalScrollBar().maximum()
-        )
+        self.extension_log.append(message)
 
     def update_selenium_status(self, message):
-        timestamp = time.strftime('%H:%M:%S')
-        self.selenium_status.append(f"[{timestamp}] {message}")
-        self.selenium_status.verticalScrollBar().setValue(
-            self.selenium_status.verticalScrollBar().maximum()
-        )
+        self.selenium_log.append(message)
 
     def closeEvent(self, event):
         """Save data when application closes"""
         if hasattr(self, 'data_manager'):
-            self.data_manager.save_data_to_file()
-        
-        if self.flask_server.is_running:
-            self.flask_server.terminate()
-            self.flask_server.wait()
+            self.ingest_server.pipeline.drain(timeout=5)
+            self.ingest_server.batcher.flush()
+            self.data_manager.close()
+        self.extension_log.close()
+        self.selenium_log.close()
+        
+        if self.ingest_server.is_running:
+            self.ingest_server.stop_server()
+            if not self.ingest_server.wait(2000):
+                self.ingest_server.terminate()
+                self.ingest_server.wait()
+        if self.ingest_server.spool is not None:
+            self.ingest_server.spool.close()
         
         if self.selenium_thread and self.selenium_thread.isRunning():
             self.selenium_thread.stop_scraping()
@@ -552,8 +581,15 @@ class MainWindow(QMainWindow):
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Advanced Web Scraper")
+    parser.add_argument('--server', choices=('async', 'flask'), default='async',
+                        help="ingest server implementation (default: async)")
+    parser.add_argument('--storage', choices=('journal', 'sqlite'), default='journal',
+                        help="record store; sqlite adds full-text element search (default: journal)")
+    # Anything else is left for Qt (-style, -platform, ...)
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
-    window = MainWindow()
+    window = MainWindow(args.server, args.storage)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
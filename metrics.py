@@ -0,0 +1,167 @@
+import math
+import threading
+from bisect import bisect_left
+
+# Record sources with their own label value; anything a client sends beyond
+# these is counted as 'other', so clients cannot create unbounded series
+SOURCE_LABELS = ('extension', 'selenium', 'robot_process')
+
+# Histogram buckets for durations in seconds and for payload sizes in bytes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def source_label(source):
+    return source if source in SOURCE_LABELS else 'other'
+
+
+class Metric:
+    """One metric family: a value per combination of label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) for the exposition"""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labels, key, extra)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that is set, or read from ``callback`` (returning a number or a
+    {label values: number} dict) whenever metrics are scraped"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), callback=None, kind=None):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+        if kind:
+            self.kind = kind
+
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        value = self.callback()
+        if isinstance(value, dict):
+            return [("", key if isinstance(key, tuple) else (key,), (), v) for key, v in value.items()]
+        return [("", (), (), value)]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *label_values, value):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (('le', format_value(float(bound))),), cumulative))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class Registry:
+    """Named metric families rendered in the Prometheus text format.
+
+    Asking again for a name returns the existing family, so modules
+    declare the metrics they update where they use them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def gauge(self, name, help_text, labels=(), callback=None, kind=None):
+        """A gauge; with a ``callback`` any earlier one of that name is replaced"""
+        if callback is None:
+            return self._get(Gauge, name, help_text, labels)
+        with self._lock:
+            metric = self._metrics[name] = Gauge(name, help_text, labels, callback, kind)
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Process-wide registry served at /metrics
+REGISTRY = Registry()
+
+# Shared by the Selenium and robot process scrapers
+SCRAPES = REGISTRY.counter('scraper_scrapes_total', "Scrapes completed", ('scraper',))
+EXTRACTION_SECONDS = REGISTRY.histogram('scraper_extraction_duration_seconds',
+                                        "Time to extract elements from a page", ('scraper',))
+DRIVER_STARTS = REGISTRY.counter('scraper_driver_starts_total', "WebDriver sessions started", ('scraper',))
+DRIVER_FAILURES = REGISTRY.counter('scraper_driver_failures_total',
+                                   "WebDriver sessions that failed to start", ('scraper',))
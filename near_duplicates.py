@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+
+_DIGITS_RE = re.compile(r'\d+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Lowercase, collapse whitespace and replace digit runs by '0'.
+
+    Timestamps, counters and prices then no longer make otherwise identical
+    texts differ.
+    """
+    return _SPACE_RE.sub(' ', _DIGITS_RE.sub('0', text.lower())).strip()
+
+
+def element_text(kind, element):
+    """The text an element is compared on"""
+    if kind == 'links':
+        return f"{element.get('text') or ''} {element.get('href') or ''}"
+    if kind == 'images':
+        return f"{element.get('alt') or ''} {element.get('src') or ''}"
+    return element.get('text') or ''
+
+
+def lsh_bands(num_perm, threshold):
+    """Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands) ** (1/rows) is closest to ``threshold``"""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class NearDuplicateFilter:
+    """Streaming near-duplicate detection with MinHash signatures and LSH.
+
+    Texts are normalized and split into character shingles; each text gets
+    a MinHash signature of ``num_perm`` values whose agreement rate
+    estimates the Jaccard similarity of the shingle sets. Signatures are
+    split into bands and bucketed, so only texts sharing a band bucket are
+    compared, keeping the whole pass roughly linear.
+
+    ``keep`` returns False for texts at least ``threshold`` similar to a
+    text seen earlier in the same group; the first occurrence is kept.
+
+    With ``max_texts`` each group remembers roughly that many texts: they
+    are kept in two generations, and when the newer one fills up the older
+    one is forgotten. A long-running stream then uses bounded memory.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=5, seed=1, max_texts=None):
+        self.threshold = threshold
+        self.max_texts = max_texts
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: ((a * x + b) mod 2**64) >> 32, with odd a
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._groups = {}
+
+    def signatures(self, texts):
+        """MinHash signatures of normalized texts, one row per text"""
+        k = self.shingle_size
+        encoded = [text.encode('utf-8').ljust(k, b'\0') for text in texts]
+        lengths = np.array([len(data) for data in encoded], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        # Hash every k-byte window, then drop windows crossing a text boundary
+        windows = len(data) - k + 1
+        hashes = np.zeros(windows, dtype=np.uint64)
+        for j in range(k):
+            hashes = hashes * np.uint64(257) + data[j:j + windows]
+        owner = np.repeat(np.arange(len(texts)), lengths)[:windows]
+        position = np.arange(windows) - starts[owner]
+        valid = position <= lengths[owner] - k
+        hashes = hashes[valid]
+        offsets = np.concatenate(([0], np.cumsum(lengths - k + 1)[:-1]))
+
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        for i in range(self.num_perm):
+            permuted = (self._a[i] * hashes + self._b[i]) >> np.uint64(32)
+            signatures[:, i] = np.minimum.reduceat(permuted, offsets)
+        return signatures
+
+    def band_keys(self, signatures):
+        """One hash per (text, band)"""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        return (bands * self._band_mix).sum(axis=2)
+
+    def keep(self, texts, group=''):
+        """Return a keep flag per text, in order"""
+        if not texts:
+            return []
+        generations = self._groups.get(group)
+        if generations is None:
+            generations = self._groups[group] = [self._generation()]
+        elif self.max_texts and len(generations[0][0]) >= self.max_texts // 2:
+            generations[:] = [self._generation(), generations[0]]
+        current = generations[0]
+
+        normalized = [normalize_text(text) for text in texts]
+        new = [text for text in dict.fromkeys(normalized)
+               if not any(text in seen for seen, _, _ in generations)]
+        if new:
+            signatures = self.signatures(new)
+            keys = self.band_keys(signatures).tolist()
+            for text, signature, text_keys in zip(new, signatures, keys):
+                current[0][text] = self._is_new(signature, text_keys, generations)
+
+        flags = []
+        for text in normalized:
+            seen = next(seen for seen, _, _ in generations if text in seen)
+            flags.append(seen[text])
+            # Later exact copies of a kept text are duplicates of it
+            current[0][text] = False
+        return flags
+
+    def _generation(self):
+        """(normalized text -> keep flag, band buckets, kept signatures)"""
+        return {}, [{} for _ in range(self.bands)], []
+
+    def _is_new(self, signature, keys, generations):
+        for _, buckets, kept in generations:
+            candidates = set()
+            for band, key in zip(buckets, keys):
+                candidates.update(band.get(key, ()))
+            for candidate in candidates:
+                if np.count_nonzero(kept[candidate] == signature) >= self.threshold * self.num_perm:
+                    return False
+        _, buckets, kept = generations[0]
+        index = len(kept)
+        kept.append(signature)
+        for band, key in zip(buckets, keys):
+            band.setdefault(key, []).append(index)
+        return True
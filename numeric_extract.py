@@ -0,0 +1,71 @@
+import re
+
+CURRENCY_SYMBOLS = {
+    '$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR', '₽': 'RUB',
+    '₩': 'KRW', '₺': 'TRY', '₴': 'UAH', '₪': 'ILS', '฿': 'THB', '₫': 'VND',
+}
+CURRENCY_CODES = ('USD', 'EUR', 'GBP', 'JPY', 'INR', 'RUB', 'KRW', 'TRY', 'UAH', 'ILS',
+                  'THB', 'VND', 'CHF', 'CAD', 'AUD', 'CNY', 'SEK', 'NOK', 'DKK', 'PLN', 'BRL')
+
+# Grouping characters: comma, dot, space, no-break spaces and apostrophes
+_GROUP = "[,. \u00a0\u202f'\u2019]"
+_CURRENCY = "|".join([re.escape(s) for s in CURRENCY_SYMBOLS] + list(CURRENCY_CODES))
+
+NUMBER_RE = re.compile(
+    rf"(?<![\w.,])"
+    rf"(?P<sign>[-+\u2212])?"
+    rf"(?:(?P<before>{_CURRENCY}) ?)?"
+    rf"(?P<sign2>[-+\u2212])?"
+    rf"(?P<number>\d{{1,3}}(?:{_GROUP}\d{{3}})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)"
+    rf"(?: ?(?P<after>{_CURRENCY}|%))?"
+)
+
+
+def parse_number(number, decimal_separator='.'):
+    """Convert a matched number string to float.
+
+    Separators are resolved per number: when both ',' and '.' appear the
+    last one is the decimal point, repeated separators are grouping, and a
+    single separator followed by exactly three digits is ambiguous and
+    resolved with ``decimal_separator``.
+    """
+    number = re.sub("[ \u00a0\u202f'\u2019]", "", number)
+    commas, dots = number.count(','), number.count('.')
+
+    if commas and dots:
+        decimal = ',' if number.rfind(',') > number.rfind('.') else '.'
+    elif commas + dots == 1:
+        separator = ',' if commas else '.'
+        digits_after = len(number) - number.find(separator) - 1
+        if digits_after == 3:
+            decimal = separator if separator == decimal_separator else None
+        else:
+            decimal = separator
+    else:
+        decimal = None
+
+    if decimal:
+        grouping = '.' if decimal == ',' else ','
+        number = number.replace(grouping, '').replace(decimal, '.')
+    else:
+        number = number.replace(',', '').replace('.', '')
+    return float(number)
+
+
+def extract_numbers(text, decimal_separator='.'):
+    """Extract (value, unit) pairs from text.
+
+    ``unit`` is '%' for percentages, an ISO currency code for prices and ''
+    for plain numbers.
+    """
+    results = []
+    for match in NUMBER_RE.finditer(text):
+        try:
+            value = parse_number(match.group('number'), decimal_separator)
+        except ValueError:
+            continue
+        if (match.group('sign') or match.group('sign2')) in ('-', '\u2212'):
+            value = -value
+        unit = match.group('after') or match.group('before') or ''
+        results.append((value, CURRENCY_SYMBOLS.get(unit, unit)))
+    return results
@@ -0,0 +1,56 @@
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class RecordBatcher(QObject):
+    """Coalesces records put from any thread into batches for the GUI thread.
+
+    ``put`` only appends to a locked list. The first record of a batch
+    schedules a flush ``window_ms`` later, and reaching ``max_batch`` records
+    flushes right away, so the GUI sees one ``batch_ready`` signal per
+    window instead of one per record. Create it on the GUI thread.
+    """
+
+    batch_ready = pyqtSignal(list)
+    _schedule = pyqtSignal()
+    _flush_now = pyqtSignal()
+
+    def __init__(self, window_ms=100, max_batch=500, parent=None):
+        super().__init__(parent)
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._schedule.connect(self._start_timer)
+        self._flush_now.connect(self.flush)
+
+    def put(self, record):
+        """Queue a record; safe to call from any thread"""
+        with self._lock:
+            self._pending.append(record)
+            count = len(self._pending)
+        if count == 1:
+            self._schedule.emit()
+        elif count == self.max_batch:
+            self._flush_now.emit()
+
+    def pending(self):
+        """Number of records waiting for the next batch"""
+        with self._lock:
+            return len(self._pending)
+
+    def _start_timer(self):
+        if not self._timer.isActive():
+            self._timer.start(self.window_ms)
+
+    def flush(self):
+        """Deliver everything queued so far as one batch"""
+        self._timer.stop()
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self.batch_ready.emit(batch)
@@ -0,0 +1,140 @@
+import math
+from bisect import bisect_left, bisect_right
+
+from data_store import ELEMENT_KINDS
+from element_frame import parse_timestamp
+
+
+def url_key(url):
+    """URL without its scheme, so 'example.com/shop' and full URLs share a prefix"""
+    url = str(url or '')
+    scheme_end = url.find('://')
+    return url[scheme_end + 3:] if scheme_end >= 0 else url
+
+
+class RecordIndex:
+    """Secondary indexes over a record list, keyed by record position.
+
+    Source and selector use hash indexes, URLs a sorted list of distinct
+    scheme-less URLs (for prefix lookups) and timestamps a sorted list, all
+    maintained as records are added. Every posting list is ascending, so a
+    query intersects the smallest candidate lists and only touches record
+    bodies for the text filter.
+
+    Source, URL and timestamp come from record headers; selectors need the
+    bodies, so records loaded from disk are indexed by selector on the first
+    selector query and incrementally after that.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.by_source = {}
+        self.by_url = {}
+        self.url_keys = []
+        self.by_selector = {}
+        self.selectors_upto = 0
+        self._time_keys = []
+        self._time_ids = []
+
+    def rebuild(self, records):
+        self.reset()
+        for index in range(len(records)):
+            self.add(records.header(index))
+
+    def add(self, header, record=None):
+        """Index the next record; with its body also index its selectors"""
+        record_id = self.count
+        self.count += 1
+        self.by_source.setdefault(header.get('source') or 'unknown', []).append(record_id)
+
+        key = url_key(header.get('url'))
+        if key not in self.by_url:
+            self.by_url[key] = []
+            self.url_keys.insert(bisect_left(self.url_keys, key), key)
+        self.by_url[key].append(record_id)
+
+        timestamp = parse_timestamp(header.get('timestamp'))
+        if not math.isnan(timestamp):
+            position = bisect_right(self._time_keys, timestamp)
+            self._time_keys.insert(position, timestamp)
+            self._time_ids.insert(position, record_id)
+
+        if record is not None and self.selectors_upto == record_id:
+            self._add_selectors(record_id, record)
+
+    def _add_selectors(self, record_id, record):
+        for kind in ELEMENT_KINDS:
+            for element in record.get(kind, []):
+                ids = self.by_selector.setdefault(element.get('selector') or '', [])
+                if not ids or ids[-1] != record_id:
+                    ids.append(record_id)
+        self.selectors_upto = record_id + 1
+
+    def index_selectors(self, records):
+        """Catch the selector index up with records added without bodies"""
+        for record_id in range(self.selectors_upto, self.count):
+            self._add_selectors(record_id, records.read(record_id))
+
+    def sources(self):
+        return sorted(self.by_source)
+
+    def query(self, records, source=None, url=None, since=None, until=None,
+              selector=None, text=None, start=0):
+        """Return the ascending positions of records matching every filter.
+
+        ``url`` is a URL or domain prefix (the scheme is optional),
+        ``since``/``until`` are epoch seconds or date strings and ``text``
+        is a case-insensitive substring of any element. Only positions from
+        ``start`` on are considered.
+        """
+        candidates = []
+        if source:
+            candidates.append(self.by_source.get(source, []))
+        if url:
+            prefix = url_key(url)
+            first = bisect_left(self.url_keys, prefix)
+            ids = []
+            for key in self.url_keys[first:]:
+                if not key.startswith(prefix):
+                    break
+                ids.extend(self.by_url[key])
+            candidates.append(sorted(ids))
+        if since is not None or until is not None:
+            low = 0 if since is None else bisect_left(self._time_keys, self._epoch(since))
+            high = len(self._time_keys) if until is None else bisect_right(self._time_keys, self._epoch(until))
+            candidates.append(sorted(self._time_ids[low:high]))
+        if selector:
+            self.index_selectors(records)
+            candidates.append(self.by_selector.get(selector, []))
+
+        if candidates:
+            candidates.sort(key=len)
+            result = candidates[0][bisect_left(candidates[0], start):]
+            for other in candidates[1:]:
+                other = set(other)
+                result = [record_id for record_id in result if record_id in other]
+        else:
+            result = range(start, self.count)
+
+        if text:
+            needle = text.lower()
+            result = [record_id for record_id in result
+                      if self._contains(records.read(record_id), needle)]
+        return list(result)
+
+    def _epoch(self, value):
+        timestamp = parse_timestamp(value)
+        if math.isnan(timestamp):
+            raise ValueError(f"Invalid date: {value}")
+        return timestamp
+
+    def _contains(self, record, needle):
+        for kind in ELEMENT_KINDS:
+            for element in record.get(kind, []):
+                body = element.get('full_text') or element.get('text') or element.get('alt') or ''
+                if needle in str(body).lower():
+                    return True
+        return False
@@ -0,0 +1,178 @@
+from bisect import bisect_right
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QAbstractTableModel, QModelIndex
+
+
+class RecordListModel(QAbstractListModel):
+    """List model over the headers of a LazyRecordList.
+
+    Row text is formatted on demand from the record header, so only the
+    rows a view actually paints are touched and record bodies are never
+    loaded. New records are announced with ``records_appended`` as row
+    inserts instead of rebuilding the list. With ``rows`` set the model only
+    shows the records at those positions.
+    """
+
+    def __init__(self, records=None, parent=None):
+        super().__init__(parent)
+        self._records = records
+        self._rows = None
+        self._count = len(records) if records is not None else 0
+
+    def set_records(self, records, rows=None):
+        """Point the model at a (new) record list and reset views"""
+        self.beginResetModel()
+        self._records = records
+        self._rows = rows
+        self._count = len(records) if rows is None else len(rows)
+        self.endResetModel()
+
+    def records_appended(self, rows=None):
+        """Announce records appended to the list since the last call; when
+        filtered, ``rows`` are the positions of new records to show"""
+        if self._rows is not None:
+            if rows:
+                self.beginInsertRows(QModelIndex(), self._count, self._count + len(rows) - 1)
+                self._rows.extend(rows)
+                self._count = len(self._rows)
+                self.endInsertRows()
+            return
+        total = len(self._records)
+        if total > self._count:
+            self.beginInsertRows(QModelIndex(), self._count, total - 1)
+            self._count = total
+            self.endInsertRows()
+        elif total < self._count:
+            self.set_records(self._records)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._count:
+            return None
+        row = index.row() if self._rows is None else self._rows[index.row()]
+        if row >= len(self._records):
+            return None
+
+        if role == Qt.DisplayRole:
+            header = self._records.header(row)
+            source = header.get('source') or 'Unknown'
+            url = header.get('url') or 'No URL'
+            timestamp = header.get('timestamp') or 'No time'
+            return f"{row+1}. {source} | {timestamp}\n{url[:50]}..."
+        if role == Qt.UserRole:
+            return row
+        return None
+
+
+class ElementTableModel(QAbstractTableModel):
+    """Table model over the elements of one record or a list of search results.
+
+    Rows are not copied out of the record: row numbers are mapped to
+    (kind, position) through the per-kind counts and cells are formatted
+    when painted. Rows are exposed in batches through ``canFetchMore`` /
+    ``fetchMore``, so opening a record with tens of thousands of elements
+    only touches the first screenful.
+    """
+
+    KINDS = ('texts', 'custom_elements', 'images', 'links')
+    TYPE_LABELS = {'texts': 'Text', 'custom_elements': 'Custom', 'images': 'Image', 'links': 'Link'}
+    COLUMNS = ['Type', 'Selector', 'Content', 'Full Content']
+    RESULT_COLUMNS = COLUMNS + ['Source', 'URL']
+
+    def __init__(self, parent=None, batch_size=1000):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self._record = None
+        self._results = None
+        self._offsets = [0]
+        self._total = 0
+        self._loaded = 0
+        self._columns = self.COLUMNS
+
+    def set_record(self, record):
+        """Show the elements of a record"""
+        self.beginResetModel()
+        self._record, self._results = record, None
+        self._offsets = [0]
+        for kind in self.KINDS:
+            self._offsets.append(self._offsets[-1] + len(record.get(kind, [])))
+        self._total = self._offsets[-1]
+        self._loaded = min(self._total, self.batch_size)
+        self._columns = self.COLUMNS
+        self.endResetModel()
+
+    def set_results(self, results):
+        """Show search results (element dicts with kind, source and url)"""
+        self.beginResetModel()
+        self._record, self._results = None, results
+        self._total = len(results)
+        self._loaded = min(self._total, self.batch_size)
+        self._columns = self.RESULT_COLUMNS
+        self.endResetModel()
+
+    def element(self, row):
+        """Return (kind, element) for a row"""
+        if self._results is not None:
+            result = self._results[row]
+            return result['kind'], result
+        index = bisect_right(self._offsets, row) - 1
+        kind = self.KINDS[index]
+        return kind, self._record[kind][row - self._offsets[index]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.batch_size, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Expose every row, e.g. before filtering or sorting the whole record"""
+        if self._loaded < self._total:
+            self.beginInsertRows(QModelIndex(), self._loaded, self._total - 1)
+            self._loaded = self._total
+            self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._columns[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        kind, element = self.element(index.row())
+        column = index.column()
+
+        if column == 0:
+            return self.TYPE_LABELS.get(kind, kind)
+        if column == 1:
+            return element.get('selector') or ''
+        if column in (2, 3):
+            if kind == 'links':
+                content, full_content = element.get('text'), element.get('href')
+            elif kind == 'images':
+                content, full_content = element.get('alt'), element.get('src')
+            else:
+                content, full_content = element.get('text'), element.get('full_text')
+            value = (content if column == 2 else full_content) or ''
+            if column == 3 and role == Qt.DisplayRole and len(value) > 200:
+                value = value[:200] + '...'
+            return value
+        if column == 4:
+            return str(element.get('source') or '')
+        return str(element.get('url') or '')
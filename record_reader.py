@@ -0,0 +1,294 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+
+from data_store import ELEMENT_KEYS, ELEMENT_KINDS
+from ingest_api import Response, json_response
+from record_schema import dumps
+
+# Records per JSON page of /records unless ``limit`` says otherwise, and the most allowed
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# The same for elements per JSON page of /elements
+ELEMENT_PAGE_SIZE = 1000
+MAX_ELEMENT_PAGE_SIZE = 10000
+# Streamed responses are sent in chunks of about this size
+CHUNK_BYTES = 64 * 1024
+
+NDJSON_TYPE = 'application/x-ndjson'
+CSV_TYPE = 'text/csv; charset=utf-8'
+
+RECORD_COLUMNS = ('position', 'source', 'url', 'timestamp') + ELEMENT_KEYS
+ELEMENT_COLUMNS = ('position', 'source', 'url', 'timestamp', 'kind', 'selector', 'text', 'href', 'src', 'alt')
+
+
+class ReadError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def fingerprint(header):
+    """Short hash of what identifies a stored record (not where it is stored)"""
+    key = json.dumps([header.get('source'), header.get('url'), header.get('timestamp'), header.get('counts')],
+                     sort_keys=True, default=str)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=6).hexdigest()
+
+
+class Selection:
+    """Positions picked by a read request, within a snapshot of the record list.
+
+    ``start`` and ``offset`` are where the cursor pointed: a record
+    position and, for /elements, the number of that record's elements
+    already returned.
+    """
+
+    def __init__(self, generation, records, positions, next_position, start=0, offset=0):
+        self.generation = generation
+        self.records = records
+        self.positions = positions
+        self.next_position = next_position
+        self.start = start
+        self.offset = offset
+
+
+class RecordReader:
+    """Read endpoints over the DataManager's stored records.
+
+    ``/records`` and ``/elements`` take ``source``, ``url`` (prefix),
+    ``since``/``until``, ``cursor`` and ``limit`` (records for /records,
+    elements for /elements). The default response is a JSON page with a
+    ``next_cursor``; ``format=ndjson`` or ``format=csv`` (or a matching
+    Accept header) streams every match in chunks instead, with the cursor
+    to resume from in ``X-Next-Cursor``.
+
+    Requests run on server threads. They take the record list, its
+    generation and the record index together under the DataManager's
+    ``read_lock``, and check the generation under it before each record,
+    so a reload or compaction on the GUI thread ends a read (409) rather
+    than letting it serve shifted positions. Once a stream's headers are
+    out the status cannot change: an NDJSON stream then ends with an
+    ``{"error", "status", "next_cursor"}`` line, and a CSV stream is cut
+    off without the end of its chunked body.
+
+    A cursor is the next position plus a fingerprint of the record before
+    it (or, within a record's elements, of that record), so it stays valid
+    across restarts and is refused (410) once retention has removed
+    records before it.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+
+    def encode_cursor(self, records, position, offset=0):
+        """Cursor of record ``position``, past its first ``offset`` elements"""
+        if offset:
+            text = f"{position}.{offset}:{fingerprint(records.header(position))}"
+        else:
+            mark = fingerprint(records.header(position - 1)) if position else ''
+            text = f"{position}:{mark}"
+        return base64.urlsafe_b64encode(text.encode('ascii')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, records, count, cursor):
+        """Return the (position, element offset) a cursor points at"""
+        if not cursor:
+            return 0, 0
+        try:
+            text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+            place, mark = text.split(':')
+            position, _, offset = place.partition('.')
+            position, offset = int(position), int(offset or 0)
+        except ValueError:
+            raise ReadError(400, "Invalid cursor")
+        if offset < 0:
+            raise ReadError(400, "Invalid cursor")
+        if offset:
+            valid = 0 <= position < count and fingerprint(records.header(position)) == mark
+        else:
+            valid = 0 <= position <= count and (not position or fingerprint(records.header(position - 1)) == mark)
+        if not valid:
+            raise ReadError(410, "Cursor expired: records before it were removed; start again without a cursor")
+        return position, offset
+
+    def page_limit(self, query, default=None, maximum=None):
+        if 'limit' not in query:
+            return default
+        try:
+            limit = int(query['limit'])
+        except ValueError:
+            raise ReadError(400, "limit must be an integer")
+        if limit < 1:
+            raise ReadError(400, "limit must be positive")
+        if maximum is not None and limit > maximum:
+            raise ReadError(400, f"limit is at most {maximum} for JSON pages")
+        return limit
+
+    def select(self, query, limit=None):
+        """Positions of (at most ``limit``) records matching the query's filters, from the cursor on"""
+        data_manager = self.data_manager
+        filters = {key: query.get(key) or None for key in ('source', 'url', 'since', 'until')}
+        # The GUI thread swaps and appends to these under the same lock
+        with data_manager.read_lock:
+            generation = data_manager.data_generation
+            records = data_manager.collected_data
+            count = len(records)
+            start, offset = self.decode_cursor(records, count, query.get('cursor'))
+            if any(filters.values()):
+                try:
+                    positions = data_manager.index.query(records, start=start, **filters)
+                except ValueError as e:
+                    raise ReadError(400, str(e))
+            else:
+                positions = range(start, count)
+
+        next_position = count
+        if limit is not None and len(positions) > limit:
+            positions = positions[:limit]
+            next_position = positions[-1] + 1
+        return Selection(generation, records, positions, next_position, start, offset)
+
+    def iter_records(self, selection):
+        read_lock = self.data_manager.read_lock
+        for position in selection.positions:
+            with read_lock:
+                if self.data_manager.data_generation != selection.generation:
+                    raise ReadError(409, "Records changed during the read; resume from the last cursor")
+                record = selection.records.read(position)
+            yield position, record
+
+    def iter_headers(self, selection):
+        read_lock = self.data_manager.read_lock
+        for position in selection.positions:
+            with read_lock:
+                if self.data_manager.data_generation != selection.generation:
+                    raise ReadError(409, "Records changed during the read; resume from the last cursor")
+                header = selection.records.header(position)
+            yield position, header
+
+    def iter_elements(self, selection, kind=None):
+        """(position, offset, element) for the elements of the selected records.
+
+        ``offset`` counts the record's elements of the requested kinds, and
+        elements are tagged with their record's position, kind and metadata.
+        """
+        kinds = (kind,) if kind else ELEMENT_KINDS
+        for position, record in self.iter_records(selection):
+            skip = selection.offset if position == selection.start else 0
+            metadata = record.get('metadata', {})
+            tags = {'position': position, 'source': metadata.get('source'), 'url': metadata.get('url'),
+                    'timestamp': metadata.get('timestamp')}
+            offset = 0
+            for element_kind in kinds:
+                for element in record.get(element_kind, []):
+                    if offset >= skip:
+                        yield position, offset, dict(element, kind=element_kind, **tags)
+                    offset += 1
+
+    def response_format(self, request):
+        requested = request.query.get('format')
+        if requested is None:
+            accept = request.headers.get('accept', '')
+            requested = 'ndjson' if NDJSON_TYPE in accept else 'csv' if 'text/csv' in accept else 'json'
+        if requested not in ('json', 'ndjson', 'csv'):
+            raise ReadError(400, f"Unknown format: {requested}")
+        return requested
+
+    def records(self, request):
+        try:
+            output = self.response_format(request)
+            if output == 'json':
+                selection = self.select(request.query, self.page_limit(request.query, PAGE_SIZE, MAX_PAGE_SIZE))
+            else:
+                selection = self.select(request.query, self.page_limit(request.query))
+            if selection.offset:
+                raise ReadError(400, "Invalid cursor: element cursors only work with /elements")
+            if output == 'json':
+                page = [record for _, record in self.iter_records(selection)]
+                return json_response({"records": page, "next_cursor": self.next_cursor(selection)})
+        except ReadError as e:
+            return json_response({"error": str(e)}, e.status)
+
+        if output == 'ndjson':
+            lines = self.ndjson_lines(selection, (((position + 1, 0), record)
+                                                  for position, record in self.iter_records(selection)))
+        else:
+            lines = self.csv_lines(RECORD_COLUMNS, (
+                [position] + [header.get(column) for column in RECORD_COLUMNS[1:4]] +
+                [header.get('counts', {}).get(key, 0) for key in ELEMENT_KEYS]
+                for position, header in self.iter_headers(selection)))
+        return self.stream(selection, output, lines)
+
+    def elements(self, request):
+        kind = request.query.get('kind') or None
+        try:
+            if kind is not None and kind not in ELEMENT_KINDS:
+                raise ReadError(400, f"kind must be one of {', '.join(ELEMENT_KINDS)}")
+            output = self.response_format(request)
+            if output == 'json':
+                limit = self.page_limit(request.query, ELEMENT_PAGE_SIZE, MAX_ELEMENT_PAGE_SIZE)
+                selection = self.select(request.query)
+                page, next_cursor = [], self.next_cursor(selection)
+                for position, offset, element in self.iter_elements(selection, kind):
+                    if len(page) == limit:
+                        next_cursor = self.encode_cursor(selection.records, position, offset)
+                        break
+                    page.append(element)
+                return json_response({"elements": page, "next_cursor": next_cursor})
+            if 'limit' in request.query:
+                raise ReadError(400, "limit only applies to JSON pages of elements; streams return every match")
+            selection = self.select(request.query)
+        except ReadError as e:
+            return json_response({"error": str(e)}, e.status)
+
+        if output == 'ndjson':
+            lines = self.ndjson_lines(selection, (((position, offset + 1), element)
+                                                  for position, offset, element in self.iter_elements(selection, kind)))
+        else:
+            lines = self.csv_lines(ELEMENT_COLUMNS, ([element.get(column) for column in ELEMENT_COLUMNS]
+                                                     for _, _, element in self.iter_elements(selection, kind)))
+        return self.stream(selection, output, lines)
+
+    def next_cursor(self, selection):
+        return self.encode_cursor(selection.records, selection.next_position)
+
+    def ndjson_lines(self, selection, items):
+        """NDJSON lines for (resume point, value) pairs; a read cut short ends
+        with an error line holding the cursor after the last value sent"""
+        resume = (selection.start, selection.offset)
+        try:
+            for after, value in items:
+                yield dumps(value) + b"\n"
+                resume = after
+        except ReadError as e:
+            yield dumps({"error": str(e), "status": e.status,
+                         "next_cursor": self.encode_cursor(selection.records, *resume)}) + b"\n"
+
+    def csv_lines(self, columns, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= CHUNK_BYTES:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    def stream(self, selection, output, lines):
+        return Response(200, self.chunks(lines), NDJSON_TYPE if output == 'ndjson' else CSV_TYPE,
+                        {'X-Next-Cursor': self.next_cursor(selection)})
+
+    def chunks(self, lines):
+        """Group lines into chunks of about CHUNK_BYTES"""
+        pending, size = [], 0
+        for line in lines:
+            pending.append(line)
+            size += len(line)
+            if size >= CHUNK_BYTES:
+                yield b"".join(pending)
+                pending, size = [], 0
+        if pending:
+            yield b"".join(pending)
@@ -0,0 +1,214 @@
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:  # the standard library decoder is used instead
+    orjson = None
+
+# Limits on one record as posted to the ingest server
+MAX_RECORD_BYTES = 16 * 1024 * 1024
+MAX_ELEMENTS = 50000
+
+MISSING = object()
+
+
+class SchemaError(ValueError):
+    """A record that does not match the schema; ``path`` locates the bad value (``texts[3].text``)"""
+
+    def __init__(self, path, message):
+        super().__init__(f"{path}: {message}" if path else message)
+        self.path = path
+        self.message = message
+
+    def within(self, segment):
+        separator = '' if not self.path or self.path.startswith('[') else '.'
+        return SchemaError(segment + separator + self.path, self.message)
+
+
+def loads(data):
+    """Decode JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data):
+    """Encode to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def type_name(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    return 'array' if isinstance(value, list) else 'object'
+
+
+# Each schema node is compiled once into a check function that takes a
+# decoded value and returns it (possibly replaced), or raises SchemaError.
+# Paths are only assembled on the way out of a failed check, so valid
+# records pay nothing for error reporting. A check's ``types`` are the
+# value types it passes unchanged; containers test those inline and only
+# call the check for anything else.
+
+def check_types(*types):
+    def decorate(check):
+        check.types = frozenset(types)
+        return check
+    return decorate
+
+
+@check_types()
+def anything(value):
+    return value
+
+
+def string(max_length=None, nullable=False, intern=False):
+    """A string; ``intern`` shares the many repeats of selectors and tag names.
+
+    Without ``max_length`` string sizes are bounded by MAX_RECORD_BYTES.
+    """
+    plain = max_length is None and not intern
+
+    @check_types(*((str, type(None)) if nullable else (str,)) if plain else ())
+    def check(value):
+        if type(value) is not str:
+            if value is None and nullable:
+                return value
+            raise SchemaError('', f"expected string, got {type_name(value)}")
+        if max_length is not None and len(value) > max_length:
+            raise SchemaError('', f"longer than {max_length} characters")
+        return sys.intern(value) if intern else value
+    return check
+
+
+@check_types(int, float)
+def number(value):
+    raise SchemaError('', f"expected number, got {type_name(value)}")
+
+
+@check_types(str, int, float)
+def timestamp(value):
+    """ISO string (extension) or epoch seconds (robot process)"""
+    raise SchemaError('', f"expected timestamp string or number, got {type_name(value)}")
+
+
+def array(item=anything, max_items=MAX_ELEMENTS):
+    types = item.types
+
+    @check_types()
+    def check(value):
+        if type(value) is not list:
+            raise SchemaError('', f"expected array, got {type_name(value)}")
+        if len(value) > max_items:
+            raise SchemaError('', f"more than {max_items} items")
+        if item is not anything:
+            for index, entry in enumerate(value):
+                if type(entry) in types:
+                    continue
+                try:
+                    value[index] = item(entry)
+                except SchemaError as e:
+                    raise e.within(f"[{index}]")
+        return value
+    return check
+
+
+def mapping(item):
+    """An object with arbitrary keys whose values all match ``item``"""
+    types = item.types
+
+    @check_types()
+    def check(value):
+        if type(value) is not dict:
+            raise SchemaError('', f"expected object, got {type_name(value)}")
+        for key, entry in value.items():
+            if type(entry) in types:
+                continue
+            try:
+                value[key] = item(entry)
+            except SchemaError as e:
+                raise e.within(key)
+        return value
+    return check
+
+
+def obj(fields, required=()):
+    """An object whose listed fields must match; other fields pass through.
+
+    The check is generated as source with one inline test per field, which
+    is several times faster than looping over the fields.
+    """
+    namespace = {'MISSING': MISSING, 'SchemaError': SchemaError, 'type_name': type_name}
+    lines = ["def check(value):",
+             "    if type(value) is not dict:",
+             "        raise SchemaError('', f\"expected object, got {type_name(value)}\")"]
+    for key in required:
+        lines += [f"    if {key!r} not in value:",
+                  f"        raise SchemaError({key!r}, 'required field missing')"]
+    for index, (key, field) in enumerate(fields.items()):
+        namespace[f'field{index}'] = field
+        namespace[f'types{index}'] = field.types
+        test = f" and type(entry) not in types{index}" if field.types else ""
+        lines += [f"    entry = value.get({key!r}, MISSING)",
+                  f"    if entry is not MISSING{test}:",
+                  "        try:",
+                  f"            value[{key!r}] = field{index}(entry)",
+                  "        except SchemaError as e:",
+                  f"            raise e.within({key!r})"]
+    lines.append("    return value")
+    exec("\n".join(lines), namespace)
+    return check_types()(namespace['check'])
+
+
+# Fields common to elements from content.js, SeleniumScrapingThread and
+# RobotProcessExecutor. className is left out: for SVG elements the
+# extension sends an object.
+ELEMENT_FIELDS = {
+    'selector': string(),
+    'text': string(nullable=True),
+    'full_text': string(nullable=True),
+    'elementIndex': number,
+    'tagName': string(),
+    'id': string(),
+    'step': number,
+    'timestamp': timestamp,
+}
+
+TEXT = obj(ELEMENT_FIELDS)
+IMAGE = obj(dict(ELEMENT_FIELDS, src=string(), alt=string(nullable=True)))
+LINK = obj(dict(ELEMENT_FIELDS, href=string()))
+CUSTOM = obj(dict(ELEMENT_FIELDS, html=string(nullable=True), attributes=mapping(string(nullable=True))))
+TABLE = obj({
+    'selector': string(),
+    'tableIndex': number,
+    'headers': array(string()),
+    'rows': array(array(string(nullable=True))),
+})
+
+METADATA = obj({
+    'url': string(nullable=True),
+    'title': string(nullable=True),
+    'timestamp': timestamp,
+    'source': string(max_length=200, intern=True),
+    'config': anything,
+})
+
+validate_record = obj({
+    'texts': array(TEXT),
+    'custom': array(CUSTOM),
+    'custom_elements': array(CUSTOM),
+    'images': array(IMAGE),
+    'links': array(LINK),
+    'tables': array(TABLE),
+    'metadata': METADATA,
+})
+validate_record.__doc__ = "Check a decoded record in place; raises SchemaError"
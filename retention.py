@@ -0,0 +1,76 @@
+import json
+import math
+import os
+import time
+from collections import Counter
+
+from element_frame import parse_timestamp
+
+
+class RetentionPolicy:
+    """Which records a compaction keeps.
+
+    Every limit is off when 0. ``max_age_days`` drops records whose
+    timestamp is older (records without a readable timestamp are kept),
+    ``max_per_source`` and ``max_per_url`` keep the newest records of each
+    source / URL and ``keep_latest`` the newest records overall. Newest
+    means most recently stored, so records are judged from headers alone.
+    """
+
+    FIELDS = ('max_age_days', 'max_per_source', 'max_per_url', 'keep_latest')
+
+    def __init__(self, max_age_days=0, max_per_source=0, max_per_url=0, keep_latest=0):
+        self.max_age_days = max_age_days
+        self.max_per_source = max_per_source
+        self.max_per_url = max_per_url
+        self.keep_latest = keep_latest
+
+    @property
+    def active(self):
+        return any(getattr(self, field) for field in self.FIELDS)
+
+    def select(self, headers, now=None):
+        """Return the ascending positions of the headers to keep"""
+        if not self.active:
+            return list(range(len(headers)))
+        cutoff = None
+        if self.max_age_days:
+            cutoff = (time.time() if now is None else now) - self.max_age_days * 86400
+        per_source, per_url = Counter(), Counter()
+        keep = []
+        for index in range(len(headers) - 1, -1, -1):
+            header = headers[index]
+            if cutoff is not None:
+                timestamp = parse_timestamp(header.get('timestamp'))
+                if not math.isnan(timestamp) and timestamp < cutoff:
+                    continue
+            if self.keep_latest and len(keep) >= self.keep_latest:
+                break
+            source, url = header.get('source'), header.get('url')
+            if self.max_per_source and per_source[source] >= self.max_per_source:
+                continue
+            if self.max_per_url and url and per_url[url] >= self.max_per_url:
+                continue
+            per_source[source] += 1
+            per_url[url] += 1
+            keep.append(index)
+        keep.reverse()
+        return keep
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: int(data.get(field) or 0) for field in cls.FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
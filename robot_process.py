@@ -11,6 +11,7 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 import pickle
 import os
+from metrics import DRIVER_FAILURES, DRIVER_STARTS, EXTRACTION_SECONDS, SCRAPES
 
 class ActionRecorder:
     def __init__(self):
@@ -120,10 +121,16 @@ class RobotProcessExecutor(QThread):
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option('useAutomationExtension', False)
             
-            self.driver = webdriver.Chrome(options=options)
+            try:
+                self.driver = webdriver.Chrome(options=options)
+            except Exception:
+                DRIVER_FAILURES.inc('robot_process')
+                raise
+            DRIVER_STARTS.inc('robot_process')
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
             total_steps = len(self.actions)
+            started = time.perf_counter()
             
             for step_idx, action in enumerate(self.actions):
                 if not self.is_running:
@@ -147,6 +154,9 @@ class RobotProcessExecutor(QThread):
                 self.progress.emit(100)
                 self.message.emit("✅ Robot Process execution completed!")
                 
+                SCRAPES.inc('robot_process')
+                EXTRACTION_SECONDS.observe('robot_process', value=time.perf_counter() - started)
+
                 # Emit collected data
                 if self.extracted_data:
                     final_data = {
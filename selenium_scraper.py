@@ -9,10 +9,12 @@ from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
 import json
+import gzip
 import os
 import platform
 import tempfile
 import shutil
+from metrics import DRIVER_FAILURES, DRIVER_STARTS, EXTRACTION_SECONDS, SCRAPES
 
 class SeleniumScrapingThread(QThread):
     progress = pyqtSignal(int)
@@ -118,6 +120,8 @@ class SeleniumScrapingThread(QThread):
                 error_msg = "All driver initialization methods failed:\n" + "\n".join(initialization_errors)
                 raise Exception(error_msg)
 
+            DRIVER_STARTS.inc('selenium')
+
             # Set page load timeout
             self.driver.set_page_load_timeout(30)
             
@@ -125,6 +129,7 @@ class SeleniumScrapingThread(QThread):
             self.message.emit("🎉 ChromeDriver initialized successfully!")
             
         except Exception as e:
+            DRIVER_FAILURES.inc('selenium')
             error_msg = f"❌ Failed to initialize WebDriver: {str(e)}"
             self.message.emit(error_msg)
             if self.temp_profile_dir and os.path.exists(self.temp_profile_dir):
@@ -219,6 +224,7 @@ class SeleniumScrapingThread(QThread):
             }
         }
 
+        started = time.perf_counter()
         try:
             # Extract from custom selectors if specified
             custom_selectors = self.config.get('custom_selectors', [])
@@ -299,6 +305,8 @@ class SeleniumScrapingThread(QThread):
                         continue
 
             self.scrape_count += 1
+            SCRAPES.inc('selenium')
+            EXTRACTION_SECONDS.observe('selenium', value=time.perf_counter() - started)
             total_elements = len(results['texts']) + len(results['custom_elements'])
             self.message.emit(f"📊 Scrape #{self.scrape_count}: {total_elements} elements found")
 
@@ -308,9 +316,11 @@ class SeleniumScrapingThread(QThread):
         return results
 
     def send_to_backend(self, data):
-        """Send scraped data to the Flask backend"""
+        """Send scraped data to the ingest server (gzip-compressed)"""
         try:
-            response = requests.post('http://127.0.0.1:5584/store', json=data, timeout=10)
+            body = gzip.compress(json.dumps(data).encode('utf-8'), compresslevel=5)
+            response = requests.post('http://127.0.0.1:5584/store', data=body, timeout=10,
+                                     headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
             if response.status_code == 200:
                 self.message.emit("✅ Data sent to backend successfully")
             else:
@@ -0,0 +1,348 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from data_store import ELEMENT_KEYS, ELEMENT_KINDS, element_hash
+
+# Element lists are stored as rows; everything else stays in the record's extra JSON
+ELEMENT_COLUMNS = ('selector', 'text', 'full_text', 'html', 'href', 'src', 'alt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    url TEXT,
+    title TEXT,
+    timestamp,
+    metadata TEXT,
+    extra TEXT,
+    n_texts INTEGER DEFAULT 0,
+    n_custom_elements INTEGER DEFAULT 0,
+    n_images INTEGER DEFAULT 0,
+    n_links INTEGER DEFAULT 0,
+    n_tables INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS element_bodies (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    selector TEXT,
+    text TEXT,
+    full_text TEXT,
+    html TEXT,
+    href TEXT,
+    src TEXT,
+    alt TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS elements (
+    record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body_id INTEGER NOT NULL REFERENCES element_bodies(id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_url ON records(url);
+CREATE INDEX IF NOT EXISTS idx_records_source ON records(source);
+CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records(timestamp);
+CREATE INDEX IF NOT EXISTS idx_elements_record ON elements(record_id, kind, position);
+CREATE INDEX IF NOT EXISTS idx_elements_body ON elements(body_id);
+CREATE INDEX IF NOT EXISTS idx_element_bodies_selector ON element_bodies(selector);
+CREATE VIRTUAL TABLE IF NOT EXISTS element_fts USING fts5(body, content='');
+"""
+
+
+class SQLiteStore:
+    """Record store backed by normalized SQLite tables.
+
+    Records, their element rows and metadata live in separate tables with
+    indexes on url, source and timestamp, and element text is indexed with
+    FTS5 so it can be searched without loading records into Python.
+
+    Element bodies are content-addressed: identical elements from repeated
+    scrapes are stored (and full-text indexed) once and shared by reference.
+    """
+
+    def __init__(self, db_file="scraped_data.db", commit_every=50, fsync_interval=2.0):
+        self.db_file = db_file
+        self.commit_every = commit_every
+        self.fsync_interval = fsync_interval
+        self._conn = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Background jobs read records while the GUI thread inserts
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def exists(self):
+        return os.path.exists(self.db_file)
+
+    def append(self, record):
+        """Insert a record and its elements and return its header"""
+        return self.append_many([record])[0]
+
+    def append_many(self, records):
+        """Insert records and return their headers"""
+        with self._lock:
+            # A batch that fails is rolled back on its own, so it can be retried
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            self.conn.execute("SAVEPOINT batch")
+            try:
+                headers = [self._header(self._insert(record), record) for record in records]
+            except Exception:
+                self.conn.execute("ROLLBACK TO batch")
+                raise
+            finally:
+                self.conn.execute("RELEASE batch")
+            self._pending += len(headers)
+
+            # Group commit: one transaction per batch of records or per time window
+            if (self._pending >= self.commit_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+            return headers
+
+    def _insert(self, record):
+        metadata = record.get('metadata', {})
+        # Empty element lists stay in extra so the record reads back with them
+        extra = {k: v for k, v in record.items() if (k not in ELEMENT_KINDS or not v) and k != 'metadata'}
+        cursor = self.conn.execute(
+            "INSERT INTO records (source, url, title, timestamp, metadata, extra, "
+            "n_texts, n_custom_elements, n_images, n_links, n_tables) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (metadata.get('source'), metadata.get('url'), metadata.get('title'),
+             metadata.get('timestamp'), json.dumps(metadata, ensure_ascii=False),
+             json.dumps(extra, ensure_ascii=False) if extra else None,
+             *[len(record.get(key, [])) for key in ELEMENT_KEYS])
+        )
+        record_id = cursor.lastrowid
+
+        for kind in ELEMENT_KINDS:
+            for position, element in enumerate(record.get(kind, [])):
+                self.conn.execute(
+                    "INSERT INTO elements (record_id, kind, position, body_id) VALUES (?, ?, ?, ?)",
+                    (record_id, kind, position, self._body_id(element))
+                )
+        return record_id
+
+    def _body_id(self, element):
+        """Return the row id of an element body, inserting it if new"""
+        key = element_hash(element)
+        row = self.conn.execute("SELECT id FROM element_bodies WHERE hash = ?", (key,)).fetchone()
+        if row:
+            return row[0]
+
+        columns = [element.get(c) if isinstance(element.get(c), str) else None
+                   for c in ELEMENT_COLUMNS]
+        leftover = {k: v for k, v in element.items()
+                    if k not in ELEMENT_COLUMNS or not isinstance(v, str)}
+        cursor = self.conn.execute(
+            "INSERT INTO element_bodies (hash, selector, text, full_text, html, href, src, alt, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, *columns, json.dumps(leftover, ensure_ascii=False) if leftover else None)
+        )
+        body = element.get('full_text') or element.get('text') or element.get('alt')
+        if isinstance(body, str) and body:
+            self.conn.execute("INSERT INTO element_fts (rowid, body) VALUES (?, ?)",
+                              (cursor.lastrowid, body))
+        return cursor.lastrowid
+
+    def _header(self, record_id, record):
+        metadata = record.get('metadata', {})
+        return {
+            'id': record_id,
+            'source': metadata.get('source'),
+            'url': metadata.get('url'),
+            'timestamp': metadata.get('timestamp'),
+            'counts': {key: len(record.get(key, [])) for key in ELEMENT_KEYS}
+        }
+
+    def sync(self):
+        """Commit pending inserts"""
+        with self._lock:
+            if self._conn is not None and self._pending:
+                self._conn.commit()
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self.sync()
+                self._conn.close()
+                self._conn = None
+
+    def load(self):
+        """Load every record into memory"""
+        return [self.read_record(header) for header in self.load_index()]
+
+    def load_index(self):
+        """Return the headers of all stored records, in order"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, source, url, timestamp, n_texts, n_custom_elements, "
+                "n_images, n_links, n_tables FROM records ORDER BY id"
+            )
+            return [{
+                'id': row[0],
+                'source': row[1],
+                'url': row[2],
+                'timestamp': row[3],
+                'counts': dict(zip(ELEMENT_KEYS, row[4:]))
+            } for row in rows]
+
+    def read_record(self, header):
+        """Rebuild one record from its rows"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT metadata, extra FROM records WHERE id = ?", (header['id'],)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Record {header['id']} not found")
+
+            record = json.loads(row[1]) if row[1] else {}
+            for kind, *values, extra in self.conn.execute(
+                    "SELECT e.kind, b.selector, b.text, b.full_text, b.html, b.href, b.src, b.alt, b.extra "
+                    "FROM elements e JOIN element_bodies b ON b.id = e.body_id "
+                    "WHERE e.record_id = ? ORDER BY e.kind, e.position", (header['id'],)):
+                element = {c: v for c, v in zip(ELEMENT_COLUMNS, values) if v is not None}
+                if extra:
+                    element.update(json.loads(extra))
+                record.setdefault(kind, []).append(element)
+            record['metadata'] = json.loads(row[0]) if row[0] else {}
+            return record
+
+    def rewrite(self, records, dropped=()):
+        """Bring the database in line with ``records`` (a LazyRecordList over
+        this store) and return the new headers.
+
+        Rows of ``dropped`` (headers of records taken out of the list or
+        replaced in it) are deleted. From the first record without a row id
+        (one that cleaning replaced) on, records are rewritten one at a time,
+        so row order keeps following list order. Freed pages stay in the
+        database file and are reused by later inserts.
+        """
+        with self._lock:
+            self.sync()
+            headers = records.headers
+            tail = next((i for i, header in enumerate(headers) if 'id' not in header), len(headers))
+            dropped = [header['id'] for header in dropped if 'id' in header]
+            with self.conn:
+                self._delete_records(dropped)
+                new_headers = list(headers[:tail])
+                for index in range(tail, len(headers)):
+                    record = records.read(index)
+                    if 'id' in headers[index]:
+                        self.conn.execute("DELETE FROM records WHERE id = ?", (headers[index]['id'],))
+                    new_headers.append(self._header(self._insert(record), record))
+                if dropped or tail < len(headers):
+                    self._delete_orphan_bodies()
+            return new_headers
+
+    def clear(self):
+        """Delete all stored records and element bodies"""
+        with self._lock:
+            self.sync()
+            with self.conn:
+                self.conn.execute("DELETE FROM records")
+                self.conn.execute("DELETE FROM element_bodies")
+                self.conn.execute("INSERT INTO element_fts (element_fts) VALUES ('delete-all')")
+
+    def _delete_records(self, ids):
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            self.conn.execute(f"DELETE FROM records WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+
+    def _delete_orphan_bodies(self):
+        """Delete element bodies no record refers to anymore"""
+        orphans = self.conn.execute(
+            "SELECT id, full_text, text, alt FROM element_bodies "
+            "WHERE NOT EXISTS (SELECT 1 FROM elements e WHERE e.body_id = element_bodies.id)"
+        ).fetchall()
+        for body_id, *bodies in orphans:
+            body = next((b for b in bodies if b), None)
+            if body:
+                # Contentless FTS rows are deleted by repeating their content
+                self.conn.execute("INSERT INTO element_fts (element_fts, rowid, body) VALUES ('delete', ?, ?)",
+                                  (body_id, body))
+            self.conn.execute("DELETE FROM element_bodies WHERE id = ?", (body_id,))
+
+    def prepare_compaction(self, records, keep, journal_end=None, report=None):
+        """Work out which records a compaction drops; nothing is written yet"""
+        kept = set(keep)
+        return {'drop': [records.header(i)['id'] for i in range(len(records)) if i not in kept]}
+
+    def commit_compaction(self, prepared):
+        """Delete the dropped records and unreferenced element bodies.
+
+        Returns (headers of all remaining records, bytes reclaimed); freed
+        pages stay in the database file and are reused by later inserts.
+        """
+        with self._lock:
+            self.sync()
+            drop = prepared['drop']
+            free_before = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            with self.conn:
+                self._delete_records(drop)
+                self._delete_orphan_bodies()
+            free_after = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            return self.load_index(), (free_after - free_before) * page_size
+
+    def discard_compaction(self, prepared):
+        pass
+
+    def search(self, text=None, source=None, url=None, kind=None, limit=500):
+        """Search elements by full text and record metadata.
+
+        Returns dicts with the element fields plus the owning record's
+        source, url, timestamp and position (``record_id``, as from
+        ``scan_elements``).
+        """
+        with self._lock:
+            query = ("SELECT e.record_id, e.kind, b.selector, b.text, b.full_text, b.href, b.src, "
+                     "b.alt, r.source, r.url, r.timestamp FROM elements e "
+                     "JOIN element_bodies b ON b.id = e.body_id "
+                     "JOIN records r ON r.id = e.record_id")
+            conditions, params = [], []
+            if text:
+                query += " JOIN element_fts f ON f.rowid = b.id"
+                conditions.append("f.element_fts MATCH ?")
+                params.append('"' + text.replace('"', '""') + '"*')
+            if source:
+                conditions.append("r.source = ?")
+                params.append(source)
+            if url:
+                conditions.append("r.url LIKE ? ESCAPE '\\'")
+                params.append(url.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+            if kind:
+                conditions.append("e.kind = ?")
+                params.append(kind)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY e.record_id, e.kind, e.position LIMIT ?"
+            params.append(limit)
+
+            self.sync()
+            columns = ('record_id', 'kind', 'selector', 'text', 'full_text', 'href', 'src',
+                       'alt', 'source', 'url', 'timestamp')
+            results = [dict(zip(columns, row)) for row in self.conn.execute(query, params)]
+            positions = {}
+            for result in results:
+                record_id = result['record_id']
+                if record_id not in positions:
+                    # Row ids ascend in list order, so the rows before a record give its position
+                    positions[record_id] = self.conn.execute(
+                        "SELECT COUNT(*) FROM records WHERE id < ?", (record_id,)).fetchone()[0]
+                result['record_id'] = positions[record_id]
+            return results
@@ -0,0 +1,147 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+
+
+class StatusLogModel(QAbstractListModel):
+    """Bounded status log for the status panes.
+
+    Lines are kept in a ring buffer of at most ``max_lines`` entries, so the
+    cost of logging stays constant however long the app runs. A message
+    identical to the previous one only bumps a repeat counter
+    ("... (repeated 240 times)"). Messages are buffered and handed to the
+    view at most every ``flush_ms``; more than ``max_rate`` new lines per
+    second are dropped from the view with a single "suppressed" note. With
+    ``spill_file`` every message is also appended to that file in full.
+    """
+
+    def __init__(self, max_lines=2000, max_rate=50, flush_ms=100, spill_file=None, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.max_rate = max_rate
+        self.flush_ms = flush_ms
+        self.spill_file = spill_file
+        # Entries are [timestamp, message, repeat count]
+        self._lines = deque()
+        self._pending = []
+        self._last = None
+        self._suppressed = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._spill = None
+        self._view = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def attach(self, view):
+        """Use ``view`` to show the log, keeping it scrolled to the newest line"""
+        self._view = view
+        view.setModel(self)
+        view.setUniformItemSizes(True)
+
+    def append(self, message):
+        timestamp = time.strftime('%H:%M:%S')
+        if self.spill_file:
+            self._write_spill(timestamp, message)
+
+        last = self._last
+        if last is not None and last[1] == message:
+            last[0] = timestamp
+            last[2] += 1
+            if self._lines and self._lines[-1] is last:
+                row = len(self._lines) - 1
+                self.dataChanged.emit(self.index(row), self.index(row))
+            elif not (self._pending and self._pending[-1] is last):
+                # The first occurrence was rate limited; show the repeats
+                self._suppressed -= 1
+                self._pending.append(last)
+                self._schedule_flush()
+            return
+
+        self._last = [timestamp, message, 1]
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        if self._window_count > self.max_rate:
+            self._suppressed += 1
+        else:
+            self._pending.append(self._last)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(self.flush_ms)
+
+    def flush(self):
+        """Move buffered lines into the model in one insert"""
+        if self._suppressed:
+            note = f"⏩ {self._suppressed} messages suppressed"
+            if self.spill_file:
+                note += f" (full log in {self.spill_file})"
+            self._pending.insert(0, [time.strftime('%H:%M:%S'), note, 1])
+            self._suppressed = 0
+        if self._spill is not None:
+            self._spill.flush()
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending[-self.max_lines:], []
+        follow = self._at_bottom()
+        overflow = len(self._lines) + len(pending) - self.max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._lines.popleft()
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), len(self._lines), len(self._lines) + len(pending) - 1)
+        self._lines.extend(pending)
+        self.endInsertRows()
+        if follow:
+            self._view.scrollToBottom()
+
+    def _at_bottom(self):
+        if self._view is None:
+            return False
+        scrollbar = self._view.verticalScrollBar()
+        return scrollbar.value() >= scrollbar.maximum()
+
+    def _write_spill(self, timestamp, message):
+        if self._spill is None:
+            self._spill = open(self.spill_file, 'a', encoding='utf-8')
+        self._spill.write(f"{time.strftime('%Y-%m-%d')} {timestamp} {message}\n")
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines.clear()
+        self._pending = []
+        self._last = None
+        self._suppressed = 0
+        self._window_count = 0
+        self.endResetModel()
+
+    def close(self):
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def lines(self):
+        """Return the displayed lines as text"""
+        return [self._format(entry) for entry in self._lines]
+
+    def _format(self, entry):
+        timestamp, message, count = entry
+        if count > 1:
+            return f"[{timestamp}] {message} (repeated {count} times)"
+        return f"[{timestamp}] {message}"
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self._format(self._lines[index.row()])
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def fill(value, i):
+    """Format every string in a nested value with ``i``"""
+    if isinstance(value, str):
+        return value.format(i=i)
+    if isinstance(value, list):
+        return [fill(item, i) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, i) for key, item in value.items()}
+    return value
+
+
+def build_record(i=0, texts=('text {i}',), selector='p', source='extension', url='http://example.com/{i}',
+                 timestamp='2025-01-01T00:00:{i:02d}', metadata=None, **elements):
+    """A scraped record numbered ``i``; every string in it is formatted with ``i``.
+
+    ``texts`` are strings (``selector`` elements) or element dicts, and
+    ``elements`` adds other element lists. Metadata values of None are
+    left out and ``metadata`` adds more.
+    """
+    record = {'texts': [{'selector': selector, 'text': text} if isinstance(text, str) else text
+                        for text in texts]} if texts else {}
+    record.update(elements)
+    record['metadata'] = {key: value for key, value in (('source', source), ('url', url), ('timestamp', timestamp))
+                          if value is not None}
+    record['metadata'].update(metadata or {})
+    return fill(record, i)
+
+
+@pytest.fixture
+def make_record():
+    return build_record
+
+
+class FakePipeline:
+    """Collects queued records instead of processing them"""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self.records = []
+        self.downstream_pending = None
+        self.on_drop = None
+
+    def has_room(self):
+        return len(self.records) < self.max_pending
+
+    def put(self, record):
+        self.records.append(record)
+
+    def pending(self):
+        return len(self.records)
+
+
+@pytest.fixture
+def pipeline():
+    return FakePipeline()
+
+
+@pytest.fixture
+def api(pipeline):
+    from ingest_api import IngestAPI
+    return IngestAPI(pipeline)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from async_server import MAX_HEADER_BYTES, HTTPProtocol
+from ingest_api import MAX_BODY_BYTES, Response, json_response
+
+
+class FakeTransport:
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+        self.paused = False
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+    def pause_reading(self):
+        self.paused = True
+
+    def resume_reading(self):
+        self.paused = False
+
+
+class EchoAPI:
+    """Answers with the request it got; /stream streams three chunks"""
+
+    message = None
+
+    def __init__(self):
+        self.blocking_paths = {'/slow'}
+
+    def handle(self, request):
+        if request.path == '/stream':
+            return Response(200, iter([b"one\n", b"two\n", b"three\n"]), 'text/plain')
+        return json_response({"method": request.method, "path": request.path, "query": request.query,
+                              "body": request.body.decode('utf-8')})
+
+
+def connect():
+    protocol = HTTPProtocol(EchoAPI())
+    transport = FakeTransport()
+    protocol.connection_made(transport)
+    return protocol, transport
+
+
+def responses(data):
+    """Split raw Content-Length framed responses into (status, headers, body)"""
+    result = []
+    data = bytes(data)
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        length = int(headers.get('Content-Length', 0))
+        result.append((int(lines[0].split(" ")[1]), headers, data[:length]))
+        data = data[length:]
+    return result
+
+
+def test_pipelined_requests_and_split_bodies():
+    protocol, transport = connect()
+    protocol.data_received(b"GET /health?x=1 HTTP/1.1\r\nHost: a\r\n\r\n"
+                           b"POST /store HTTP/1.1\r\nContent-Length: 11\r\n\r\nhello")
+    protocol.data_received(b" world")
+    (status1, headers1, body1), (status2, _, body2) = responses(transport.data)
+    assert status1 == status2 == 200
+    assert headers1['Connection'] == 'keep-alive'
+    assert json.loads(body1)['query'] == {'x': '1'}
+    assert json.loads(body2)['body'] == 'hello world'
+    assert not transport.closed
+
+
+def test_expect_continue_and_connection_close():
+    protocol, transport = connect()
+    protocol.data_received(b"POST /store HTTP/1.1\r\nExpect: 100-continue\r\nContent-Length: 2\r\n"
+                           b"Connection: close\r\n\r\n")
+    assert bytes(transport.data) == b"HTTP/1.1 100 Continue\r\n\r\n"
+    protocol.data_received(b"ok")
+    assert b"Connection: close" in transport.data
+    assert transport.closed
+
+
+def test_http_10_closes_unless_keep_alive():
+    protocol, transport = connect()
+    protocol.data_received(b"GET /health HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+    assert not transport.closed
+    protocol.data_received(b"GET /health HTTP/1.0\r\n\r\n")
+    assert transport.closed
+
+
+def rejected(raw):
+    protocol, transport = connect()
+    protocol.data_received(raw)
+    assert transport.closed
+    return responses(transport.data)[-1][0]
+
+
+def test_bad_requests_are_rejected():
+    assert rejected(b"POST /store HTTP/1.1\r\nContent-Length: -5\r\n\r\n") == 400
+    assert rejected(b"POST /store HTTP/1.1\r\nContent-Length: ten\r\n\r\n") == 400
+    assert rejected(b"GARBAGE\r\n\r\n") == 400
+    assert rejected(b"GET / HTTP/1.1\r\nno colon\r\n\r\n") == 400
+    assert rejected(b"POST /store HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n") == 411
+    assert rejected(f"POST /store HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode()) == 413
+    assert rejected(b"GET / HTTP/1.1\r\nX: " + b"a" * MAX_HEADER_BYTES) == 431
+
+
+def test_streamed_response_holds_pipelined_requests():
+    async def scenario():
+        protocol, transport = connect()
+        protocol.data_received(b"GET /stream HTTP/1.1\r\n\r\nGET /slow HTTP/1.1\r\n\r\n"
+                               b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+        assert protocol.responding and transport.paused
+        for _ in range(200):
+            if transport.closed:
+                break
+            await asyncio.sleep(0.01)
+        return transport
+
+    transport = asyncio.run(scenario())
+    assert transport.closed and not transport.paused
+    head, _, rest = bytes(transport.data).partition(b"\r\n\r\n")
+    assert b"Transfer-Encoding: chunked" in head
+    chunked, _, rest = rest.partition(b"0\r\n\r\n")
+    assert chunked == b"4\r\none\n\r\n4\r\ntwo\n\r\n6\r\nthree\n\r\n"
+    assert [json.loads(body)['path'] for _, _, body in responses(rest)] == ['/slow', '/health']
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from background_jobs import JobManager
+
+
+def wait_for(qapp, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+def test_result_is_delivered_on_the_gui_thread(qapp):
+    jobs = JobManager()
+    results, threads = [], []
+
+    def work(job, values):
+        threads.append(threading.current_thread())
+        for i, _ in enumerate(values):
+            job.report(i, len(values))
+        return sum(values)
+
+    jobs.submit('sum', work, [1, 2, 3],
+                on_done=lambda result: results.append((result, threading.current_thread())))
+    wait_for(qapp, lambda: results)
+    assert results == [(6, threading.main_thread())]
+    assert threads[0] is not threading.main_thread()
+    assert not jobs.is_running('sum')
+
+
+def test_resubmitting_supersedes_the_running_job(qapp):
+    jobs = JobManager()
+    release = threading.Event()
+    results = []
+
+    def slow(job, value):
+        while not release.is_set():
+            job.check_cancelled()
+            time.sleep(0.005)
+        return value
+
+    first = jobs.submit('chart', slow, 1, on_done=results.append)
+    jobs.submit('chart', slow, 2, on_done=results.append)
+    assert first.cancelled
+    release.set()
+    wait_for(qapp, lambda: results)
+    jobs.cancel_all(wait=True)
+    qapp.processEvents()
+    assert results == [2]
+
+
+def test_errors_and_cancel_all(qapp):
+    jobs = JobManager()
+    errors, results = [], []
+
+    def fail(job):
+        raise RuntimeError("boom")
+
+    jobs.submit('bad', fail, on_error=errors.append)
+    wait_for(qapp, lambda: errors)
+    assert errors == ["boom"]
+
+    started = threading.Event()
+
+    def forever(job):
+        started.set()
+        while True:
+            job.report(0, 1)
+            time.sleep(0.005)
+
+    jobs.submit('loop', forever, on_done=results.append)
+    started.wait(5)
+    jobs.cancel_all(wait=True)
+    qapp.processEvents()
+    assert not jobs.is_running() and results == []
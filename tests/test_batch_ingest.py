@@ -0,0 +1,65 @@
+import gzip
+import json
+import zlib
+
+import pytest
+import zstandard
+
+from ingest_api import MAX_BATCH_RECORDS, MAX_DECODED_BYTES, BodyError, Request, decode_body
+
+
+def post(api, body, encoding=None):
+    headers = {'content-encoding': encoding} if encoding else {}
+    response = api.handle(Request('POST', '/store/batch', headers=headers, body=body))
+    return response.status, json.loads(response.body)
+
+
+@pytest.mark.parametrize('encoding, compress', [
+    (None, lambda data: data),
+    ('gzip', gzip.compress),
+    ('deflate', zlib.compress),
+    ('zstd', lambda data: zstandard.ZstdCompressor().compress(data)),
+])
+def test_decode_body(encoding, compress):
+    assert decode_body(compress(b"payload" * 100), encoding) == b"payload" * 100
+
+
+def test_decode_body_errors():
+    with pytest.raises(BodyError) as error:
+        decode_body(b"not gzip", 'gzip')
+    assert error.value.status == 400
+    with pytest.raises(BodyError) as error:
+        decode_body(gzip.compress(b"x" * 1000)[:-12], 'gzip')
+    assert error.value.status == 400
+    with pytest.raises(BodyError) as error:
+        decode_body(gzip.compress(b"\0" * (MAX_DECODED_BYTES + 1)), 'gzip')
+    assert error.value.status == 413
+    with pytest.raises(BodyError) as error:
+        decode_body(b"data", 'br')
+    assert error.value.status == 415
+
+
+def test_batch_reports_a_status_per_record(api, pipeline, make_record):
+    lines = [json.dumps(make_record(0)), json.dumps([make_record(1), make_record(2)]), '', '{broken',
+             json.dumps({'texts': 'not a list'}), json.dumps(make_record(0))]
+    status, result = post(api, gzip.compress("\n".join(lines).encode('utf-8')), 'gzip')
+    assert status == 200
+    assert (result['stored'], result['duplicate'], result['rejected'], result['busy']) == (3, 1, 2, 0)
+    assert [(r['line'], r['status']) for r in result['results']] == [
+        (1, 'stored'), (2, 'stored'), (2, 'stored'), (4, 'rejected'), (5, 'rejected'), (6, 'duplicate')]
+    assert [r['metadata']['url'] for r in pipeline.records] == [f'http://example.com/{i}' for i in range(3)]
+
+
+def test_full_queue_refuses_the_rest_of_the_batch(api, pipeline, make_record):
+    pipeline.max_pending = 2
+    status, result = post(api, "\n".join(json.dumps(make_record(i)) for i in range(4)).encode('utf-8'))
+    assert status == 200
+    assert [r['status'] for r in result['results']] == ['stored', 'stored', 'busy', 'busy']
+    status, result = post(api, json.dumps(make_record(9)).encode('utf-8'))
+    assert status == 429 and result['busy'] == 1
+
+
+def test_empty_and_oversized_batches(api, make_record):
+    assert post(api, b"\n\n")[0] == 400
+    body = json.dumps([make_record(i) for i in range(MAX_BATCH_RECORDS + 1)]).encode('utf-8')
+    assert post(api, body)[0] == 413
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from data_stats import DatasetStats, LengthHistogram, QuantileSketch, RunningStats
+from data_store import record_header
+from element_frame import ElementFrame
+
+
+@pytest.fixture
+def records(make_record):
+    return [
+        make_record(0, texts=['short', 'x' * 120], links=[{'href': 'http://a'}]),
+        make_record(1, texts=None, source='selenium',
+                    custom_elements=[{'selector': '.price', 'text': 'y ' * 150}, {'selector': '.price', 'text': '  '}]),
+        make_record(2, texts=[{'selector': 'h1', 'text': None}], images=[{'src': 'a.png'}], source=None),
+        make_record(3, texts=None, links=[{'href': 'http://b'}]),
+    ]
+
+
+def test_running_stats_match_numpy():
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    batch = RunningStats.from_array(values)
+    for result in (stats, batch):
+        assert result.count == 8 and result.total == sum(values)
+        assert result.min == 1 and result.max == 9
+        assert result.mean == pytest.approx(np.mean(values))
+        assert result.variance == pytest.approx(np.var(values))
+
+
+def test_quantile_sketch_is_within_relative_accuracy():
+    values = np.arange(1, 10001)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_many(values)
+    for q in (0.1, 0.5, 0.99):
+        exact = np.quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_length_histogram_bins():
+    histogram = LengthHistogram(bucket_width=10)
+    histogram.add_many([1, 5, 12, 35])
+    histogram.add(9)
+    assert histogram.bins() == [(0, 3), (10, 1), (30, 1)]
+    edges, counts = histogram.dense()
+    assert edges.tolist() == [0, 10, 20, 30, 40]
+    assert counts.tolist() == [3, 1, 0, 1]
+
+
+def test_incremental_stats_match_rebuild(records):
+    incremental = DatasetStats()
+    frame = ElementFrame()
+    for record in records:
+        incremental.add_record(record)
+        frame.append_record(record)
+    rebuilt = DatasetStats()
+    rebuilt.rebuild([record_header(record) for record in records], frame)
+
+    for stats in (incremental, rebuilt):
+        assert stats.record_count == 4
+        assert stats.empty_records == 1
+        assert stats.source_counts == {'extension': 2, 'selenium': 1, 'unknown': 1}
+        assert stats.kind_counts == {'texts': 3, 'custom_elements': 2, 'images': 1, 'links': 2}
+        assert stats.text_items == 5 and stats.empty_text_items == 2
+        assert stats.length_classes == {'short': 1, 'medium': 1, 'long': 1}
+    assert incremental.selector_counts == rebuilt.selector_counts
+    assert incremental.text_lengths.mean == pytest.approx(rebuilt.text_lengths.mean)
+    assert incremental.word_counts.total == rebuilt.word_counts.total
@@ -0,0 +1,58 @@
+import json
+
+from data_store import DELTA_KEY, DeltaEncoder, JournalStore, apply_refs, diff_refs
+
+
+def snapshot(version, url='http://example.com/feed'):
+    items = [{'selector': 'li', 'text': f'item {i}'} for i in range(version, version + 30)]
+    return {'texts': [{'selector': 'h1', 'text': 'Feed'}] + items,
+            'links': [{'selector': 'a', 'href': '/more'}],
+            'metadata': {'source': 'extension', 'url': url, 'timestamp': f'2025-01-01T00:{version:02d}:00'}}
+
+
+def stored_lines(path):
+    return [json.loads(line.rstrip(b',')) for line in path.read_bytes().splitlines() if line not in (b'[', b']')]
+
+
+def test_diff_and_apply_refs_round_trip():
+    old = list('abcdefgh')
+    for new in (list('abcXdefgh'), list('abgh'), list('abcdefghij'), list('zabcdefgh'), [], old):
+        ops = diff_refs(old, new)
+        assert apply_refs(old, ops) == new
+        assert len(ops) <= 1
+    assert diff_refs(old, old) == []
+
+
+def test_repeated_snapshots_are_deltas_with_keyframes(tmp_path):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.deltas = DeltaEncoder(keyframe_interval=5)
+    records = [snapshot(v) for v in range(12)] + [snapshot(0, url='http://other.com/')]
+    headers = store.append_many(records)
+    store.close()
+
+    lines = stored_lines(tmp_path / 'data.jsonl')
+    assert [DELTA_KEY in line for line in lines] == [False, True, True, True, True] * 2 + [False, True, False]
+    assert [h['counts']['texts'] for h in headers] == [31] * 13
+
+    reopened = JournalStore(str(tmp_path / 'data.json'))
+    assert reopened.load() == records
+    assert [reopened.read_record(h) for h in reversed(reopened.load_index())] == records[::-1]
+
+
+def test_unrelated_records_stay_keyframes(tmp_path):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = [snapshot(0), {'texts': [{'selector': 'p', 'text': 'no url'}], 'metadata': {}},
+               dict(snapshot(50), texts=[{'selector': 'li', 'text': f'new {i}'} for i in range(30)])]
+    store.append_many(records)
+    store.close()
+    assert not any(DELTA_KEY in line for line in stored_lines(tmp_path / 'data.jsonl'))
+
+
+def test_compaction_keeps_deltas_readable(tmp_path):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = [snapshot(v) for v in range(25)]
+    store.append_many(records)
+    headers = store.compact(store.load())
+    assert sum(DELTA_KEY in line for line in stored_lines(tmp_path / 'data.json')) == 23
+    assert [store.read_record(h) for h in headers] == records
+    store.close()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from downsample import IncrementalLTTB
+
+
+def test_small_series_is_kept_whole():
+    series = IncrementalLTTB(max_points=100)
+    series.extend([0, 1, 2], [5, 6, 7])
+    x, y = series.points()
+    assert x.tolist() == [0, 1, 2] and y.tolist() == [5, 6, 7]
+
+
+def test_output_is_bounded_and_keeps_spikes():
+    n = 100000
+    x = np.arange(n, dtype=float)
+    y = np.sin(x / 500)
+    y[61234] = 50
+    y[7777] = -50
+    series = IncrementalLTTB(max_points=500, capacity=16)
+    series.extend(x, y)
+    px, py = series.points()
+    assert len(px) <= 502
+    assert px[0] == 0 and px[-1] == n - 1
+    assert 61234 in px and 7777 in px
+    assert np.all(np.diff(px) > 0)
+
+
+def test_incremental_matches_one_shot():
+    x = np.arange(20000, dtype=float)
+    y = np.random.default_rng(1).normal(size=20000).cumsum()
+    once = IncrementalLTTB(max_points=300)
+    once.extend(x, y)
+    chunked = IncrementalLTTB(max_points=300)
+    for start in range(0, 20000, 777):
+        chunked.extend(x[start:start + 777], y[start:start + 777])
+    assert len(chunked) == 20000
+    assert np.array_equal(once.points()[0], chunked.points()[0])
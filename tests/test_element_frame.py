@@ -0,0 +1,67 @@
+import functools
+
+import numpy as np
+import pytest
+
+from element_frame import ElementFrame, parse_timestamp
+
+
+@pytest.fixture
+def make_record(make_record):
+    """Records with a numeric custom element and an empty text"""
+    return functools.partial(make_record, texts=['word {i} here', {'selector': 'h1', 'text': ''}],
+                             custom_elements=[{'selector': '.price', 'text': '${i}.50'}])
+
+
+def test_rows_and_codes_per_element(make_record):
+    frame = ElementFrame(capacity=2)
+    for i in range(3):
+        frame.append_record(make_record(i, source='selenium' if i == 1 else 'extension'))
+    frame.append_record({'links': [{'href': 'http://a'}]})
+
+    assert len(frame) == 9 and frame.record_count == 4
+    assert frame.column('record_id').tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+    assert frame.column('words').tolist()[:3] == [3, 0, 1]
+    assert frame.column('empty').tolist()[:3] == [False, True, False]
+    assert frame.sources == ['extension', 'selenium', 'unknown']
+    assert frame.selectors == ['p', 'h1', '.price']
+    assert frame.record_rows(1) == slice(3, 6)
+    assert frame.record_rows(3) == slice(9, 9)
+
+
+def test_numbers_are_extracted_on_append(make_record):
+    frame = ElementFrame()
+    for i in range(3):
+        frame.append_record(make_record(i))
+    assert frame.numbers('.price', 'USD').tolist() == [0.5, 1.5, 2.5]
+    assert frame.numbers('p').tolist() == [0.0, 1.0, 2.0]
+    assert frame.numbers('missing').tolist() == []
+    assert frame.numeric_selectors() == ['p', '.price']
+
+
+def test_snapshot_is_not_affected_by_appends(make_record):
+    frame = ElementFrame(capacity=2)
+    frame.append_record(make_record(0))
+    snapshot = frame.snapshot()
+    for i in range(1, 10):
+        frame.append_record(make_record(i))
+    assert len(snapshot) == 3
+    assert snapshot.column('record_id').tolist() == [0, 0, 0]
+    assert len(frame) == 30
+
+
+def test_dataframe_has_categorical_columns(make_record):
+    frame = ElementFrame()
+    frame.append_record(make_record(5))
+    df = frame.to_dataframe()
+    assert list(df['selector']) == ['p', 'h1', '.price']
+    assert str(df['source'].dtype) == 'category'
+    assert df['timestamp'].iloc[0] == np.datetime64('2025-01-01T00:00:05')
+    assert frame.to_dataframe() is df
+
+
+def test_parse_timestamp():
+    assert parse_timestamp(12) == 12.0
+    assert parse_timestamp('1970-01-01T00:01:00Z') == 60.0
+    assert np.isnan(parse_timestamp('yesterday'))
+    assert np.isnan(parse_timestamp(None))
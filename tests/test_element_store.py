@@ -0,0 +1,100 @@
+import functools
+
+import pytest
+
+from data_store import REFS_KEY, ElementStore, JournalStore, element_hash
+
+
+@pytest.fixture
+def make_record(make_record):
+    """Pages that repeat a navigation element"""
+    return functools.partial(make_record, texts=[{'selector': 'nav', 'text': 'Home'}, 'story {i}'])
+
+
+def test_each_element_is_written_once(tmp_path):
+    elements = ElementStore(str(tmp_path / 'data.elements'))
+    key, first = elements.put({'selector': 'nav', 'text': 'Home'})
+    again, second = elements.put({'selector': 'nav', 'text': 'Home'})
+    assert key == again == element_hash({'text': 'Home', 'selector': 'nav'})
+    assert first is second
+    elements.close()
+    assert len((tmp_path / 'data.elements').read_bytes().splitlines()) == 1
+
+    reopened = ElementStore(str(tmp_path / 'data.elements'))
+    assert len(reopened) == 1
+    assert reopened.get(key) == {'selector': 'nav', 'text': 'Home'}
+
+
+def test_encode_keeps_hashes_and_decode_restores(tmp_path, make_record):
+    elements = ElementStore(str(tmp_path / 'data.elements'))
+    encoded = elements.encode(make_record(1))
+    assert 'texts' not in encoded
+    assert len(encoded[REFS_KEY]['texts']) == 2
+    assert elements.decode(encoded) == make_record(1)
+
+
+def test_journal_shares_repeated_elements(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.append_many([make_record(i) for i in range(5)])
+    store.close()
+    lines = (tmp_path / 'data.elements').read_bytes().splitlines()
+    assert len(lines) == 6
+    assert JournalStore(str(tmp_path / 'data.json')).load() == [make_record(i) for i in range(5)]
+
+
+def test_compact_drops_unreferenced_bodies(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.append_many([make_record(i) for i in range(3)])
+    store.compact([make_record(0)])
+    store.close()
+    assert len((tmp_path / 'data.elements').read_bytes().splitlines()) == 2
+    assert JournalStore(str(tmp_path / 'data.json')).load() == [make_record(0)]
+
+
+def test_offsets_are_read_from_the_index(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.compact([make_record(i) for i in range(3)])
+    store.append(make_record(3))
+    store.close()
+    # Entries from the compaction are sorted, the one appended since follows
+    index = (tmp_path / 'data.elements.idx').read_bytes()
+    assert int(index[:ElementStore.INDEX_HEADER], 16) == 4
+    assert len(index) == ElementStore.INDEX_HEADER + 5 * ElementStore.INDEX_ENTRY
+
+    elements = ElementStore(str(tmp_path / 'data.elements'))
+    assert len(elements) == 5
+    assert elements.get(element_hash({'selector': 'p', 'text': 'story 3'})) == {'selector': 'p', 'text': 'story 3'}
+    assert [elements.get(element_hash(e)) for e in make_record(1)['texts']] == make_record(1)['texts']
+    assert element_hash({'selector': 'p', 'text': 'story 9'}) not in elements
+
+
+def test_missing_or_stale_index_is_rebuilt(tmp_path):
+    elements = ElementStore(str(tmp_path / 'data.elements'))
+    keys = [elements.put({'selector': 'p', 'text': f'story {i}'})[0] for i in range(3)]
+    elements.close()
+    (tmp_path / 'data.elements.idx').unlink()
+    assert ElementStore(str(tmp_path / 'data.elements')).get(keys[2]) == {'selector': 'p', 'text': 'story 2'}
+
+    # An index written for other offsets is caught when a body doesn't match its hash
+    stale = ElementStore(str(tmp_path / 'data.elements'))
+    stale._write_index({key: (1, 5) for key in keys})
+    assert stale.get(keys[1]) == {'selector': 'p', 'text': 'story 1'}
+
+
+def test_cache_is_bounded(tmp_path):
+    elements = ElementStore(str(tmp_path / 'data.elements'), cache_size=2)
+    keys = [elements.put({'selector': 'p', 'text': f'story {i}'})[0] for i in range(5)]
+    assert len(elements._cache) == 2
+    assert [elements.get(key)['text'] for key in keys] == [f'story {i}' for i in range(5)]
+    assert list(elements._cache) == keys[-2:]
+
+
+def test_retain_does_not_cache_bodies_or_keep_dropped_ones(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.append_many([make_record(i) for i in range(3)])
+    store.compact([make_record(0)])
+    assert len(store.elements._cache) == 0
+    # A dropped body is written again when a record needs it
+    store.append(make_record(1))
+    store.close()
+    assert JournalStore(str(tmp_path / 'data.json')).load() == [make_record(0), make_record(1)]
@@ -0,0 +1,40 @@
+from PyQt5.QtCore import Qt
+
+from record_models import ElementTableModel
+
+
+def big_record(make_record, count):
+    return make_record(texts=[{'selector': 'p', 'text': f'text {n}', 'full_text': 'x' * 300} for n in range(count)],
+                       links=[{'selector': 'a', 'text': 'home', 'href': 'http://example.com'}],
+                       images=[{'selector': 'img', 'alt': 'logo', 'src': 'logo.png'}])
+
+
+def test_rows_are_exposed_in_batches(qapp, make_record):
+    model = ElementTableModel(batch_size=100)
+    model.set_record(big_record(make_record, 250))
+    assert model.rowCount() == 100
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 200
+    model.fetch_all()
+    assert model.rowCount() == 252
+    assert not model.canFetchMore()
+
+
+def test_rows_map_to_kind_and_position(qapp, make_record):
+    model = ElementTableModel()
+    model.set_record(big_record(make_record, 3))
+    cell = lambda row, column: model.data(model.index(row, column))
+    assert [cell(row, 0) for row in range(5)] == ['Text', 'Text', 'Text', 'Image', 'Link']
+    assert cell(1, 2) == 'text 1'
+    assert cell(0, 3) == 'x' * 200 + '...'
+    assert model.data(model.index(0, 3), Qt.ToolTipRole) == 'x' * 300
+    assert (cell(3, 2), cell(3, 3)) == ('logo', 'logo.png')
+    assert (cell(4, 2), cell(4, 3)) == ('home', 'http://example.com')
+
+
+def test_search_results_have_source_and_url_columns(qapp):
+    model = ElementTableModel()
+    model.set_results([{'kind': 'texts', 'selector': 'p', 'text': 'hit', 'source': 'selenium', 'url': 'http://x'}])
+    assert model.columnCount() == 6
+    assert [model.data(model.index(0, column)) for column in range(6)] == ['Text', 'p', 'hit', '', 'selenium', 'http://x']
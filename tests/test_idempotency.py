@@ -0,0 +1,57 @@
+import json
+
+from idempotency import RecentKeys, record_key
+from ingest_api import IngestAPI, Request
+
+
+def test_record_key(make_record):
+    assert record_key({'a': 1, 'b': [1, 2]}) == record_key({'b': [1, 2], 'a': 1})
+    assert record_key(make_record(texts=['a'])) != record_key(make_record(texts=['b']))
+    assert record_key(make_record(texts=['a'], metadata={'record_id': 'r1'})) == 'id:r1'
+    assert record_key(make_record(texts=['b'], metadata={'record_id': 'r1'})) == 'id:r1'
+
+
+def test_window_is_bounded_by_size():
+    keys = RecentKeys(max_keys=3)
+    assert all(keys.add(key) for key in 'abcd')
+    assert len(keys) == 3
+    assert keys.add('a')
+    assert not keys.add('d')
+    assert keys.hits == 1
+
+
+def test_window_forgets_old_keys(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('idempotency.time.monotonic', lambda: now[0])
+    keys = RecentKeys(max_age=60)
+    keys.add('a')
+    now[0] += 30
+    keys.add('b')
+    assert not keys.add('a')
+    now[0] += 31
+    assert keys.add('a')
+    assert not keys.add('b')
+
+
+def post(api, data, key=None):
+    headers = {'idempotency-key': key} if key else {}
+    response = api.handle(Request('POST', '/store', headers=headers, body=json.dumps(data).encode('utf-8')))
+    return response.status, json.loads(response.body)['status'] if response.status == 200 else None
+
+
+def test_duplicate_posts_are_acknowledged_once(api, pipeline, make_record):
+    assert post(api, make_record()) == (200, 'success')
+    assert post(api, make_record()) == (200, 'duplicate')
+    assert post(api, make_record(texts=['other']), key='k1') == (200, 'success')
+    assert post(api, make_record(texts=['changed']), key='k1') == (200, 'duplicate')
+    api.submit(make_record())
+    assert len(pipeline.records) == 2
+    assert json.loads(api.handle(Request('GET', '/health')).body)['duplicates'] == 3
+
+
+def test_busy_records_are_not_remembered(pipeline, make_record):
+    api = IngestAPI(pipeline)
+    pipeline.max_pending = 0
+    assert post(api, make_record())[0] == 429
+    pipeline.max_pending = 10
+    assert post(api, make_record()) == (200, 'success')
@@ -0,0 +1,81 @@
+import random
+import threading
+import time
+
+from ingest_pipeline import (DedupTexts, DropEmpty, IngestPipeline, LengthFilter, NormalizeFields,
+                             TrimWhitespace, build_processors)
+
+
+def test_normalize_fields():
+    record = NormalizeFields()({'texts': [{'text': 42}, {'text': None}, 'junk'],
+                                'custom': [{'text': 'c'}], 'links': 'bad',
+                                'metadata': {'timestamp': 0}})
+    assert record['texts'] == [{'text': '42'}, {'text': ''}]
+    assert record['custom_elements'] == [{'text': 'c'}] and 'custom' not in record
+    assert record['links'] == []
+    assert record['metadata']['source'] == 'unknown'
+    assert record['metadata']['timestamp'].startswith('1970-01-01')
+
+
+def test_cleaning_processors():
+    record = {'texts': [{'text': '  hello world  '}, {'text': 'hi'}, {'text': 'hello world'}]}
+    record = TrimWhitespace()(record)
+    record = LengthFilter(min_length=5)(record)
+    assert [t['text'] for t in record['texts']] == ['hello world', 'hello world']
+    dedup = DedupTexts(max_texts=10)
+    assert [t['text'] for t in dedup(record)['texts']] == ['hello world']
+    assert dedup({'texts': [{'text': 'hello world'}]})['texts'] == []
+    assert DropEmpty()({'texts': [], 'links': [{'href': 'x'}]}) is None
+
+
+def test_build_processors_follows_options():
+    names = [p.name for p in build_processors({'trim_whitespace': True, 'remove_duplicates': True,
+                                               'remove_near_duplicates': True, 'remove_empty': True})]
+    assert names == ['normalize', 'trim', 'dedup', 'near_duplicates', 'drop_empty']
+    assert build_processors({'normalize_fields': False}) == []
+
+
+def test_records_reach_the_sink_in_arrival_order():
+    class Jitter:
+        name = 'jitter'
+
+        def __call__(self, record):
+            time.sleep(random.random() / 1000)
+            return record
+
+    received = []
+    pipeline = IngestPipeline(received.append, workers=4)
+    pipeline.processors = [Jitter()]
+    for i in range(200):
+        pipeline.put({'i': i})
+    assert pipeline.drain(timeout=10)
+    assert [r['i'] for r in received] == list(range(200))
+    pipeline.shutdown()
+
+
+def test_drops_errors_and_backpressure():
+    received, dropped, errors = [], [], []
+    release = threading.Event()
+    pipeline = IngestPipeline(received.append, {'remove_empty': True}, workers=1, on_error=errors.append,
+                              max_pending=3, on_drop=dropped.append)
+
+    class Boom:
+        name = 'boom'
+
+        def __call__(self, record):
+            release.wait(5)
+            if record.get('boom'):
+                raise ValueError("bad record")
+            return record
+
+    pipeline.processors = pipeline.processors + [Boom()]
+    assert pipeline.offer({'texts': [{'text': 'a'}]})
+    assert pipeline.offer({'texts': []})
+    assert pipeline.offer({'texts': [{'text': 'b'}], 'boom': True})
+    assert not pipeline.offer({'texts': [{'text': 'c'}]})
+    release.set()
+    assert pipeline.drain(timeout=10)
+    assert [r['texts'] for r in received] == [[{'text': 'a'}], [{'text': 'b'}]]
+    assert dropped == [{'texts': []}] and pipeline.dropped == {'drop_empty': 1}
+    assert errors == ["❌ Ingest processing error: bad record"]
+    pipeline.shutdown()
@@ -0,0 +1,123 @@
+import time
+from types import SimpleNamespace
+
+from ingest_api import IngestAPI
+from ingest_spool import SPOOL_KEY, Spool
+
+
+def test_uncommitted_records_are_replayed_after_a_restart(tmp_path, make_record):
+    spool = Spool(str(tmp_path))
+    seqs = [spool.append(make_record(i)) for i in range(5)]
+    assert seqs == [1, 2, 3, 4, 5]
+    spool.done([1, 2])
+    # Crash: the file is left open and half a line is written
+    spool._file.write(b"6 {\"te")
+    spool._file.flush()
+
+    restarted = Spool(str(tmp_path))
+    assert [(seq, r['texts'][0]['text']) for seq, r in restarted.pending()] == [
+        (3, 'text 2'), (4, 'text 3'), (5, 'text 4')]
+    assert restarted.depth() == 3
+    assert restarted.append(make_record(5)) == 6
+    assert [seq for seq, _ in restarted.pending()] == [3, 4, 5, 6]
+    restarted.close()
+    spool.close()
+
+
+def test_commit_waits_for_every_earlier_record(tmp_path, make_record):
+    spool = Spool(str(tmp_path))
+    for i in range(4):
+        spool.append(make_record(i))
+    spool.done([2, 4])
+    assert spool.committed == 0
+    spool.done([1])
+    assert spool.committed == 2
+    spool.done([3])
+    assert spool.committed == 4 and spool.depth() == 0
+    assert list(spool.pending()) == []
+    spool.close()
+    assert Spool(str(tmp_path)).committed == 4
+
+
+def test_committed_segments_are_deleted(tmp_path, make_record):
+    spool = Spool(str(tmp_path), segment_bytes=1)
+    for i in range(6):
+        spool.append(make_record(i))
+    assert len(list(tmp_path.glob('*.log'))) == 6
+    spool.done(range(1, 5))
+    assert sorted(p.name for p in tmp_path.glob('*.log')) == ['000000000005.log', '000000000006.log']
+    spool.close()
+
+
+def test_quiet_spool_is_synced_by_a_timer(tmp_path, make_record):
+    spool = Spool(str(tmp_path), fsync_interval=0.05)
+    spool._last_sync = time.monotonic()
+    spool.append(make_record(0))
+    assert spool._unsynced
+    deadline = time.monotonic() + 5
+    while spool._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not spool._unsynced
+    spool.close()
+
+
+def test_api_spools_and_releases_dropped_records(tmp_path, pipeline, make_record):
+    spool = Spool(str(tmp_path))
+    api = IngestAPI(pipeline, spool=spool)
+    api.submit(make_record(0))
+    api.submit(make_record(1))
+    assert [r[SPOOL_KEY] for r in pipeline.records] == [1, 2]
+    api.dropped(pipeline.records[0])
+    assert spool.committed == 1
+
+    # What was never stored is queued again on the next start
+    pipeline.records.clear()
+    restarted = IngestAPI(pipeline, spool=Spool(str(tmp_path)))
+    assert restarted.replay() == 1
+    assert pipeline.records == [dict(make_record(1), **{SPOOL_KEY: 2})]
+    restarted.spool.close()
+    spool.close()
+
+
+def test_batch_the_store_refuses_stays_spooled_and_is_retried(tmp_path, monkeypatch, qapp, make_record):
+    from PyQt5.QtWidgets import QWidget
+    from data_manager import DataManager
+
+    class Window(QWidget):
+        def update_extension_status(self, message):
+            pass
+
+    monkeypatch.chdir(tmp_path)
+    spool = Spool(str(tmp_path / 'spool'))
+    window = Window()
+    window.ingest_server = SimpleNamespace(spool=spool)
+    manager = DataManager(window)
+
+    def spooled(i):
+        data = make_record(i)
+        data[SPOOL_KEY] = spool.append(data)
+        return data
+
+    append_many = manager.store.append_many
+
+    def refuse(records):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(manager.store, 'append_many', refuse)
+    manager.add_batch([spooled(0), spooled(1)])
+    assert len(manager.collected_data) == 0
+    assert spool.committed == 0
+    assert manager.retry_timer.isActive()
+    # A crash now replays both records on the next start
+    assert [seq for seq, _ in Spool(str(tmp_path / 'spool')).pending()] == [1, 2]
+
+    # The refused batch is written ahead of the next one once the store works again
+    monkeypatch.setattr(manager.store, 'append_many', append_many)
+    manager.add_batch([spooled(2)])
+    texts = [data['texts'][0]['text'] for data in manager.collected_data.iter_records()]
+    assert texts == ['text 0', 'text 1', 'text 2']
+    assert spool.committed == 3
+    manager.close()
+    assert [r['texts'][0]['text'] for r in manager.store.load()] == texts
+    assert list(Spool(str(tmp_path / 'spool')).pending()) == []
+    spool.close()
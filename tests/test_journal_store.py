@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from data_store import JournalStore, LazyRecordList
+
+
+def test_append_goes_to_journal_and_replays(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'), dedup_elements=False)
+    records = [make_record(i) for i in range(3)]
+    headers = store.append_many(records)
+    store.close()
+
+    assert not (tmp_path / 'data.json').exists()
+    lines = (tmp_path / 'data.jsonl').read_bytes().splitlines()
+    assert [json.loads(line) for line in lines] == records
+    assert [h['file'] for h in headers] == ['journal'] * 3
+
+    reopened = JournalStore(str(tmp_path / 'data.json'), dedup_elements=False)
+    assert reopened.load() == records
+
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'), dedup_elements=False)
+    store.append(make_record(0))
+    store.close()
+    with open(tmp_path / 'data.jsonl', 'ab') as f:
+        f.write(b'{"texts": [{"sel')
+
+    store = JournalStore(str(tmp_path / 'data.json'), dedup_elements=False)
+    assert store.load() == [make_record(0)]
+    store.append(make_record(1))
+    store.close()
+    assert JournalStore(str(tmp_path / 'data.json'), dedup_elements=False).load() == [make_record(0), make_record(1)]
+
+
+def test_failed_append_is_cut_off_so_it_can_be_retried(tmp_path, monkeypatch, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.append(make_record(0))
+    write_index = store._write_index
+
+    def fail(headers):
+        write_index(headers)
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(store, '_write_index', fail)
+    with pytest.raises(OSError):
+        store.append_many([make_record(1), make_record(2)])
+    monkeypatch.setattr(store, '_write_index', write_index)
+    store.append_many([make_record(1), make_record(2)])
+    store.close()
+
+    reopened = JournalStore(str(tmp_path / 'data.json'))
+    assert [reopened.read_record(h) for h in reopened.load_index()] == [make_record(i) for i in range(3)]
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = [make_record(i) for i in range(5)]
+    store.append_many(records)
+    headers = store.compact(store.load())
+
+    assert not (tmp_path / 'data.jsonl').exists()
+    assert [h['file'] for h in headers] == ['snapshot'] * 5
+    assert [store.read_record(h) for h in headers] == records
+    store.append(make_record(5))
+    store.close()
+    assert JournalStore(str(tmp_path / 'data.json')).load() == records + [make_record(5)]
+
+
+def test_rewrite_writes_the_list_as_a_fresh_journal(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.compact([make_record(i) for i in range(4)])
+    elements_size = (tmp_path / 'data.elements').stat().st_size
+    records = LazyRecordList(store, store.load_index()).select([1, 3], {1: make_record(10)})
+
+    headers = store.rewrite(records)
+    assert not (tmp_path / 'data.json').exists()
+    assert [h['file'] for h in headers] == ['journal'] * 2
+    # Bodies are not rewritten; only the new one is appended
+    assert (tmp_path / 'data.elements').stat().st_size > elements_size
+    store.close()
+    reopened = JournalStore(str(tmp_path / 'data.json'))
+    assert reopened.load_index() == headers
+    assert reopened.load() == [make_record(10), make_record(3)]
+
+
+def test_clear_removes_the_files(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.compact([make_record(0)])
+    store.append(make_record(1))
+    store.clear()
+    assert list(tmp_path.iterdir()) == []
+    assert not store.exists()
+    store.append(make_record(2))
+    store.close()
+    assert JournalStore(str(tmp_path / 'data.json')).load() == [make_record(2)]
+
+
+def test_group_commit_syncs_after_fsync_every_records(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'), fsync_every=3, fsync_interval=3600)
+    store.append_many([make_record(0), make_record(1)])
+    assert store._pending == 2
+    store.append(make_record(2))
+    assert store._pending == 0
+    store.close()
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from data_store import JournalStore, LazyRecordList
+
+
+@pytest.fixture
+def saved(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    store.compact([make_record(i, links=[]) for i in range(3)])
+    store.append_many([make_record(3, links=[]), make_record(4, links=[])])
+    store.close()
+    return tmp_path
+
+
+def test_load_index_returns_headers_without_bodies(saved, make_record):
+    store = JournalStore(str(saved / 'data.json'))
+    headers = store.load_index()
+    assert [h['url'] for h in headers] == [f'http://example.com/{i}' for i in range(5)]
+    assert [h['file'] for h in headers] == ['snapshot'] * 3 + ['journal'] * 2
+    assert headers[0]['counts']['texts'] == 1
+
+    records = LazyRecordList(store, headers)
+    assert not records.is_loaded(4)
+    assert records.read(4) == make_record(4, links=[])
+    assert not records.is_loaded(4)
+    assert records[4] == make_record(4, links=[])
+    assert records.is_loaded(4)
+
+
+def test_stale_or_missing_index_is_rebuilt(saved, make_record):
+    expected = JournalStore(str(saved / 'data.json')).load_index()
+    (saved / 'data.idx').unlink()
+    assert JournalStore(str(saved / 'data.json')).load_index() == expected
+
+    # Records appended behind the index's back are picked up from the journal
+    with open(saved / 'data.jsonl', 'ab') as f:
+        f.write(json.dumps(make_record(5, links=[])).encode('utf-8') + b"\n")
+    store = JournalStore(str(saved / 'data.json'), dedup_elements=False)
+    headers = store.load_index()
+    assert len(headers) == 6
+    assert store.read_record(headers[5]) == make_record(5, links=[])
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_legacy_snapshot_is_migrated(tmp_path, indent, make_record):
+    records = [make_record(i, links=[]) for i in range(3)]
+    (tmp_path / 'data.json').write_text(json.dumps(records, indent=indent), encoding='utf-8')
+
+    store = JournalStore(str(tmp_path / 'data.json'))
+    headers = store.load_index()
+    assert [store.read_record(h) for h in headers] == records
+    store.close()
+    # Migrated to one record per line, so the next load only reads the index
+    assert len((tmp_path / 'data.json').read_bytes().splitlines()) == 5
+    assert JournalStore(str(tmp_path / 'data.json')).load_index() == headers
@@ -0,0 +1,57 @@
+import json
+
+from ingest_api import Request
+from metrics import Registry, source_label
+
+
+def test_render_in_prometheus_text_format():
+    registry = Registry()
+    requests = registry.counter('http_requests_total', "Requests", ('path', 'status'))
+    requests.inc('/store', '200')
+    requests.inc('/store', '200', amount=2)
+    requests.inc('/we"ird\\', '500')
+    latency = registry.histogram('latency_seconds', "Latency", ('path',), buckets=(0.1, 1.0))
+    latency.observe('/store', value=0.05)
+    latency.observe('/store', value=0.5)
+    registry.gauge('queue_depth', "Depth", ('stage',), callback=lambda: {'pipeline': 3, 'batcher': 0})
+
+    assert registry.render().splitlines() == [
+        '# HELP http_requests_total Requests',
+        '# TYPE http_requests_total counter',
+        'http_requests_total{path="/store",status="200"} 3',
+        'http_requests_total{path="/we\\"ird\\\\",status="500"} 1',
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{path="/store",le="0.1"} 1',
+        'latency_seconds_bucket{path="/store",le="1"} 2',
+        'latency_seconds_bucket{path="/store",le="+Inf"} 2',
+        'latency_seconds_sum{path="/store"} 0.55',
+        'latency_seconds_count{path="/store"} 2',
+        '# HELP queue_depth Depth',
+        '# TYPE queue_depth gauge',
+        'queue_depth{stage="pipeline"} 3',
+        'queue_depth{stage="batcher"} 0',
+    ]
+
+
+def test_same_name_returns_the_same_family():
+    registry = Registry()
+    assert registry.counter('a_total', "A") is registry.counter('a_total', "A")
+
+
+def test_source_label_is_bounded():
+    assert [source_label(s) for s in ('extension', 'selenium', 'robot_process', 'evil', None)] == [
+        'extension', 'selenium', 'robot_process', 'other', 'other']
+
+
+def test_metrics_endpoint_counts_requests(api):
+    api.handle(Request('POST', '/store', body=json.dumps(
+        {'texts': [{'text': 'x'}], 'metadata': {'source': 'made-up'}}).encode('utf-8')))
+    api.handle(Request('GET', '/nope-123'))
+    response = api.handle(Request('GET', '/metrics'))
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.body.decode('utf-8')
+    assert 'ingest_records_total{source="other",status="stored"}' in text
+    assert 'ingest_http_requests_total{method="GET",path="other",status="404"}' in text
+    assert 'ingest_queue_depth{stage="pipeline"} 1' in text
+    assert 'made-up' not in text and 'nope-123' not in text
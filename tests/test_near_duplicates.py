@@ -0,0 +1,51 @@
+import random
+
+from near_duplicates import NearDuplicateFilter, element_text, lsh_bands, normalize_text
+
+ARTICLE = ("The city council approved the new budget on Tuesday after a long debate "
+           "about funding for public transport and road maintenance across the region.")
+
+
+def test_normalize_text():
+    assert normalize_text("  Updated 12:45   Today\n") == "updated 0:0 today"
+    assert element_text('links', {'text': 'Home', 'href': '/'}) == "Home /"
+    assert element_text('texts', {'text': None}) == ""
+
+
+def test_lsh_bands_multiply_to_num_perm():
+    bands, rows = lsh_bands(64, 0.8)
+    assert bands * rows == 64
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+
+
+def test_near_duplicates_are_dropped_after_the_first():
+    texts = [ARTICLE,
+             ARTICLE.replace("Tuesday", "Wednesday"),
+             "Completely different text about gardening and tomatoes in spring.",
+             ARTICLE.upper(),
+             ARTICLE]
+    assert NearDuplicateFilter().keep(texts) == [True, False, True, False, False]
+
+
+def test_groups_are_independent_and_remember_earlier_calls():
+    dedup = NearDuplicateFilter()
+    assert dedup.keep([ARTICLE], group='p') == [True]
+    assert dedup.keep([ARTICLE], group='h1') == [True]
+    assert dedup.keep([ARTICLE + " Updated 5 minutes ago."], group='p') == [False]
+
+
+def random_text(rng):
+    return " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)) for _ in range(8))
+
+
+def test_max_texts_bounds_memory():
+    rng = random.Random(1)
+    dedup = NearDuplicateFilter(max_texts=100)
+    for _ in range(20):
+        batch = [random_text(rng) for _ in range(30)]
+        assert dedup.keep(batch) == [True] * 30
+    generations = dedup._groups['']
+    assert len(generations) == 2
+    assert sum(len(seen) for seen, _, _ in generations) <= 130
+    # Recent texts are still recognized
+    assert dedup.keep(batch[-1:]) == [False]
@@ -0,0 +1,33 @@
+import pytest
+
+from numeric_extract import extract_numbers, parse_number
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1,234.56', 1234.56),
+    ('1.234,56', 1234.56),
+    ('1 234 567', 1234567.0),
+    ('1,234,567', 1234567.0),
+    ('3,5', 3.5),
+    ('12.75', 12.75),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == expected
+
+
+def test_ambiguous_three_digit_group_uses_decimal_separator():
+    assert parse_number('1,234') == 1234.0
+    assert parse_number('1,234', decimal_separator=',') == 1.234
+    assert parse_number('1.234') == 1.234
+    assert parse_number('1.234', decimal_separator=',') == 1234.0
+
+
+def test_extract_units_and_signs():
+    assert extract_numbers('Price: $1,299.99 (was €1.499,00), save 13%') == [
+        (1299.99, 'USD'), (1499.0, 'EUR'), (13.0, '%')]
+    assert extract_numbers('Change −2.5% and -10 USD') == [(-2.5, '%'), (-10.0, 'USD')]
+    assert extract_numbers('42 items') == [(42.0, '')]
+
+
+def test_numbers_inside_words_are_ignored():
+    assert extract_numbers('item-x2 v1.2.3') == []
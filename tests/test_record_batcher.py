@@ -0,0 +1,45 @@
+import threading
+import time
+
+from record_batcher import RecordBatcher
+
+
+def wait_for(qapp, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_records_from_threads_arrive_in_few_batches(qapp):
+    batcher = RecordBatcher(window_ms=50, max_batch=10000)
+    batches = []
+    batcher.batch_ready.connect(batches.append)
+
+    def produce(offset):
+        for i in range(250):
+            batcher.put(offset + i)
+
+    threads = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert batcher.pending() == 1000
+    wait_for(qapp, lambda: sum(len(batch) for batch in batches) == 1000)
+    assert len(batches) == 1
+    assert sorted(batches[0]) == sorted(n * 1000 + i for n in range(4) for i in range(250))
+    assert batcher.pending() == 0
+
+
+def test_full_batch_flushes_without_waiting_for_the_window(qapp):
+    batcher = RecordBatcher(window_ms=60000, max_batch=3)
+    batches = []
+    batcher.batch_ready.connect(batches.append)
+    for i in range(4):
+        batcher.put(i)
+    wait_for(qapp, lambda: batches)
+    assert batches == [[0, 1, 2]]
+    batcher.flush()
+    assert batches == [[0, 1, 2], [3]]
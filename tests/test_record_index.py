@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from data_store import JournalStore, LazyRecordList
+from element_frame import parse_timestamp
+from record_index import RecordIndex, url_key
+
+SOURCES = ('extension', 'selenium', 'robot_process')
+SITES = ('https://shop.example.com/a', 'http://shop.example.com/b', 'https://news.example.org/', None)
+
+
+@pytest.fixture
+def make_records(make_record):
+    def make_records(count, seed=1):
+        rng = random.Random(seed)
+        records = []
+        for i in range(count):
+            source, url, timestamp = rng.choice(SOURCES), rng.choice(SITES), None
+            if rng.random() > 0.1:
+                timestamp = f'2025-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00'
+            selector = rng.choice(('p', 'h1', '.price'))
+            records.append(make_record(i, texts=['item {i} ' + rng.choice(('sale', 'news', 'misc'))], selector=selector,
+                                       source=source, url=url, timestamp=timestamp))
+        return records
+    return make_records
+
+
+def brute_force(records, source=None, url=None, since=None, until=None, selector=None, text=None, start=0):
+    result = []
+    for i, record in enumerate(records):
+        metadata = record['metadata']
+        timestamp = parse_timestamp(metadata.get('timestamp'))
+        if (i < start or (source and metadata['source'] != source) or
+                (url and not url_key(metadata.get('url')).startswith(url_key(url))) or
+                (since and not timestamp >= parse_timestamp(since)) or
+                (until and not timestamp <= parse_timestamp(until)) or
+                (selector and record['texts'][0]['selector'] != selector) or
+                (text and text.lower() not in record['texts'][0]['text'].lower())):
+            continue
+        result.append(i)
+    return result
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'source': 'selenium'},
+    {'url': 'shop.example.com'},
+    {'url': 'https://news'},
+    {'since': '2025-01-10', 'until': '2025-01-20'},
+    {'source': 'extension', 'url': 'shop', 'since': '2025-01-05'},
+    {'selector': '.price', 'text': 'SALE'},
+    {'source': 'robot_process', 'start': 150},
+])
+def test_query_matches_a_linear_scan(tmp_path, filters, make_records):
+    records = make_records(300)
+    store = JournalStore(str(tmp_path / 'data.json'))
+    headers = store.append_many(records)
+    # Loaded from disk, so selectors are indexed on first use
+    loaded = LazyRecordList(store, headers)
+    index = RecordIndex()
+    index.rebuild(loaded)
+    assert index.query(loaded, **filters) == brute_force(records, **filters)
+    store.close()
+
+
+def test_records_added_with_bodies_index_selectors(make_records):
+    records = LazyRecordList()
+    index = RecordIndex()
+    for record in make_records(50):
+        records.append(record)
+        index.add(records.header(len(records) - 1), record)
+    assert index.selectors_upto == 50
+    assert index.query(records, selector='h1') == brute_force(make_records(50), selector='h1')
+    assert index.sources() == sorted(SOURCES)
+
+
+def test_invalid_date_raises():
+    with pytest.raises(ValueError):
+        RecordIndex().query(LazyRecordList(), since='not a date')
@@ -0,0 +1,43 @@
+from PyQt5.QtCore import Qt
+
+from data_store import JournalStore, LazyRecordList
+from record_models import RecordListModel
+
+
+def test_record_list_rows_come_from_headers(qapp, tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = LazyRecordList(store, store.append_many([make_record(i) for i in range(3)]))
+    records = LazyRecordList(store, records.headers)
+    model = RecordListModel(records)
+
+    assert model.rowCount() == 3
+    assert model.data(model.index(1)) == "2. extension | 2025-01-01T00:00:01\nhttp://example.com/1..."
+    assert model.data(model.index(2), Qt.UserRole) == 2
+    assert not any(records.is_loaded(i) for i in range(3))
+    store.close()
+
+
+def test_appends_are_row_inserts(qapp, make_record):
+    records = LazyRecordList()
+    model = RecordListModel(records)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    records.append(make_record(0))
+    records.append(make_record(1))
+    model.records_appended()
+    assert inserted == [(0, 1)]
+    assert model.rowCount() == 2
+
+
+def test_filtered_rows(qapp, make_record):
+    records = LazyRecordList()
+    for i in range(5):
+        records.append(make_record(i))
+    model = RecordListModel()
+    model.set_records(records, [1, 3])
+    assert model.rowCount() == 2
+    assert model.data(model.index(1), Qt.UserRole) == 3
+    records.append(make_record(5))
+    records.append(make_record(6))
+    model.records_appended([6])
+    assert [model.data(model.index(row), Qt.UserRole) for row in range(3)] == [1, 3, 6]
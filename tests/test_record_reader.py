@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+import threading
+
+import pytest
+
+import record_reader
+from data_store import JournalStore, LazyRecordList
+from ingest_api import Request
+from record_index import RecordIndex
+from record_reader import RecordReader
+
+
+@pytest.fixture
+def make_record(make_record):
+    """Records spread over two sources, three sites and 28 days"""
+    def spread(i):
+        return make_record(i, texts=[f'text {{i}}.{n}' for n in range(3)],
+                           links=[{'selector': 'a', 'href': 'http://example.com/{i}'}],
+                           source='selenium' if i % 2 else 'extension', url=f'http://site{i % 3}.com/page',
+                           timestamp=f'2025-01-{1 + i % 28:02d}T10:00:00')
+    return spread
+
+
+class Records:
+    """The DataManager attributes RecordReader reads"""
+
+    def __init__(self, store, records):
+        self.read_lock = threading.RLock()
+        self.data_generation = 0
+        self.collected_data = LazyRecordList(store, store.append_many(records))
+        self.index = RecordIndex()
+        self.index.rebuild(self.collected_data)
+
+    def replace(self, records):
+        with self.read_lock:
+            self.collected_data = LazyRecordList(records=[])
+            for record in records:
+                self.collected_data.append(record)
+            self.index.rebuild(self.collected_data)
+            self.data_generation += 1
+
+
+@pytest.fixture
+def data(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    yield Records(store, [make_record(i) for i in range(30)])
+    store.close()
+
+
+def get(reader, path, **query):
+    response = (reader.records if path == '/records' else reader.elements)(Request('GET', path, query))
+    if isinstance(response.body, bytes):
+        return response.status, json.loads(response.body)
+    return response, b"".join(response.body)
+
+
+def page_through(reader, path, key, **query):
+    items, cursor = [], None
+    while True:
+        status, page = get(reader, path, **dict(query, **({'cursor': cursor} if cursor else {})))
+        assert status == 200
+        if not page[key]:
+            return items, cursor
+        items += page[key]
+        cursor = page['next_cursor']
+
+
+def test_records_are_paged_with_cursors(data, make_record):
+    reader = RecordReader(data)
+    records, cursor = page_through(reader, '/records', 'records', limit='7')
+    assert records == [make_record(i) for i in range(30)]
+
+    data.collected_data.append(make_record(30))
+    data.index.add(data.collected_data.header(30), make_record(30))
+    assert get(reader, '/records', cursor=cursor)[1]['records'] == [make_record(30)]
+
+
+def test_filters(data, make_record):
+    reader = RecordReader(data)
+    records, _ = page_through(reader, '/records', 'records', source='selenium', url='site1.com',
+                              since='2025-01-05', limit='2')
+    expected = [make_record(i) for i in range(30) if i % 2 and i % 3 == 1 and 1 + i % 28 >= 5]
+    assert records == expected
+
+
+def test_bad_requests(data):
+    reader = RecordReader(data)
+    assert get(reader, '/records', cursor='garbage!')[0] == 400
+    assert get(reader, '/records', limit='0')[0] == 400
+    assert get(reader, '/records', limit=str(record_reader.MAX_PAGE_SIZE + 1))[0] == 400
+    assert get(reader, '/records', since='someday')[0] == 400
+    assert get(reader, '/records', format='xml')[0] == 400
+    assert get(reader, '/elements', kind='tables')[0] == 400
+    assert get(reader, '/elements', format='ndjson', limit='5')[0] == 400
+
+
+def test_cursor_expires_when_earlier_records_are_removed(data, make_record):
+    reader = RecordReader(data)
+    cursor = get(reader, '/records', limit='10')[1]['next_cursor']
+    data.replace([make_record(i) for i in range(30) if i != 3])
+    assert get(reader, '/records', cursor=cursor)[0] == 410
+    data.replace([make_record(i) for i in range(30)])
+    assert get(reader, '/records', cursor=cursor)[1]['records'][0] == make_record(10)
+
+
+def test_elements_are_paged_by_element(data):
+    reader = RecordReader(data)
+    status, page = get(reader, '/elements', limit='5')
+    assert [(e['position'], e['kind']) for e in page['elements']] == [(0, 'texts')] * 3 + [(0, 'links'), (1, 'texts')]
+    # A cursor inside a record's elements is only for /elements
+    assert get(reader, '/records', cursor=page['next_cursor'])[0] == 400
+
+    elements, _ = page_through(reader, '/elements', 'elements', limit='4', kind='texts')
+    assert [e['text'] for e in elements] == [f'text {i}.{n}' for i in range(30) for n in range(3)]
+    assert elements[0] == {'selector': 'p', 'text': 'text 0.0', 'kind': 'texts', 'position': 0,
+                           'source': 'extension', 'url': 'http://site0.com/page', 'timestamp': '2025-01-01T10:00:00'}
+
+
+def test_streams(data, make_record):
+    reader = RecordReader(data)
+    response, body = get(reader, '/records', format='ndjson', source='extension')
+    assert response.content_type == 'application/x-ndjson'
+    assert [json.loads(line) for line in body.splitlines()] == [make_record(i) for i in range(0, 30, 2)]
+    assert response.headers['X-Next-Cursor'] == get(reader, '/records', limit='1000')[1]['next_cursor']
+
+    response, body = get(reader, '/elements', format='csv', kind='links')
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    assert rows[0] == list(record_reader.ELEMENT_COLUMNS)
+    assert [row[7] for row in rows[1:]] == [f'http://example.com/{i}' for i in range(30)]
+
+    _, body = get(reader, '/records', format='csv')
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    assert rows[1][:5] == ['0', 'extension', 'http://site0.com/page', '2025-01-01T10:00:00', '3']
+
+
+def test_change_during_a_stream_ends_it_with_a_resumable_error(data, monkeypatch, make_record):
+    monkeypatch.setattr(record_reader, 'CHUNK_BYTES', 1)
+    reader = RecordReader(data)
+    response = reader.records(Request('GET', '/records', {'format': 'ndjson'}))
+    chunks = iter(response.body)
+    sent = [json.loads(next(chunks)) for _ in range(4)]
+    data.replace([make_record(i) for i in range(30)])
+    trailer = [json.loads(chunk) for chunk in chunks]
+    assert len(trailer) == 1 and trailer[0]['status'] == 409
+    resumed = get(reader, '/records', cursor=trailer[0]['next_cursor'])[1]['records']
+    assert sent + resumed[:26] == [make_record(i) for i in range(30)]
+
+    response = reader.elements(Request('GET', '/elements', {'format': 'ndjson'}))
+    chunks = iter(response.body)
+    sent = [json.loads(next(chunks)) for _ in range(6)]
+    data.replace([make_record(i) for i in range(30)])
+    # Record 1 was read before the change, so its elements are still sent whole
+    *sent_after, trailer = [json.loads(chunk) for chunk in chunks]
+    assert [(e['position'], e.get('text')) for e in sent_after] == [(1, 'text 1.2'), (1, None)]
+    assert trailer['status'] == 409
+    resumed = get(reader, '/elements', cursor=trailer['next_cursor'], limit='1')[1]['elements']
+    assert [(e['position'], e.get('text')) for e in resumed] == [(2, 'text 2.0')]
+
+
+def test_json_page_gets_409_when_records_change(data):
+    reader = RecordReader(data)
+    read = data.collected_data.read
+
+    def read_and_reload(index):
+        if index == 5:
+            data.data_generation += 1
+        return read(index)
+
+    data.collected_data.read = read_and_reload
+    assert get(reader, '/records')[0] == 409
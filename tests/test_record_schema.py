@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from ingest_api import Request
+from record_schema import MAX_ELEMENTS, SchemaError, array, dumps, loads, obj, string, validate_record
+
+
+def valid_record():
+    return {'texts': [{'selector': 'p', 'text': 'hello', 'elementIndex': 0, 'timestamp': 1700000000}],
+            'custom_elements': [{'selector': '.x', 'html': None, 'attributes': {'class': 'x', 'data-id': None},
+                                 'className': {'baseVal': 'svg'}}],
+            'images': [{'selector': 'img', 'src': 'a.png', 'alt': None}],
+            'links': [{'selector': 'a', 'href': '/'}],
+            'tables': [{'selector': 'table', 'headers': ['a', 'b'], 'rows': [['1', None]]}],
+            'metadata': {'url': 'http://x', 'timestamp': '2025-01-01T00:00:00', 'source': 'extension',
+                         'config': {'anything': [1, 2]}},
+            'unknown_field': 'passes through'}
+
+
+def test_valid_record_passes_unchanged():
+    record = valid_record()
+    assert validate_record(record) == valid_record()
+
+
+@pytest.mark.parametrize('change, path', [
+    (lambda r: r['texts'][0].update(text=5), 'texts[0].text'),
+    (lambda r: r['links'].append({'href': None}), 'links[1].href'),
+    (lambda r: r['tables'][0]['rows'][0].append(3), 'tables[0].rows[0][2]'),
+    (lambda r: r['custom_elements'][0]['attributes'].update(x=1), 'custom_elements[0].attributes.x'),
+    (lambda r: r['metadata'].update(source='s' * 201), 'metadata.source'),
+    (lambda r: r['metadata'].update(timestamp=True), 'metadata.timestamp'),
+    (lambda r: r['texts'][0].update(elementIndex=False), 'texts[0].elementIndex'),
+    (lambda r: r.update(images={}), 'images'),
+    (lambda r: r.update(texts=[{'text': 'x'}] * (MAX_ELEMENTS + 1)), 'texts'),
+])
+def test_errors_carry_the_path(change, path):
+    record = valid_record()
+    change(record)
+    with pytest.raises(SchemaError) as error:
+        validate_record(record)
+    assert error.value.path == path
+    assert str(error.value).startswith(path + ": ")
+
+
+def test_required_fields_and_interning():
+    check = obj({'name': string(intern=True)}, required=('name',))
+    with pytest.raises(SchemaError) as error:
+        check({})
+    assert error.value.path == 'name'
+    first = check({'name': ''.join(['sel', 'ector'])})['name']
+    assert first is check({'name': ''.join(['selec', 'tor'])})['name']
+    assert array(string(max_length=2))(['ab']) == ['ab']
+
+
+def test_loads_and_dumps_round_trip():
+    data = {'text': 'héllo', 'n': [1, 2.5, None]}
+    assert loads(dumps(data)) == data
+
+
+def store(api, body):
+    response = api.handle(Request('POST', '/store', body=body))
+    return response.status, json.loads(response.body)
+
+
+def test_store_endpoint_validates(api, pipeline):
+    assert store(api, json.dumps(valid_record()).encode('utf-8')) == (200, {'status': 'success'})
+    status, result = store(api, json.dumps({'texts': [{'text': []}]}).encode('utf-8'))
+    assert status == 400 and result['path'] == 'texts[0].text'
+    assert store(api, b'{"texts": [')[0] == 400
+    assert store(api, b'{}')[0] == 400
+    assert store(api, b'[]')[0] == 400
+    assert len(pipeline.records) == 1
+
+
+def test_submit_drops_invalid_records(api, pipeline):
+    messages = []
+    api.message = messages.append
+    api.submit({'texts': 'oops'})
+    api.submit(valid_record())
+    assert len(pipeline.records) == 1
+    assert messages == ["⚠️ Record rejected: texts: expected array, got string"]
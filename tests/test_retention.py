@@ -0,0 +1,68 @@
+import functools
+
+import pytest
+
+from data_store import JournalStore, LazyRecordList
+from retention import RetentionPolicy
+
+DAY = 86400
+NOW = 1735689600  # 2025-01-01T00:00:00Z
+
+
+def header(source, url, timestamp):
+    return {'source': source, 'url': url, 'timestamp': timestamp}
+
+
+@pytest.fixture
+def make_record(make_record):
+    """Records sharing a navigation element, so compaction has bodies to keep"""
+    return functools.partial(make_record, texts=['text {i}', {'selector': 'nav', 'text': 'Home'}])
+
+
+def test_inactive_policy_keeps_everything():
+    assert RetentionPolicy().select([header('a', 'u', 0)] * 3) == [0, 1, 2]
+
+
+def test_limits_keep_the_newest_records():
+    headers = [header('a', 'u1', NOW - 10 * DAY), header('a', 'u1', None), header('b', 'u2', NOW - DAY),
+               header('a', 'u1', NOW), header('b', None, NOW), header('a', 'u3', NOW)]
+    assert RetentionPolicy(max_age_days=5).select(headers, NOW) == [1, 2, 3, 4, 5]
+    assert RetentionPolicy(max_per_source=2).select(headers) == [2, 3, 4, 5]
+    assert RetentionPolicy(max_per_url=1).select(headers) == [2, 3, 4, 5]
+    assert RetentionPolicy(keep_latest=2).select(headers) == [4, 5]
+    assert RetentionPolicy(max_age_days=5, max_per_source=1, keep_latest=3).select(headers, NOW) == [4, 5]
+
+
+def test_policy_round_trips_through_a_file(tmp_path):
+    path = str(tmp_path / 'retention.json')
+    assert not RetentionPolicy.load(path).active
+    RetentionPolicy(max_age_days=30, keep_latest=1000).save(path)
+    assert RetentionPolicy.load(path).to_dict() == {'max_age_days': 30, 'max_per_source': 0,
+                                                    'max_per_url': 0, 'keep_latest': 1000}
+
+
+def test_compaction_swap_keeps_records_appended_meanwhile(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = LazyRecordList(store, store.append_many([make_record(i) for i in range(10)]))
+    snapshot = records.snapshot()
+    keep = RetentionPolicy(keep_latest=3).select(snapshot.headers)
+    prepared = store.prepare_compaction(snapshot, keep, store.journal_size())
+    # Appended while the compaction job ran
+    store.append_many([make_record(10), make_record(11)])
+
+    headers, reclaimed = store.commit_compaction(prepared)
+    expected = [make_record(i) for i in (7, 8, 9, 10, 11)]
+    assert [store.read_record(h) for h in headers] == expected
+    assert reclaimed > 0
+    store.close()
+    assert JournalStore(str(tmp_path / 'data.json')).load() == expected
+
+
+def test_discarded_compaction_leaves_no_files(tmp_path, make_record):
+    store = JournalStore(str(tmp_path / 'data.json'))
+    records = LazyRecordList(store, store.append_many([make_record(i) for i in range(3)]))
+    prepared = store.prepare_compaction(records, [2], store.journal_size())
+    store.discard_compaction(prepared)
+    store.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.elements', 'data.elements.idx', 'data.idx', 'data.jsonl']
+    assert len(JournalStore(str(tmp_path / 'data.json')).load()) == 3
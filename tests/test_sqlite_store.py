@@ -0,0 +1,90 @@
+import functools
+
+import pytest
+
+from data_store import LazyRecordList
+from sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+def make_record(make_record):
+    """Records with a shared body, a non-string field and an empty element list"""
+    return functools.partial(make_record, texts=['hello world {i}', {'selector': 'h1', 'text': 'shared title'}],
+                             links=[{'selector': 'a', 'href': 'http://example.com/{i}', 'text': 'more', 'rank': 1}],
+                             images=[])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'data.db'))
+    yield store
+    store.close()
+
+
+def test_records_round_trip_with_empty_element_lists(store, make_record):
+    records = [make_record(i) for i in range(3)]
+    headers = store.append_many(records)
+    assert [store.read_record(h) for h in headers] == records
+    assert store.load_index() == headers
+    assert store.load() == records
+
+
+def test_identical_elements_share_one_body(store, make_record):
+    store.append_many([make_record(i) for i in range(3)])
+    bodies = store.conn.execute("SELECT COUNT(*) FROM element_bodies WHERE text = 'shared title'").fetchone()[0]
+    assert bodies == 1
+
+
+def test_search_returns_list_positions(store, make_record):
+    headers = store.append_many([make_record(i) for i in range(4)])
+    # Drop the first record so row ids and list positions differ
+    records = LazyRecordList(store, headers).select([1, 2, 3])
+    records = LazyRecordList(store, store.rewrite(records, headers[:1]))
+
+    results = store.search(text='hello', kind='texts')
+    assert [r['record_id'] for r in results] == [0, 1, 2]
+    assert [r['text'] for r in results] == ['hello world 1', 'hello world 2', 'hello world 3']
+    assert [r['url'] for r in store.search(url='http://example.com/3', kind='links')] == ['http://example.com/3']
+    assert store.search(source='selenium') == []
+    assert store.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 3
+
+
+def test_rewrite_keeps_rows_unless_records_changed(store, make_record):
+    headers = store.append_many([make_record(i) for i in range(3)])
+    assert store.rewrite(LazyRecordList(store, headers)) == headers
+
+    records = LazyRecordList(store, headers).select([0, 1, 2], {1: make_record(10)})
+    new_headers = store.rewrite(records, headers[1:2])
+    assert new_headers[0] == headers[0]
+    assert [store.read_record(h) for h in new_headers] == [make_record(0), make_record(10), make_record(2)]
+    assert [h['id'] for h in store.load_index()] == [h['id'] for h in new_headers]
+    # Bodies only the replaced record used are gone, from the text index too
+    assert [r['text'] for r in store.search(text='hello world 1')] == ['hello world 10']
+
+
+def test_failed_batch_is_rolled_back_alone(store, make_record):
+    store.append(make_record(0))
+    bad = make_record(2)
+    bad['metadata']['title'] = object()
+    with pytest.raises(Exception):
+        store.append_many([make_record(1), bad])
+    store.append_many([make_record(1), make_record(2)])
+    store.sync()
+    assert store.load() == [make_record(i) for i in range(3)]
+
+
+def test_clear_deletes_every_row(store, make_record):
+    store.append_many([make_record(i) for i in range(3)])
+    store.clear()
+    assert store.load_index() == []
+    assert store.conn.execute("SELECT COUNT(*) FROM element_bodies").fetchone()[0] == 0
+    assert store.search(text='hello') == []
+    store.append(make_record(5))
+    assert store.load() == [make_record(5)]
+
+
+def test_compaction_drops_records_outside_keep(store, make_record):
+    records = LazyRecordList(store, store.append_many([make_record(i) for i in range(4)]))
+    prepared = store.prepare_compaction(records, [0, 3])
+    headers, _ = store.commit_compaction(prepared)
+    assert [store.read_record(h) for h in headers] == [make_record(0), make_record(3)]
@@ -0,0 +1,49 @@
+from status_log import StatusLogModel
+
+
+def messages(log):
+    return [line.split('] ', 1)[1] for line in log.lines()]
+
+
+def test_repeats_are_collapsed(qapp):
+    log = StatusLogModel()
+    for _ in range(3):
+        log.append("✅ Data received")
+    log.flush()
+    log.append("✅ Data received")
+    log.append("⚠️ Something else")
+    log.flush()
+    assert messages(log) == ["✅ Data received (repeated 4 times)", "⚠️ Something else"]
+
+
+def test_lines_are_bounded(qapp):
+    log = StatusLogModel(max_lines=10, max_rate=1000)
+    for i in range(25):
+        log.append(f"message {i}")
+        if i % 7 == 0:
+            log.flush()
+    log.flush()
+    assert log.rowCount() == 10
+    assert messages(log) == [f"message {i}" for i in range(15, 25)]
+
+
+def test_rate_limit_suppresses_and_spills_everything(qapp, tmp_path):
+    spill = tmp_path / 'status.log'
+    log = StatusLogModel(max_rate=5, spill_file=str(spill))
+    for i in range(20):
+        log.append(f"message {i}")
+    log.close()
+    shown = messages(log)
+    assert shown[0] == f"⏩ 15 messages suppressed (full log in {spill})"
+    assert shown[1:] == [f"message {i}" for i in range(5)]
+    assert len(spill.read_text(encoding='utf-8').splitlines()) == 20
+
+
+def test_clear(qapp):
+    log = StatusLogModel()
+    log.append("one")
+    log.flush()
+    log.clear()
+    log.append("one")
+    log.flush()
+    assert messages(log) == ["one"]